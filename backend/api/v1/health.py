@@ -0,0 +1,22 @@
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from backend.mcp_instance import mcp
+from backend.core.lifecycle import lifecycle
+
+# Health endpoints
+# /health is the liveness probe (the process answers); /ready is the readiness probe:
+# 200 once the warm-up finished, 503 while starting or draining so no new traffic is routed here
+
+@mcp.custom_route("/health", methods=["GET"], include_in_schema=False)
+async def health(request: Request) -> JSONResponse:
+    """
+    Liveness probe
+    """
+    return JSONResponse({"status": "ok", "state": lifecycle.state})
+
+@mcp.custom_route("/ready", methods=["GET"], include_in_schema=False)
+async def ready(request: Request) -> JSONResponse:
+    """
+    Readiness probe
+    """
+    return JSONResponse(lifecycle.status(), status_code=200 if lifecycle.ready else 503)
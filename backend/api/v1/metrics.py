@@ -0,0 +1,37 @@
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from backend.mcp_instance import mcp
+from backend.core.config import METRICS_PATH, METRICS_API_TOKEN
+from backend.core.logging import get_logger
+from backend.core.llm_client import llm_client
+from backend.core.query_cache import query_cache
+from backend.core.tool_metrics import tool_metrics
+from backend.services.email_dispatcher import email_dispatcher
+
+logger = get_logger(__name__)
+
+# Metrics endpoint
+# Serves the per-tool metrics (calls by outcome, latency and response size histograms)
+# the query cache metrics (hits and misses per service function, size, invalidations)
+# the LLM client metrics (completions by outcome, retries, concurrency)
+# and the email dispatcher metrics (emails by outcome, retries, queue, SMTP connections)
+# in the Prometheus text exposition format, on the same HTTP server as the SSE transport
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+async def metrics(request: Request) -> PlainTextResponse:
+    """
+    Prometheus scrape endpoint
+
+    Args:
+        request: Incoming HTTP request (bearer token checked when METRICS_API_TOKEN is set)
+    """
+    if METRICS_API_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_API_TOKEN}":
+        logger.warning("Attempted access with invalid token to the metrics endpoint")
+        return PlainTextResponse("Unauthorized\n", status_code=401)
+    body = tool_metrics.render_prometheus() + query_cache.render_prometheus() + llm_client.render_prometheus()
+    body += email_dispatcher.render_prometheus()
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
+
+if METRICS_PATH:
+    mcp.custom_route(METRICS_PATH, methods=["GET"], include_in_schema=False)(metrics)
@@ -0,0 +1,242 @@
+from typing import Optional
+from backend.mcp_instance import mcp
+from backend.core.config import ADMIN_API_TOKEN
+from backend.core.database import database
+from backend.core.logging import get_logger
+from backend.core.query_cache import query_cache
+from backend.core.table_snapshot import reference_snapshot
+from backend.core.query_stats import query_stats
+from backend.services.billing_service import rebuild_billing_summary
+from backend.services.email_dispatcher import email_dispatcher
+from backend.services.report_cache import report_cache, report_cache_table_stats, prune_report_texts, clear_report_texts
+
+logger = get_logger(__name__)
+
+# Administrative tools
+# These functions expose operational information about the server (database pool health, query statistics, etc.)
+# They require the ADMIN_API_TOKEN because they reveal internal details of the deployment,
+# and are disabled while it is not set
+
+
+def _check_admin_token(api_token: str, tool: str) -> Optional[dict]:
+    """
+    Returns the error response for a call without a valid admin token, or None if it is authorized.
+    """
+    if not ADMIN_API_TOKEN:
+        logger.warning(f"Administrative tool {tool} called while ADMIN_API_TOKEN is not set")
+        return {"success": False, "error": "Administrative tools are disabled. Set ADMIN_API_TOKEN to enable them."}
+    if api_token != ADMIN_API_TOKEN:
+        logger.warning(f"Attempted access with invalid api_token in {tool}")
+        return {"success": False, "error": "Invalid or missing API token. Access denied."}
+    return None
+
+@mcp.tool(
+    name="pool_stats",
+    description="Report the health of the database connection pool: size, in-use and idle connections, waiters and acquire-latency percentiles. Requires a valid api_token."
+)
+async def pool_stats(api_token: str) -> dict:
+    """
+    Report the health of the database connection pool
+
+    Args:
+        api_token: Administrative API token
+    """
+    denied = _check_admin_token(api_token, "pool_stats")
+    if denied:
+        return denied
+    try:
+        return {"success": True, "pool": database.pool_stats()}
+    except Exception as e:
+        logger.error(f"Unexpected error in pool_stats: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool(
+    name="query_stats",
+    description="Report per-query statistics: latency percentiles, row counts and error counts for every normalized SQL statement and calling service function, plus totals per caller. Optionally enable/disable collection or reset the counters. Requires a valid api_token."
+)
+async def query_stats_tool(
+    api_token: str,
+    top: int = 20,
+    order_by: str = "total_ms",
+    enable: Optional[bool] = None,
+    reset: bool = False
+) -> dict:
+    """
+    Report the query statistics collected on the pooled connections
+
+    Args:
+        api_token: Administrative API token
+        top: Maximum number of statements and callers returned
+        order_by: Sort field: total_ms, calls, errors, rows, p99 or max
+        enable: Turn collection on (True) or off (False); unchanged if omitted
+        reset: Discard the collected statistics after reporting them
+    """
+    denied = _check_admin_token(api_token, "query_stats")
+    if denied:
+        return denied
+    try:
+        if enable is True:
+            database.add_query_observer(query_stats)
+        elif enable is False:
+            database.remove_query_observer(query_stats)
+        snapshot = query_stats.snapshot(top=max(1, top), order_by=order_by)
+        if reset:
+            query_stats.reset()
+        return {"success": True, "enabled": database.has_query_observer(query_stats), **snapshot}
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in query_stats: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool(
+    name="slow_queries",
+    description="List the most recent SQL statements slower than DB_SLOW_QUERY_MS, with their normalized text, parameter types, duration, calling service function and captured plan. Requires a valid api_token."
+)
+async def slow_queries_tool(api_token: str, limit: int = 20, clear: bool = False) -> dict:
+    """
+    List the most recent slow SQL statements
+
+    Args:
+        api_token: Administrative API token
+        limit: Maximum number of statements returned (newest first)
+        clear: Forget the recorded statements after listing them
+    """
+    denied = _check_admin_token(api_token, "slow_queries")
+    if denied:
+        return denied
+    try:
+        slow_log = database.slow_query_log
+        result = {
+            "success": True,
+            "enabled": slow_log.enabled,
+            "threshold_ms": round(slow_log.threshold * 1000, 3),
+            "total": slow_log.total,
+            "queries": slow_log.recent(max(1, limit)),
+        }
+        if clear:
+            slow_log.clear()
+        return result
+    except Exception as e:
+        logger.error(f"Unexpected error in slow_queries: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool(
+    name="query_cache",
+    description="Report the query result cache: size, hits, misses and coalesced calls (in total and per service function), evictions, invalidations by table and whether the change listener is connected. Optionally empty the cache or reset the counters. Requires a valid api_token."
+)
+async def query_cache_tool(api_token: str, clear: bool = False, reset: bool = False) -> dict:
+    """
+    Report the query result cache statistics
+
+    Args:
+        api_token: Administrative API token
+        clear: Drop every cached result after reporting
+        reset: Zero the counters after reporting
+    """
+    denied = _check_admin_token(api_token, "query_cache")
+    if denied:
+        return denied
+    try:
+        result = {"success": True, "cache": query_cache.stats()}
+        if clear:
+            query_cache.clear()
+        if reset:
+            query_cache.reset_stats()
+        return result
+    except Exception as e:
+        logger.error(f"Unexpected error in query_cache: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool(
+    name="reference_snapshot",
+    description="Report the in-memory replica of the clients and managers tables: whether its change listener is connected and, per table, if it is loaded, its row count, loads and applied changes. Requires a valid api_token."
+)
+async def reference_snapshot_tool(api_token: str) -> dict:
+    """
+    Report the state of the in-memory replica of the reference tables
+
+    Args:
+        api_token: Administrative API token
+    """
+    denied = _check_admin_token(api_token, "reference_snapshot")
+    if denied:
+        return denied
+    try:
+        return {"success": True, "snapshot": reference_snapshot.stats()}
+    except Exception as e:
+        logger.error(f"Unexpected error in reference_snapshot: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@mcp.tool(
+    name="rebuild_billing_summary",
+    description="Recompute the billing summary used by billing_summary from the invoices table, after backfills or loads that bypassed its triggers. Invoice writes wait until it finishes. Requires a valid api_token."
+)
+async def rebuild_billing_summary_tool(api_token: str) -> dict:
+    """
+    Rebuild the billing summary table from the invoices
+
+    Args:
+        api_token: Administrative API token
+    """
+    denied = _check_admin_token(api_token, "rebuild_billing_summary")
+    if denied:
+        return denied
+    result = await rebuild_billing_summary()
+    if not result.get("success", True):
+        return result
+    return {"success": True, "groups": result["groups"]}
+
+
+@mcp.tool(
+    name="report_cache",
+    description="Report the cache of LLM report texts: hits, misses and coalesced generations in this worker, and the entries and hits stored for all workers. Optionally delete the expired entries or every entry. Requires a valid api_token."
+)
+async def report_cache_tool(api_token: str, prune: bool = False, clear: bool = False) -> dict:
+    """
+    Report the LLM report text cache statistics
+
+    Args:
+        api_token: Administrative API token
+        prune: Delete the entries older than LLM_REPORT_CACHE_TTL after reporting
+        clear: Delete every entry after reporting
+    """
+    denied = _check_admin_token(api_token, "report_cache")
+    if denied:
+        return denied
+    stored = await report_cache_table_stats()
+    if not stored.get("success", True):
+        return stored
+    result = {"success": True, "cache": {**report_cache.stats(), "stored": stored}}
+    if clear or prune:
+        deleted = await (clear_report_texts() if clear else prune_report_texts(report_cache.ttl))
+        if not deleted.get("success", True):
+            return deleted
+        result["deleted"] = deleted["deleted"]
+    return result
+
+
+@mcp.tool(
+    name="email_queue",
+    description="Report the email dispatcher: emails sent and failed, retries, emails queued and being sent, open SMTP sessions and connections opened. Requires a valid api_token."
+)
+async def email_queue_tool(api_token: str) -> dict:
+    """
+    Report the email dispatcher statistics
+
+    Args:
+        api_token: Administrative API token
+    """
+    denied = _check_admin_token(api_token, "email_queue")
+    if denied:
+        return denied
+    try:
+        return {"success": True, "email": email_dispatcher.stats()}
+    except Exception as e:
+        logger.error(f"Unexpected error in email_queue: {e}")
+        return {"success": False, "error": str(e)}
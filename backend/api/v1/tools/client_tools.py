@@ -2,9 +2,10 @@ from backend.mcp_instance import mcp
 from backend.services.client_service import (
     get_all_clients as service_get_all_clients,
     create_client as service_create_client, 
+    bulk_create_clients as service_bulk_create_clients,
     update_client as service_update_client, 
-    get_client_by_id as service_get_client_by_id,
-    delete_client as service_delete_client
+    load_client_by_id as service_load_client_by_id,
+    delete_client_returning as service_delete_client_returning
 )
 from backend.models.client import (
     ClientCreate, 
@@ -14,8 +15,11 @@ from backend.models.client import (
 )
 from typing import List, Dict, Any
 from datetime import datetime
+from backend.core.bulk import validate_rows, row_results
+from backend.core.config import PAGE_SIZE_DEFAULT, BULK_MAX_ROWS
 from backend.core.database import database
 from backend.core.logging import get_logger
+from backend.core.pagination import clamp_limit, resolve_after_id, split_page
 
 logger = get_logger(__name__)
 
@@ -24,25 +28,39 @@ logger = get_logger(__name__)
 
 @mcp.tool(
     name="list_clients",
-    description="List clients from the database",
+    description="List clients from the database, one page at a time. Pass the returned next_cursor as cursor to get the next page.",
 )
-async def list_clients() -> dict:
-    """List clients from the database"""
+async def list_clients(limit: int = PAGE_SIZE_DEFAULT, after_id: int = 0, cursor: str = "") -> dict:
+    """
+    List clients from the database, one page at a time
+
+    Args:
+        limit: Maximum number of clients per page
+        after_id: Return clients with an ID greater than this one
+        cursor: Opaque cursor returned as next_cursor by a previous call (overrides after_id)
+    """
     try:
-        # Get all clients from the service
-        clients_data = await service_get_all_clients()
+        page_size = clamp_limit(limit)
+        start_after = resolve_after_id(after_id, cursor)
+        # Fetch one extra row to know whether there is a next page
+        clients_data = await service_get_all_clients(limit=page_size + 1, after_id=start_after)
         if isinstance(clients_data, dict) and not clients_data.get("success", True):
             logger.error(f"Error listing clients: {clients_data.get('error', clients_data)}")
             return clients_data
+        page, next_cursor = split_page(clients_data, page_size)
         processed_clients = []
         
         # Process each client to handle dates correctly
-        for client_dict in clients_data:
+        for client_dict in page:
             processed_clients.append(ClientOut(**client_dict))
             
-        # Return the serialized list of clients
+        # Return the serialized page of clients
         logger.debug(f"TOOL list_clients response: {[c.model_dump() for c in processed_clients]}")
-        return {"success": True, "clients": [c.model_dump() for c in processed_clients]}
+        return {
+            "success": True,
+            "clients": [c.model_dump() for c in processed_clients],
+            "next_cursor": next_cursor
+        }
     except Exception as e:
         # Catch any error and return it in the response
         logger.error(f"Unexpected error in list_clients: {e}")
@@ -62,7 +80,7 @@ async def get_client(client_id: int) -> dict:
     """
     try:
         # Search for the client by its ID using the service
-        client_data = await service_get_client_by_id(client_id)
+        client_data = await service_load_client_by_id(client_id)
         if not client_data:
             # If the client is not found, return an error message
             logger.warning(f"Client with ID {client_id} not found")
@@ -120,6 +138,51 @@ async def create_client_tool(name: str, city: str = "", email: str = "") -> dict
         return {"success": False, "error": str(e)}
 
 
+@mcp.tool(
+    name="bulk_create_clients",
+    description=f"Create many clients in one call (up to {BULK_MAX_ROWS}). Each row is an object with name (required), city and email. Returns one result per row; set all_or_nothing=true to create nothing if any row is invalid.",
+)
+async def bulk_create_clients_tool(clients: List[Dict[str, Any]], all_or_nothing: bool = False) -> dict:
+    """
+    Create many clients in one call
+
+    Args:
+        clients: Rows with name (required), city and email
+        all_or_nothing: Create nothing if any row is invalid
+    """
+    try:
+        if len(clients) > BULK_MAX_ROWS:
+            return {"success": False, "error": f"Too many rows: {len(clients)} (maximum {BULK_MAX_ROWS})"}
+        # Validate the whole batch at once; invalid rows get their own error
+        valid, errors = validate_rows(ClientCreate, clients)
+        if errors and all_or_nothing:
+            logger.warning(f"bulk_create_clients rejected: {len(errors)} invalid rows")
+            return {
+                "success": False,
+                "error": f"{len(errors)} rows are invalid; no client was created",
+                "results": row_results(len(clients), {}, errors, "client")
+            }
+        created_data = await service_bulk_create_clients([client for _, client in valid]) if valid else []
+        if isinstance(created_data, dict) and not created_data.get("success", True):
+            logger.error(f"Error in bulk client creation: {created_data.get('error', created_data)}")
+            return created_data
+        created = {
+            index: ClientOut(**client_data).model_dump()
+            for (index, _), client_data in zip(valid, created_data)
+        }
+        logger.info(f"TOOL bulk_create_clients created {len(created)} clients, {len(errors)} rows failed")
+        return {
+            "success": True,
+            "created": len(created),
+            "failed": len(errors),
+            "results": row_results(len(clients), created, errors, "client")
+        }
+    except Exception as e:
+        # Catch any error and return it in the response
+        logger.error(f"Unexpected error in bulk_create_clients_tool: {e}")
+        return {"success": False, "error": str(e)}
+
+
 @mcp.tool(
     name="update_client",
     description="Update data of an existing client",
@@ -163,34 +226,25 @@ async def delete_client_tool(client_id: int) -> ClientDeleteResponse:
         client_id: ID of the client to delete
     """
     try:
-        # First check that the client exists
-        client_to_delete_data = await service_get_client_by_id(client_id)
-        if not client_to_delete_data:
+        # A single DELETE ... RETURNING both deletes the client and returns its data
+        deleted_client_data = await service_delete_client_returning(client_id)
+        if not deleted_client_data:
             # If the client is not found, return an error message
             logger.warning(f"Client with ID {client_id} not found for deletion")
             return ClientDeleteResponse(success=False, message=f"Client with ID {client_id} not found")
         
-        if isinstance(client_to_delete_data, dict) and not client_to_delete_data.get("success", True):
-            logger.error(f"Error getting client for deletion: {client_to_delete_data.get('error', client_to_delete_data)}")
-            return ClientDeleteResponse(success=False, message=client_to_delete_data.get("error", "Unknown error"))
-        
-        # Create a Pydantic object for the client to be deleted
-        deleted_client_out = ClientOut(**client_to_delete_data)
-        
-        # Call the service to delete the client from the database
-        deleted = await service_delete_client(client_id)
-        if deleted:
-            # If successfully deleted, return a success message and the deleted client data
-            logger.info(f"TOOL delete_client response: Client ID {client_id} deleted")
-            return ClientDeleteResponse(
-                success=True, 
-                message=f"Client with ID {client_id} deleted successfully",
-                deleted_client=deleted_client_out
-            )
-        else:
+        if isinstance(deleted_client_data, dict) and not deleted_client_data.get("success", True):
             # If there was a problem deleting, return an error message
-            logger.error(f"Could not delete client with ID {client_id}")
+            logger.error(f"Could not delete client with ID {client_id}: {deleted_client_data.get('error', deleted_client_data)}")
             return ClientDeleteResponse(success=False, message=f"Could not delete client with ID {client_id}")
+        
+        # Return a success message and the deleted client data
+        logger.info(f"TOOL delete_client response: Client ID {client_id} deleted")
+        return ClientDeleteResponse(
+            success=True, 
+            message=f"Client with ID {client_id} deleted successfully",
+            deleted_client=ClientOut(**deleted_client_data)
+        )
     except Exception as e:
         # Catch any error and return it in the response
         logger.error(f"Unexpected error in delete_client_tool: {e}")
@@ -1,23 +1,34 @@
 from backend.mcp_instance import mcp
+from fastmcp import Context
 from backend.services.invoice_service import (
     get_all_invoices as service_get_all_invoices,
-    get_invoice_by_id as service_get_invoice_by_id,
+    iter_all_invoices as service_iter_all_invoices,
+    load_invoice_by_id as service_load_invoice_by_id,
     get_invoices_by_client_id as service_get_invoices_by_client_id,
     create_invoice as service_create_invoice,
+    bulk_create_invoices as service_bulk_create_invoices,
     update_invoice as service_update_invoice,
-    delete_invoice as service_delete_invoice
+    bulk_update_invoice_status as service_bulk_update_invoice_status,
+    delete_invoice_returning as service_delete_invoice_returning
 )
 from backend.models.invoice import (
     InvoiceCreate, 
     InvoiceUpdate, 
     InvoiceOut, 
-    InvoiceDeleteResponse
+    InvoiceDeleteResponse,
+    InvoiceStatus
 )
-from backend.services.client_service import get_client_by_id as service_get_client_by_id
-from typing import List, Dict, Any
+from backend.services.client_service import load_client_by_id as service_load_client_by_id
+from backend.services.billing_service import BILLING_DIMENSIONS, get_billing_summary as service_get_billing_summary
+from typing import List, Dict, Any, Optional, get_args
 from decimal import Decimal
 from datetime import date
+import json
+from backend.core.bulk import validate_rows, row_results
+from backend.core.config import PAGE_SIZE_DEFAULT, STREAM_CHUNK_SIZE, STREAM_CHUNK_SIZE_MAX, BULK_MAX_ROWS
 from backend.core.logging import get_logger
+from backend.core.pagination import clamp_limit, resolve_after_id, split_page
+from backend.core.periods import parse_period
 
 logger = get_logger(__name__)
 
@@ -26,25 +37,74 @@ logger = get_logger(__name__)
 
 @mcp.tool(
     name="list_invoices",
-    description="List all invoices from the database."
+    description="List invoices from the database, one page at a time. Pass the returned next_cursor as cursor to get the next page."
 )
-async def list_invoices() -> Dict[str, Any]:
-    invoices_data = await service_get_all_invoices()
+async def list_invoices(limit: int = PAGE_SIZE_DEFAULT, after_id: int = 0, cursor: str = "") -> Dict[str, Any]:
+    try:
+        page_size = clamp_limit(limit)
+        start_after = resolve_after_id(after_id, cursor)
+    except ValueError as e:
+        logger.warning(f"Invalid pagination parameters in list_invoices: {e}")
+        return {"success": False, "error": str(e)}
+    # Fetch one extra row to know whether there is a next page
+    invoices_data = await service_get_all_invoices(limit=page_size + 1, after_id=start_after)
     if isinstance(invoices_data, dict) and not invoices_data.get("success", True):
         logger.error(f"Error listing invoices: {invoices_data.get('error', invoices_data)}")
         return invoices_data
-    processed_invoices = []
-    for invoice_dict in invoices_data:
-        processed_invoices.append(InvoiceOut(**invoice_dict))
-    logger.debug(f"TOOL list_invoices response: {[i.model_dump() for i in processed_invoices]}")
-    return {"success": True, "invoices": [i.model_dump() for i in processed_invoices]}
+    page, next_cursor = split_page(invoices_data, page_size)
+    # Validate and dump in a single pass so models and dumps are not held side by side
+    invoices = [InvoiceOut(**invoice_dict).model_dump() for invoice_dict in page]
+    logger.debug("TOOL list_invoices response: %s", invoices)
+    return {
+        "success": True,
+        "invoices": invoices,
+        "next_cursor": next_cursor
+    }
+
+async def _send_invoice_chunk(ctx: Context, chunk_number: int, sent: int, invoices: List[Dict[str, Any]]) -> None:
+    """
+    Sends a chunk of streamed invoices to the client.
+    Uses a progress notification when the client supplied a progress token,
+    otherwise falls back to a log message notification.
+    """
+    message = json.dumps({"chunk": chunk_number, "invoices": invoices}, default=str)
+    meta = ctx.request_context.meta
+    if meta is not None and meta.progressToken is not None:
+        await ctx.report_progress(progress=sent, total=None, message=message)
+    else:
+        await ctx.log(message, level="info", logger_name="stream_invoices")
+
+@mcp.tool(
+    name="stream_invoices",
+    description=(
+        "Stream every invoice in fixed-size chunks sent as progress notifications "
+        "(or log notifications if no progress token is given). Returns only a summary. "
+        "Use it instead of list_invoices when the full invoice set is needed."
+    )
+)
+async def stream_invoices(ctx: Context, chunk_size: int = STREAM_CHUNK_SIZE) -> Dict[str, Any]:
+    if chunk_size <= 0 or chunk_size > STREAM_CHUNK_SIZE_MAX:
+        chunk_size = STREAM_CHUNK_SIZE
+    sent = 0
+    chunks = 0
+    try:
+        async for chunk in service_iter_all_invoices(chunk_size=chunk_size):
+            invoices = [InvoiceOut(**invoice_dict).model_dump() for invoice_dict in chunk]
+            sent += len(invoices)
+            chunks += 1
+            await _send_invoice_chunk(ctx, chunks, sent, invoices)
+    except Exception as e:
+        logger.error(f"Error streaming invoices after {sent} rows: {e}")
+        return {"success": False, "error": str(e), "invoices_sent": sent, "chunks": chunks}
+    logger.info(f"TOOL stream_invoices sent {sent} invoices in {chunks} chunks")
+    return {"success": True, "invoices_sent": sent, "chunks": chunks}
 
 @mcp.tool(
     name="get_invoice",
     description="Get an invoice by its ID."
 )
 async def get_invoice(invoice_id: int) -> Dict[str, Any]:
-    invoice_data = await service_get_invoice_by_id(invoice_id)
+    invoice_data = await service_load_invoice_by_id(invoice_id)
     if not invoice_data:
         logger.warning(f"Invoice with ID {invoice_id} not found")
         return {"success": False, "error": f"Invoice with ID {invoice_id} not found"}
@@ -57,23 +117,33 @@ async def get_invoice(invoice_id: int) -> Dict[str, Any]:
 
 @mcp.tool(
     name="list_client_invoices",
-    description="List all invoices for a specific client."
+    description="List the invoices of a specific client, one page at a time. Pass the returned next_cursor as cursor to get the next page."
 )
-async def list_client_invoices(client_id: int) -> Dict[str, Any]:
+async def list_client_invoices(client_id: int, limit: int = PAGE_SIZE_DEFAULT, after_id: int = 0, cursor: str = "") -> Dict[str, Any]:
+    try:
+        page_size = clamp_limit(limit)
+        start_after = resolve_after_id(after_id, cursor)
+    except ValueError as e:
+        logger.warning(f"Invalid pagination parameters in list_client_invoices: {e}")
+        return {"success": False, "error": str(e)}
     # Validate client existence
-    client = await service_get_client_by_id(client_id)
+    client = await service_load_client_by_id(client_id)
     if not client:
         logger.warning(f"Client with ID {client_id} not found when listing invoices")
         return {"success": False, "error": f"Client with ID {client_id} not found"}
-    invoices_data = await service_get_invoices_by_client_id(client_id)
+    # Fetch one extra row to know whether there is a next page
+    invoices_data = await service_get_invoices_by_client_id(client_id, limit=page_size + 1, after_id=start_after)
     if isinstance(invoices_data, dict) and not invoices_data.get("success", True):
         logger.error(f"Error listing invoices for client {client_id}: {invoices_data.get('error', invoices_data)}")
         return invoices_data
-    processed_invoices = []
-    for invoice_dict in invoices_data:
-        processed_invoices.append(InvoiceOut(**invoice_dict))
-    logger.debug(f"TOOL list_client_invoices response for client_id {client_id}: {[i.model_dump() for i in processed_invoices]}")
-    return {"success": True, "invoices": [i.model_dump() for i in processed_invoices]}
+    page, next_cursor = split_page(invoices_data, page_size)
+    invoices = [InvoiceOut(**invoice_dict).model_dump() for invoice_dict in page]
+    logger.debug("TOOL list_client_invoices response for client_id %s: %s", client_id, invoices)
+    return {
+        "success": True,
+        "invoices": invoices,
+        "next_cursor": next_cursor
+    }
 
 @mcp.tool(
     name="create_invoice",
@@ -86,11 +156,7 @@ async def create_invoice_tool(
     due_date: str = "", 
     status: str = ""
 ) -> Dict[str, Any]:
-    # Validate client existence
-    client = await service_get_client_by_id(client_id)
-    if not client:
-        logger.warning(f"Client with ID {client_id} not found when creating invoice")
-        return {"success": False, "error": f"Client with ID {client_id} not found"}
+    # An unknown client_id is reported by the service from the foreign key violation
     invoice_in = InvoiceCreate(
         client_id=client_id, 
         amount=Decimal(amount),
@@ -106,6 +172,52 @@ async def create_invoice_tool(
     logger.info(f"TOOL create_invoice response: {new_invoice.model_dump()}")
     return {"success": True, "invoice": new_invoice.model_dump()}
 
+@mcp.tool(
+    name="bulk_create_invoices",
+    description=f"Create many invoices in one call (up to {BULK_MAX_ROWS}). Each row is an object with client_id and amount (required), issued_at and due_date (YYYY-MM-DD) and status (pending, paid or canceled). Returns one result per row; set all_or_nothing=true to create nothing if any row is invalid."
+)
+async def bulk_create_invoices_tool(invoices: List[Dict[str, Any]], all_or_nothing: bool = False) -> Dict[str, Any]:
+    try:
+        if len(invoices) > BULK_MAX_ROWS:
+            return {"success": False, "error": f"Too many rows: {len(invoices)} (maximum {BULK_MAX_ROWS})"}
+        # Validate the whole batch at once; invalid rows get their own error
+        valid, errors = validate_rows(InvoiceCreate, invoices)
+        if errors and all_or_nothing:
+            logger.warning(f"bulk_create_invoices rejected: {len(errors)} invalid rows")
+            return {
+                "success": False,
+                "error": f"{len(errors)} rows are invalid; no invoice was created",
+                "results": row_results(len(invoices), {}, errors, "invoice")
+            }
+        created = {}
+        if valid:
+            bulk_result = await service_bulk_create_invoices([invoice for _, invoice in valid], all_or_nothing=all_or_nothing)
+            if not bulk_result.get("success", True):
+                logger.error(f"Error in bulk invoice creation: {bulk_result.get('error', bulk_result)}")
+                return bulk_result
+            # The service reports by position in the list it received: map back to input rows
+            for position, invoice_data in bulk_result["created"].items():
+                created[valid[position][0]] = InvoiceOut(**invoice_data).model_dump()
+            for position, error in bulk_result["errors"].items():
+                errors[valid[position][0]] = error
+        if errors and all_or_nothing:
+            logger.warning(f"bulk_create_invoices rejected: {len(errors)} rows reference unknown clients")
+            return {
+                "success": False,
+                "error": f"{len(errors)} rows reference unknown clients; no invoice was created",
+                "results": row_results(len(invoices), {}, errors, "invoice")
+            }
+        logger.info(f"TOOL bulk_create_invoices created {len(created)} invoices, {len(errors)} rows failed")
+        return {
+            "success": True,
+            "created": len(created),
+            "failed": len(errors),
+            "results": row_results(len(invoices), created, errors, "invoice")
+        }
+    except Exception as e:
+        logger.error(f"Unexpected error in bulk_create_invoices_tool: {e}")
+        return {"success": False, "error": str(e)}
+
 @mcp.tool(
     name="update_invoice",
     description="Update an existing invoice."
@@ -120,11 +232,7 @@ async def update_invoice_tool(
 ) -> Dict[str, Any]:
     update_payload = {}
     if client_id:
-        # Validate client existence
-        client = await service_get_client_by_id(int(client_id))
-        if not client:
-            logger.warning(f"Client with ID {client_id} not found when updating invoice")
-            return {"success": False, "error": f"Client with ID {client_id} not found"}
+        # An unknown client_id is reported by the service from the foreign key violation
         update_payload['client_id'] = int(client_id)
     if amount:
         update_payload['amount'] = Decimal(amount)
@@ -149,27 +257,108 @@ async def update_invoice_tool(
     logger.info(f"TOOL update_invoice response: {updated_invoice.model_dump()}")
     return {"success": True, "invoice": updated_invoice.model_dump()}
 
+@mcp.tool(
+    name="bulk_update_invoice_status",
+    description=f"Change the status of many invoices in one statement. Select them by invoice_ids and/or filters (client_id, current status, issued_from/issued_to as YYYY-MM-DD). Invoices already in new_status are skipped. Use dry_run=true to only count them; if more than max_rows (at most {BULK_MAX_ROWS}) would change, nothing is updated."
+)
+async def bulk_update_invoice_status_tool(
+    new_status: str,
+    invoice_ids: Optional[List[int]] = None,
+    client_id: int = 0,
+    status: str = "",
+    issued_from: str = "",
+    issued_to: str = "",
+    dry_run: bool = False,
+    max_rows: int = BULK_MAX_ROWS
+) -> Dict[str, Any]:
+    valid_statuses = get_args(InvoiceStatus)
+    for value in (new_status, status):
+        if value and value not in valid_statuses:
+            return {"success": False, "error": f"Invalid status '{value}'. Valid values: {', '.join(valid_statuses)}"}
+    if not new_status:
+        return {"success": False, "error": "new_status is required"}
+    try:
+        issued_from_date = date.fromisoformat(issued_from) if issued_from else None
+        issued_to_date = date.fromisoformat(issued_to) if issued_to else None
+    except ValueError as e:
+        return {"success": False, "error": f"Invalid date: {e}"}
+    result = await service_bulk_update_invoice_status(
+        new_status,
+        invoice_ids=invoice_ids if invoice_ids else None,
+        client_id=client_id if client_id else None,
+        status=status if status else None,
+        issued_from=issued_from_date,
+        issued_to=issued_to_date,
+        dry_run=dry_run,
+        max_rows=min(max_rows, BULK_MAX_ROWS) if max_rows > 0 else BULK_MAX_ROWS
+    )
+    if not result.get("success", True):
+        logger.warning(f"bulk_update_invoice_status failed: {result.get('error', result)}")
+        return result
+    if dry_run:
+        logger.info(f"TOOL bulk_update_invoice_status dry run: {result['matched']} invoices would change to '{new_status}'")
+        return {"success": True, "dry_run": True, "matched": result["matched"]}
+    invoices = [InvoiceOut(**invoice_dict).model_dump() for invoice_dict in result["invoices"]]
+    logger.info(f"TOOL bulk_update_invoice_status updated {len(invoices)} invoices to '{new_status}'")
+    return {"success": True, "updated": len(invoices), "invoices": invoices}
+
+@mcp.tool(
+    name="billing_summary",
+    description=(
+        f"Invoice count and total amount grouped by any of: {', '.join(BILLING_DIMENSIONS)} (group_by; empty for the grand total). "
+        "Optionally filter by client_id, city, status and period in whole months (2024, 2024-03, 2024-Q1 or a range like 2024-01..2024-06). "
+        "Answered from a pre-aggregated table: use it for totals, pending amounts and monthly revenue instead of listing invoices."
+    )
+)
+async def billing_summary_tool(
+    group_by: Optional[List[str]] = None,
+    client_id: int = 0,
+    city: str = "",
+    status: str = "",
+    period: str = ""
+) -> Dict[str, Any]:
+    if status and status not in get_args(InvoiceStatus):
+        return {"success": False, "error": f"Invalid status '{status}'. Valid values: {', '.join(get_args(InvoiceStatus))}"}
+    month_from = month_before = None
+    if period:
+        try:
+            months = parse_period(period)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        # The summary holds whole months: a week or a day cannot be answered from it
+        if months.start.day != 1 or months.end.day != 1:
+            return {"success": False, "error": f"Period '{period}' ({months}) does not cover whole months"}
+        month_from, month_before = months.start, months.end
+    groups = await service_get_billing_summary(
+        tuple(dimension.strip().lower() for dimension in group_by or ()),
+        client_id=client_id if client_id else None,
+        city=city if city else None,
+        status=status if status else None,
+        month_from=month_from,
+        month_before=month_before
+    )
+    if isinstance(groups, dict) and not groups.get("success", True):
+        logger.warning(f"billing_summary failed: {groups.get('error', groups)}")
+        return groups
+    logger.info(f"TOOL billing_summary returned {len(groups)} groups")
+    return {"success": True, "groups": groups}
+
 @mcp.tool(
     name="delete_invoice",
     description="Delete an invoice from the database."
 )
 async def delete_invoice_tool(invoice_id: int) -> InvoiceDeleteResponse:
-    invoice_to_delete = await service_get_invoice_by_id(invoice_id)
-    if not invoice_to_delete:
+    # A single DELETE ... RETURNING both deletes the invoice and returns its data
+    deleted_invoice = await service_delete_invoice_returning(invoice_id)
+    if not deleted_invoice:
         logger.warning(f"Invoice with ID {invoice_id} not found for deletion")
         return InvoiceDeleteResponse(success=False, message=f"Invoice with ID {invoice_id} not found")
-    if isinstance(invoice_to_delete, dict) and not invoice_to_delete.get("success", True):
-        logger.error(f"Error getting invoice for deletion: {invoice_to_delete.get('error', invoice_to_delete)}")
-        return InvoiceDeleteResponse(success=False, message=invoice_to_delete.get("error", "Unknown error"))
-    deleted_invoice_out = InvoiceOut(**invoice_to_delete)
-    deleted = await service_delete_invoice(invoice_id)
-    if deleted:
-        logger.info(f"TOOL delete_invoice response: Invoice ID {invoice_id} deleted")
-        return InvoiceDeleteResponse(
-            success=True, 
-            message=f"Invoice with ID {invoice_id} deleted successfully",
-            deleted_invoice=deleted_invoice_out
-        )
-    else:
-        logger.error(f"Could not delete invoice with ID {invoice_id}")
-        return InvoiceDeleteResponse(success=False, message=f"Could not delete invoice with ID {invoice_id}") 
\ No newline at end of file
+    if isinstance(deleted_invoice, dict) and not deleted_invoice.get("success", True):
+        logger.error(f"Could not delete invoice with ID {invoice_id}: {deleted_invoice.get('error', deleted_invoice)}")
+        return InvoiceDeleteResponse(success=False, message=f"Could not delete invoice with ID {invoice_id}")
+    logger.info(f"TOOL delete_invoice response: Invoice ID {invoice_id} deleted")
+    return InvoiceDeleteResponse(
+        success=True, 
+        message=f"Invoice with ID {invoice_id} deleted successfully",
+        deleted_invoice=InvoiceOut(**deleted_invoice)
+    ) 
\ No newline at end of file
@@ -1,28 +1,39 @@
 from backend.mcp_instance import mcp
 from backend.services.manager_service import get_manager_by_name, get_manager_by_email
 from backend.services.client_service import get_all_clients, get_client_by_id
-from backend.services.invoice_service import get_invoices_by_client_id, get_all_invoices
-import openai
+from backend.services.invoice_service import get_invoices_by_client_id, get_all_invoices, get_invoices_by_period, get_invoice_frame
 from typing import Optional
-import smtplib
+import uuid
 from email.message import EmailMessage
-from backend.services.report_service import save_report, get_client_by_name, filter_invoices_by_period
-import asyncpg
-import matplotlib.pyplot as plt
+from backend.services.report_service import queue_report, get_client_by_name
+from backend.services.report_cache import report_cache
+from backend.services.email_dispatcher import email_dispatcher
 import io
 import base64
 import re
-from backend.core.config import SMTP_USER, SMTP_HOST, SMTP_PORT, SMTP_PASS, OPENAI_API_KEY, DATABASE_URL, REPORT_API_TOKEN
+from backend.core.config import SMTP_USER, REPORT_API_TOKEN, REPORT_PROMPT_TOKEN_BUDGET
 from backend.core.logging import get_logger
+from backend.core.llm_client import llm_client
+from backend.core.periods import parse_period
+from backend.core.report_prompt import REPORT_SYSTEM_PROMPT, REPORT_INSTRUCTIONS, billing_data, digest_date, needs_digest, template_version
+from backend.core.tracing import traced, KIND_CLIENT
+from backend.core.database import database
+from backend.core import queries
 from backend.models.report import ReportOut
-import bleach
 import asyncio
 
 logger = get_logger(__name__)
 
-def build_report_prompt(invoices, client_name, period, report_type, manager_name=None, manager_email=None):
+# matplotlib, bleach and openai (through llm_client) are imported inside the functions that use them:
+# they account for most of the server's import time and memory, and only report
+# generation needs them. The tools of this module are still registered at startup.
+
+def build_report_prompt(invoices, client_name, period, report_type, manager_name=None, manager_email=None, frame=None):
     """
     Builds a prompt for the report generation.
+    The static instructions come first so consecutive reports share a cacheable prefix;
+    the invoices are summarized when they exceed REPORT_PROMPT_TOKEN_BUDGET (on the
+    report's InvoiceFrame when given).
     """
     if period:
         periodo_texto = f"for the period {period}"
@@ -34,46 +45,47 @@ def build_report_prompt(invoices, client_name, period, report_type, manager_name
     else:
         cliente_texto = "global"
 
-    resumen = f"""
-You are a professional financial analyst. Prepare a {report_type} billing report {cliente_texto} {periodo_texto}.
+    datos, compactado = billing_data(invoices, frame=frame)
+    if compactado:
+        logger.info(f"Report prompt: {len(invoices)} invoices summarized to fit REPORT_PROMPT_TOKEN_BUDGET={REPORT_PROMPT_TOKEN_BUDGET}")
 
-The report must be in professional HTML format, with clear tables and sections. Do not include suggestions for developers or meta comments; the report must be ready to be sent directly to the manager.
+    resumen = f"""{REPORT_INSTRUCTIONS}
 
-Structure the report in the following sections:
-1. Executive summary (maximum 5 lines)
-2. Billing analysis (totals, pending, collections, unpaid)
-3. Detected patterns or trends
-4. Recommendations for the manager
+Prepare a {report_type} billing report {cliente_texto} {periodo_texto}.
 
 Billing data:
-{chr(10).join([f"ID: {i['id']}, Amount: {i['amount']}, Status: {i['status']}, Date: {i['issued_at']}" for i in invoices])}
-
-Be clear, professional, and concise. The report must be ready to be sent to a verified manager listed in the managers table.
+{datos}
 """
     if manager_name and manager_email:
         resumen += f"\n\nNote: This report will be sent to {manager_name} <{manager_email}>."
     return resumen
 
-def generate_invoice_status_chart(invoices):
+@traced("chart.render")
+def generate_invoice_status_chart(invoices, frame=None):
     """
-    Generates a chart of invoice statuses.
+    Generates a chart of invoice statuses (from the report's InvoiceFrame when given).
     """
-    # Count invoices by status
+    # Figure renders with the Agg backend without pyplot's global state
+    from matplotlib.figure import Figure
+    from backend.core.invoice_frame import InvoiceFrame
+    # Count invoices by status in one vectorized pass
     estados = ['paid', 'pending', 'canceled']
-    counts = [len([i for i in invoices if i['status'] == estado]) for estado in estados]
+    totals = (frame if frame is not None else InvoiceFrame.from_dicts(invoices)).status_totals()
+    counts = [totals.get(estado, (0, 0))[0] for estado in estados]
     # Create chart
-    fig, ax = plt.subplots()
+    fig = Figure()
+    ax = fig.subplots()
     ax.bar(estados, counts, color=['#4CAF50', '#FFC107', '#F44336'])
     ax.set_ylabel('Number of invoices')
     ax.set_title('Invoices by status')
     # Save to buffer
     buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(buf, format='png')
-    plt.close(fig)
+    fig.tight_layout()
+    fig.savefig(buf, format='png')
     buf.seek(0)
     return buf.read()
 
+@traced("html.sanitize")
 def clean_llm_html(html_text):
     """
     Sanitizes HTML generated by LLM using Bleach and removes markdown code blocks and stray CSS.
@@ -81,6 +93,7 @@ def clean_llm_html(html_text):
     - Removes any line that looks like stray CSS (e.g., h1 { ... }, table { ... })
     - Then sanitizes with Bleach
     """
+    import bleach
     # Remove markdown code blocks
     cleaned = re.sub(r'```html\s*([\s\S]*?)```', r'\1', html_text, flags=re.IGNORECASE)
     cleaned = re.sub(r'```[\s\S]*?```', '', cleaned)
@@ -106,9 +119,12 @@ def clean_llm_html(html_text):
     )
     return cleaned.strip()
 
-async def send_email_with_report(to_email, report_text, subject="Report", invoices=None):
+@traced("email.send", KIND_CLIENT)
+async def send_email_with_report(to_email, report_text, subject="Report", invoices=None, delivery_id=None, frame=None):
     """
-    Sends an email with the generated report.
+    Sends an email with the generated report through the email dispatcher (persistent
+    SMTP sessions, retries) and waits until it is delivered. With a delivery_id the
+    delivery status is recorded in report_deliveries.
     """
     msg = EmailMessage()
     msg['Subject'] = subject
@@ -119,22 +135,15 @@ async def send_email_with_report(to_email, report_text, subject="Report", invoic
     # Attach chart as base64 if there are invoices
     html_report = clean_llm_html(report_text)
     if invoices:
-        img_bytes = generate_invoice_status_chart(invoices)
+        img_bytes = generate_invoice_status_chart(invoices, frame=frame)
         img_b64 = base64.b64encode(img_bytes).decode('utf-8')
         img_tag = f'<img src="data:image/png;base64,{img_b64}" alt="Invoices by status chart" style="max-width:400px;"><br>'
         if '<img' not in html_report:
             html_report = img_tag + html_report
     msg.add_alternative(html_report, subtype='html')
 
-    smtp_host = SMTP_HOST
-    smtp_port = SMTP_PORT
-    smtp_user = SMTP_USER
-    smtp_pass = SMTP_PASS
-
     try:
-        with smtplib.SMTP_SSL(smtp_host, smtp_port) as smtp:
-            smtp.login(smtp_user, smtp_pass)
-            smtp.send_message(msg)
+        await email_dispatcher.send(msg, delivery_id=delivery_id)
         return True
     except Exception as e:
         logger.error(f"Error sending email: {e}")
@@ -153,58 +162,69 @@ async def obtener_manager_autorizado(manager_name, manager_email):
 async def obtener_invoices_cliente_periodo(client_name, period):
     """
     Retrieves invoices for a client by name and period.
+    The period is parsed into an issue-date range filtered in SQL; an invalid
+    period raises ValueError.
     """
+    issued = parse_period(period) if period else None
+    client_obj = None
     if client_name:
         client_obj = await get_client_by_name(client_name)
         if not client_obj:
             return None, None
-        invoices = await get_invoices_by_client_id(client_obj['id'])
+    client_id = client_obj['id'] if client_obj else None
+    if issued:
+        invoices = await get_invoices_by_period(issued.start, issued.end, client_id=client_id)
+    elif client_id is not None:
+        invoices = await get_invoices_by_client_id(client_id)
     else:
-        client_obj = None
         invoices = await get_all_invoices()
-    if period:
-        invoices = filter_invoices_by_period(invoices, period)
     return client_obj, invoices
 
-def generar_texto_informe_llm(invoices, client_name, period, report_type, manager):
+async def obtener_frame_informe(client_obj, period, invoices):
+    """
+    Builds the InvoiceFrame shared by the digest and the status chart of a report.
+    Reports summarized in the digest read it from the database rows, which already
+    hold cents, date ordinals and status codes; smaller ones convert their invoices.
+    """
+    from backend.core.invoice_frame import InvoiceFrame
+    if needs_digest(invoices):
+        issued = parse_period(period) if period else None
+        frame = await get_invoice_frame(issued.start if issued else None, issued.end if issued else None,
+                                        client_id=client_obj['id'] if client_obj else None)
+        if frame is not None:
+            return frame
+    return InvoiceFrame.from_dicts(invoices)
+
+@traced("llm.chat_completion", KIND_CLIENT)
+async def generar_texto_informe_llm(invoices, client_name, period, report_type, manager, frame=None):
     """
     Generates a report text using LLM.
+    The completion is awaited on the shared client (concurrency limit, retries), so the
+    event loop keeps serving other sessions meanwhile.
     """
-    prompt = build_report_prompt(invoices, client_name, period, report_type, manager['name'], manager['email'])
-    from openai import OpenAI
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
-    response = openai_client.chat.completions.create(
-        model="gpt-4o-mini-2024-07-18",
-        messages=[
-            {"role": "system", "content": (
-                "You are an expert assistant in business billing analysis with experience in accounting, finance, and business report writing. "
-                "Your main task is to generate clear, concise, and visually professional reports for company managers, using billing data obtained from a database connected to an MCP system. "
-                "Always validate that the recipient is authorized and adapt the report to the requested type (general, executive, delinquency, etc.)."
-            )},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    return response.choices[0].message.content
+    prompt = build_report_prompt(invoices, client_name, period, report_type, manager['name'], manager['email'], frame=frame)
+    return await llm_client.complete([
+        {"role": "system", "content": REPORT_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ])
 
-async def guardar_informe_db(client_obj, client_name, period, manager, report_type, report_text):
+async def guardar_informe_db(client_obj, client_name, period, manager, report_type, report_text, durable=False, delivery_id=None):
     """
-    Saves the report to the database.
+    Saves the report to the database through the write-behind queue.
+    With durable=True it waits until the report is committed.
     """
     client_id = client_obj['id'] if client_obj else None
-    db_url = DATABASE_URL
-    conn = await asyncpg.connect(dsn=db_url)
-    save_result = await save_report(
-        conn,
+    return await queue_report(
         client_id,
         client_name if client_name else None,
         period if period else None,
         manager['email'],
         manager['name'],
         report_type,
-        report_text
+        report_text,
+        delivery_id=delivery_id,
+        durable=durable
     )
-    await conn.close()
-    return save_result
 
 def build_email_subject(client_name, report_type, period=None):
     """
@@ -217,7 +237,7 @@ def build_email_subject(client_name, report_type, period=None):
 
 @mcp.tool(
     name="generate_report",
-    description="Generates a professional business report and sends it to the authorized manager by email. Requires a valid api_token."
+    description="Generates a professional business report and sends it to the authorized manager by email. Requires a valid api_token. The report is stored in the background; set durable=true to wait until it is saved."
 )
 async def generate_report(
     client_name: str,
@@ -225,10 +245,12 @@ async def generate_report(
     manager_name: str,
     manager_email: str,
     report_type: str,
-    api_token: str
+    api_token: str,
+    durable: bool = False
 ):
     """
     Generates a professional business report and sends it to the authorized manager by email.
+    With durable=True the response is sent only after the report is committed to the database.
     """
     if api_token != REPORT_API_TOKEN:
         logger.warning("Attempted access with invalid api_token in generate_report")
@@ -242,13 +264,25 @@ async def generate_report(
             return {"success": False, "error": "Client not found."}
         if not invoices:
             return {"success": False, "message": f"No invoices for client '{client_name}' in period '{period}'."}
-        report_text = generar_texto_informe_llm(invoices, client_name, period, report_type, manager)
+        # One frame per report, shared by the digest and the chart
+        frame = await obtener_frame_informe(client_obj, period, invoices)
+        # Unchanged invoices for the same report reuse the stored text (LLM_REPORT_CACHE);
+        # a digest also depends on the current date
+        report_text = await report_cache.get_or_generate(
+            lambda: generar_texto_informe_llm(invoices, client_name, period, report_type, manager, frame=frame),
+            report_type, client_obj['id'] if client_obj else None, period, manager['email'],
+            llm_client.model, template_version(), invoices, as_of=digest_date(invoices)
+        )
         subject = build_email_subject(client_name, report_type, period)
-        await send_email_with_report(manager['email'], report_text, subject=subject, invoices=invoices)
-        save_result = await guardar_informe_db(client_obj, client_name, period, manager, report_type, report_text)
+        # The report is stored first, so a failed delivery stays recorded against it
+        delivery_id = uuid.uuid4()
+        save_result = await guardar_informe_db(client_obj, client_name, period, manager, report_type, report_text,
+                                               durable=durable, delivery_id=delivery_id)
         if not save_result.get("success", True):
             return {"success": False, "error": save_result.get("error", "Error saving the report to the database.")}
-        return {"success": True, "message": f"Report sent to {manager['name']} <{manager['email']}>"}
+        await send_email_with_report(manager['email'], report_text, subject=subject, invoices=invoices,
+                                     delivery_id=delivery_id, frame=frame)
+        return {"success": True, "message": f"Report sent to {manager['name']} <{manager['email']}>", "delivery_id": str(delivery_id)}
     except Exception as e:
         logger.error(f"Error in generate_report: {e}")
         return {"success": False, "error": str(e)}
@@ -262,10 +296,8 @@ async def list_reports() -> dict:
     Lists all generated reports in the database.
     """
     try:
-        db_url = DATABASE_URL
-        conn = await asyncpg.connect(dsn=db_url)
-        rows = await conn.fetch("SELECT * FROM reports ORDER BY created_at DESC")
-        await conn.close()
+        async with database.connection(read_only=True) as conn:
+            rows = await conn.fetch(queries.REPORTS_LIST)
         reports = [ReportOut(**dict(row)) for row in rows]
         return {"success": True, "reports": [r.model_dump() for r in reports]}
     except Exception as e:
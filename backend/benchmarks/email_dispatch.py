@@ -0,0 +1,120 @@
+"""
+Benchmark of the email dispatcher against one SMTP connection per email.
+
+Sends the same messages to a local SMTP sink (backend.benchmarks.smtp_sink) that
+waits --latency-ms before every reply, to stand in for the round trips to a
+real provider, first the way reports were sent before the dispatcher (a new
+connection, greeting and login for every email, one after the other) and then
+through an EmailDispatcher whose workers keep their sessions open:
+
+    python -m backend.benchmarks.email_dispatch                        # 200 emails, 5 ms per reply
+    python -m backend.benchmarks.email_dispatch --emails 500 --workers 4 --min-speedup 3 --output email.json
+
+TLS is not simulated, so the gain on a real provider, where every new connection
+also pays a TLS handshake, is larger. Exits with status 1 when a message is lost
+or the speedup is under --min-speedup.
+"""
+
+import argparse
+import asyncio
+import json
+import smtplib
+import sys
+import time
+from email.message import EmailMessage
+from typing import Any, Dict, List
+
+from backend.benchmarks.smtp_sink import SmtpSink
+from backend.services.email_dispatcher import EmailDispatcher
+
+
+def make_messages(count: int, size: int) -> List[EmailMessage]:
+    messages = []
+    for n in range(count):
+        msg = EmailMessage()
+        msg["Subject"] = f"Billing Report {n}"
+        msg["From"] = "reports@example.com"
+        msg["To"] = "manager@example.com"
+        msg.set_content("This email contains an HTML report.")
+        msg.add_alternative("<p>" + "x" * size + "</p>", subtype="html")
+        messages.append(msg)
+    return messages
+
+
+def send_one_connection_each(host: str, port: int, messages: List[EmailMessage]) -> None:
+    """
+    The previous path: connect, log in, send and quit for every email.
+    """
+    for msg in messages:
+        with smtplib.SMTP(host, port) as smtp:
+            smtp.login("user", "secret")
+            smtp.send_message(msg)
+
+
+async def run(emails: int, workers: int, latency: float, size: int) -> Dict[str, Any]:
+    """
+    Sends `emails` messages with each path.
+
+    Returns:
+        Dictionary with the emails per second of each path, the speedup and the connections opened.
+    """
+    messages = make_messages(emails, size)
+    sink = SmtpSink(latency)
+    host, port = await sink.start()
+    try:
+        start = time.perf_counter()
+        # In a thread: the sink answers on this event loop
+        await asyncio.to_thread(send_one_connection_each, host, port, messages)
+        baseline_seconds = time.perf_counter() - start
+        baseline_connections = sink.connections
+
+        dispatcher = EmailDispatcher(host, port, security="none", user="user", password="secret", workers=workers)
+        start = time.perf_counter()
+        for msg in messages:
+            await dispatcher.send(msg, wait=False)
+        await dispatcher.flush()
+        dispatcher_seconds = time.perf_counter() - start
+        await dispatcher.close()
+        dispatcher_connections = sink.connections - baseline_connections
+    finally:
+        await sink.close()
+    baseline_rate = emails / baseline_seconds
+    dispatcher_rate = emails / dispatcher_seconds
+    return {
+        "emails": emails,
+        "workers": workers,
+        "latency_ms": latency * 1000,
+        "connection_per_email": {"emails_per_second": round(baseline_rate, 1), "connections": baseline_connections},
+        "dispatcher": {"emails_per_second": round(dispatcher_rate, 1), "connections": dispatcher_connections},
+        "speedup": round(dispatcher_rate / baseline_rate, 1),
+        "delivered": len(sink.messages) == 2 * emails,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the email dispatcher against a connection per email")
+    parser.add_argument("--emails", type=int, default=200, help="Emails sent with each path")
+    parser.add_argument("--workers", type=int, default=4, help="Dispatcher workers (SMTP sessions)")
+    parser.add_argument("--latency-ms", type=float, default=5, help="Sink delay before each reply")
+    parser.add_argument("--size", type=int, default=20000, help="Characters of HTML per email")
+    parser.add_argument("--min-speedup", type=float, help="Fail if the speedup is lower")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.emails, args.workers, args.latency_ms / 1000, args.size))
+    failures = []
+    if not report["delivered"]:
+        failures.append("the sink did not receive every email")
+    if args.min_speedup is not None and report["speedup"] < args.min_speedup:
+        failures.append(f"speedup {report['speedup']} under {args.min_speedup}")
+    report["failures"] = failures
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Benchmark of the columnar invoice analytics (InvoiceFrame) against the dictionary path.
+
+Computes the same report aggregates (totals by status, aging of pending amounts,
+DSO, per-client rollup and monthly series) over synthetic invoices, once with
+Python loops over invoice dictionaries with Decimal amounts and once with the
+vectorized InvoiceFrame, checks that both agree and reports the timings:
+
+    python -m backend.benchmarks.invoice_frame                      # 1,000,000 invoices
+    python -m backend.benchmarks.invoice_frame --rows 100000 --min-speedup 10 --output frame.json
+
+The frame is timed both built from dictionaries and from database-shaped rows
+(queries.INVOICE_FRAME_COLUMNS); the speedup compares the analytics on each path.
+Exits with status 1 when the speedup is under --min-speedup.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+from backend.core.invoice_frame import AGING_LABELS, AGING_LIMITS, STATUSES, InvoiceFrame
+
+TODAY = date(2024, 12, 31)
+
+
+def synthetic_invoices(rows: int, clients: int = 5000, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Invoices as the services return them: Decimal amounts and date objects.
+    """
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    invoices = []
+    for invoice_id in range(1, rows + 1):
+        issued = start + timedelta(days=rng.randrange(1826))
+        invoices.append({
+            "id": invoice_id,
+            "client_id": rng.randrange(1, clients + 1),
+            "amount": Decimal(rng.randrange(100, 1_000_000)) / 100,
+            "issued_at": issued,
+            "due_date": issued + timedelta(days=30),
+            "status": rng.choice(STATUSES),
+        })
+    return invoices
+
+
+def as_records(invoices: List[Dict[str, Any]]) -> List[Tuple[int, ...]]:
+    """
+    The rows queries.INVOICE_FRAME_COLUMNS returns for these invoices.
+    """
+    codes = {status: code for code, status in enumerate(STATUSES)}
+    return [
+        (i["id"], i["client_id"], int(i["amount"] * 100), i["issued_at"].toordinal(),
+         i["due_date"].toordinal(), codes[i["status"]])
+        for i in invoices
+    ]
+
+
+def dict_aggregates(invoices: List[Dict[str, Any]], today: date) -> Dict[str, Any]:
+    """
+    The aggregates with Python loops over the dictionaries (the path before InvoiceFrame).
+    """
+    by_status = {status: [0, Decimal(0)] for status in STATUSES}
+    for invoice in invoices:
+        by_status[invoice["status"]][0] += 1
+        by_status[invoice["status"]][1] += invoice["amount"]
+
+    aging = [[0, Decimal(0)] for _ in AGING_LABELS]
+    for invoice in invoices:
+        if invoice["status"] == "pending":
+            days = (today - invoice["due_date"]).days
+            bucket = next((b for b, limit in enumerate(AGING_LIMITS) if days <= limit), len(AGING_LIMITS))
+            aging[bucket][0] += 1
+            aging[bucket][1] += invoice["amount"]
+
+    window_start = today - timedelta(days=90)
+    billed = sum((i["amount"] for i in invoices
+                  if window_start < i["issued_at"] <= today and i["status"] != "canceled"), Decimal(0))
+    receivable = sum((i["amount"] for i in invoices
+                      if i["issued_at"] <= today and i["status"] == "pending"), Decimal(0))
+
+    clients: Dict[int, List[Any]] = defaultdict(lambda: [0, Decimal(0), Decimal(0)])
+    for invoice in invoices:
+        client = clients[invoice["client_id"]]
+        client[0] += 1
+        client[1] += invoice["amount"]
+        if invoice["status"] == "pending":
+            client[2] += invoice["amount"]
+
+    months: Dict[Tuple[int, int], List[Any]] = defaultdict(lambda: [0, Decimal(0), Decimal(0), Decimal(0)])
+    for invoice in invoices:
+        month = months[(invoice["issued_at"].year, invoice["issued_at"].month)]
+        month[0] += 1
+        month[1] += invoice["amount"]
+        if invoice["status"] == "paid":
+            month[2] += invoice["amount"]
+        elif invoice["status"] == "pending":
+            month[3] += invoice["amount"]
+
+    cents = lambda amount: int(amount * 100)
+    return {
+        "status": {status: (count, cents(amount)) for status, (count, amount) in by_status.items() if count},
+        "aging": [(label, count, cents(amount)) for label, (count, amount) in zip(AGING_LABELS, aging)],
+        "dso": round(float(receivable / billed * 90), 6) if billed else None,
+        "clients": [(client_id, count, cents(total), cents(pending))
+                    for client_id, (count, total, pending) in sorted(clients.items())],
+        "monthly": [(f"{year}-{month:02d}", count, cents(total), cents(paid), cents(pending))
+                    for (year, month), (count, total, paid, pending) in sorted(months.items())],
+    }
+
+
+def frame_aggregates(frame: InvoiceFrame, today: date) -> Dict[str, Any]:
+    """
+    The same aggregates computed on the frame.
+    """
+    dso = frame.dso(today)
+    clients = frame.client_rollup()
+    monthly = frame.monthly()
+    return {
+        "status": frame.status_totals(),
+        "aging": frame.aging(today),
+        "dso": round(dso, 6) if dso is not None else None,
+        "clients": list(zip(clients["client_id"].tolist(), clients["count"].tolist(),
+                            clients["cents"].tolist(), clients["pending_cents"].tolist())),
+        "monthly": list(zip(monthly["month"].astype(str).tolist(), monthly["count"].tolist(), monthly["cents"].tolist(),
+                            monthly["paid_cents"].tolist(), monthly["pending_cents"].tolist())),
+    }
+
+
+def _timed(function, *args) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    result = function(*args)
+    return result, round(time.perf_counter() - start, 4)
+
+
+def run(rows: int) -> Dict[str, Any]:
+    """
+    Runs both paths over `rows` synthetic invoices.
+
+    Returns:
+        Dictionary with the timings (seconds), the speedups and whether the results agree.
+    """
+    invoices = synthetic_invoices(rows)
+    records = as_records(invoices)
+    expected, dict_seconds = _timed(dict_aggregates, invoices, TODAY)
+    frame, from_dicts_seconds = _timed(InvoiceFrame.from_dicts, invoices)
+    db_frame, from_records_seconds = _timed(InvoiceFrame.from_records, records)
+    result, frame_seconds = _timed(frame_aggregates, frame, TODAY)
+    return {
+        "rows": rows,
+        "dict_aggregates_seconds": dict_seconds,
+        "frame_from_dicts_seconds": from_dicts_seconds,
+        "frame_from_records_seconds": from_records_seconds,
+        "frame_aggregates_seconds": frame_seconds,
+        "speedup_aggregates": round(dict_seconds / max(frame_seconds, 1e-9), 1),
+        "speedup_including_build": round(dict_seconds / max(frame_seconds + from_dicts_seconds, 1e-9), 1),
+        "speedup_including_rows_build": round(dict_seconds / max(frame_seconds + from_records_seconds, 1e-9), 1),
+        "results_match": result == expected and frame_aggregates(db_frame, TODAY) == expected,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark InvoiceFrame analytics against dictionary loops")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic invoices")
+    parser.add_argument("--min-speedup", type=float, help="Fail if the aggregates speedup is lower")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = run(args.rows)
+    failures = []
+    if not report["results_match"]:
+        failures.append("frame and dictionary aggregates differ")
+    if args.min_speedup is not None and report["speedup_aggregates"] < args.min_speedup:
+        failures.append(f"speedup {report['speedup_aggregates']} under {args.min_speedup}")
+    report["failures"] = failures
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Local SMTP sink for tests, benchmarks and development.
+
+A minimal asyncio SMTP server (plain text, no TLS) that accepts every message
+and keeps it in memory. It can add a delay before each reply, to stand in for
+the network round trip to a real provider, and answer the next transactions with
+given error codes, to exercise retries:
+
+    python -m backend.benchmarks.smtp_sink --port 2525      # then SMTP_HOST=localhost SMTP_PORT=2525 SMTP_SECURITY=none
+
+AUTH is advertised and any credentials are accepted.
+"""
+
+import argparse
+import asyncio
+from collections import deque
+from typing import Deque, List, Optional, Set, Tuple
+
+
+class SmtpSink:
+    """
+    In-memory SMTP server.
+
+    Args:
+        latency: Seconds waited before each reply (greeting included).
+    """
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.messages: List[Tuple[str, List[str], bytes]] = []
+        self.connections = 0
+        # Replies given to the next MAIL commands instead of 250, e.g. [421, 550]
+        self.mail_replies: Deque[int] = deque()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """
+        Starts listening. Returns the host and port (port 0 picks a free one).
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    def drop_connections(self) -> None:
+        """
+        Closes every open connection, as servers do with idle sessions.
+        """
+        for writer in list(self._writers):
+            writer.close()
+
+    async def close(self) -> None:
+        self.drop_connections()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _reply(self, writer: asyncio.StreamWriter, text: str) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(text.encode() + b"\r\n")
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        mail_from, recipients = "", []
+        try:
+            await self._reply(writer, "220 smtp-sink ESMTP")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8", "replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    await self._reply(writer, "250-smtp-sink\r\n250-8BITMIME\r\n250-SMTPUTF8\r\n250 AUTH PLAIN LOGIN")
+                elif verb == "HELO":
+                    await self._reply(writer, "250 smtp-sink")
+                elif verb == "AUTH":
+                    await self._reply(writer, "235 2.7.0 Authentication successful")
+                elif verb == "MAIL":
+                    code = self.mail_replies.popleft() if self.mail_replies else 250
+                    if code != 250:
+                        await self._reply(writer, f"{code} Rejected by the sink")
+                        if code == 421:
+                            break
+                        continue
+                    mail_from, recipients = command[10:].strip(), []
+                    await self._reply(writer, "250 OK")
+                elif verb == "RCPT":
+                    recipients.append(command[8:].strip())
+                    await self._reply(writer, "250 OK")
+                elif verb == "DATA":
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    data = bytearray()
+                    while True:
+                        chunk = await reader.readline()
+                        if not chunk or chunk == b".\r\n":
+                            break
+                        data += chunk[1:] if chunk.startswith(b"..") else chunk
+                    self.messages.append((mail_from, recipients, bytes(data)))
+                    await self._reply(writer, "250 OK: queued")
+                elif verb in ("RSET", "NOOP"):
+                    await self._reply(writer, "250 OK")
+                elif verb == "QUIT":
+                    await self._reply(writer, "221 Bye")
+                    break
+                else:
+                    await self._reply(writer, "502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+async def _serve(host: str, port: int, latency: float) -> None:
+    sink = SmtpSink(latency)
+    host, port = await sink.start(host, port)
+    print(f"SMTP sink listening on {host}:{port}")
+    received = 0
+    while True:
+        await asyncio.sleep(1)
+        for mail_from, recipients, data in sink.messages[received:]:
+            print(f"{mail_from} -> {', '.join(recipients)} ({len(data)} bytes)")
+        received = len(sink.messages)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local SMTP sink that accepts every message")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay before each reply")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args.host, args.port, args.latency_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Startup benchmark of the MCP server: import time, memory and readiness.
+
+Run it in a fresh interpreter (the measurements include every import):
+
+    python -m backend.benchmarks.startup                 # import only
+    python -m backend.benchmarks.startup --warm-up       # also run the warm-up (needs the database)
+    python -m backend.benchmarks.startup --max-import-seconds 2 --max-rss-mb 200 --output startup.json
+
+It prints a JSON report (also written to --output, as the server logs go to stdout) and exits with status 1 when a budget is exceeded or a
+module that must be loaded lazily (LAZY_MODULES) was imported at startup.
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import sys
+import time
+
+# Heavy dependencies that only report generation needs; they must not be imported at startup
+LAZY_MODULES = ("matplotlib", "openai", "bleach", "numpy")
+
+
+def max_rss_mb() -> float:
+    """
+    Peak resident memory of the process in MiB.
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(warm_up: bool = False) -> dict:
+    """
+    Imports the server, counts its tools and optionally runs the warm-up.
+
+    Args:
+        warm_up: Run the lifespan startup (pool creation, prepared statements) and
+            measure the time until the server is ready.
+    Returns:
+        Dictionary with the measurements.
+    """
+    start = time.perf_counter()
+    import backend.server as server
+    from backend.core.lifecycle import lifecycle
+    from backend.mcp_instance import mcp
+    report = {
+        "import_seconds": round(time.perf_counter() - start, 3),
+        "rss_after_import_mb": max_rss_mb(),
+        "lazy_modules_loaded": [name for name in LAZY_MODULES if name in sys.modules],
+        "tools": len(asyncio.run(mcp.get_tools())),
+    }
+    if warm_up:
+        async def run():
+            app = server.create_app()
+            warm_start = time.perf_counter()
+            async with server.lifespan(app):
+                report["warm_up_seconds"] = round(time.perf_counter() - warm_start, 3)
+                report["ready"] = lifecycle.ready
+                report["rss_at_ready_mb"] = max_rss_mb()
+        asyncio.run(run())
+    return report
+
+
+def check_budgets(report: dict, max_import_seconds: float, max_rss: float) -> list:
+    """
+    Returns the budget violations of a report.
+    """
+    problems = []
+    if report["lazy_modules_loaded"]:
+        problems.append(f"modules that must be lazy were imported: {', '.join(report['lazy_modules_loaded'])}")
+    if max_import_seconds and report["import_seconds"] > max_import_seconds:
+        problems.append(f"import took {report['import_seconds']}s (budget {max_import_seconds}s)")
+    rss = report.get("rss_at_ready_mb", report["rss_after_import_mb"])
+    if max_rss and rss > max_rss:
+        problems.append(f"resident memory is {rss} MiB (budget {max_rss} MiB)")
+    if report.get("ready") is False:
+        problems.append("the server did not become ready")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Startup benchmark of the MCP server")
+    parser.add_argument("--warm-up", action="store_true", help="also run the warm-up (needs the database)")
+    parser.add_argument("--max-import-seconds", type=float, default=0, help="import time budget (0: no budget)")
+    parser.add_argument("--max-rss-mb", type=float, default=0, help="resident memory budget (0: no budget)")
+    parser.add_argument("--output", help="file the JSON report is written to")
+    args = parser.parse_args(argv)
+
+    report = measure(warm_up=args.warm_up)
+    report["problems"] = check_budgets(report, args.max_import_seconds, args.max_rss_mb)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["problems"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
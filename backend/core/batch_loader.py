@@ -0,0 +1,101 @@
+"""
+Request-coalescing loader for by-ID lookups (DataLoader pattern).
+
+Concurrent tool calls often look up rows by ID at the same time (e.g. several
+tools checking that a client exists). A BatchLoader collects the keys requested
+during one event-loop tick, deduplicates them and resolves them all with a single
+batch query (``WHERE id = ANY($1)``) on one pooled connection.
+
+Results are not cached beyond the batch: a later load() always reads fresh data.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, List, Optional, TypeVar
+
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Coalesces load(key) calls made in the same event-loop tick into one batch call.
+
+    Args:
+        batch_fn: Async function receiving a list of unique keys and returning a
+            dictionary of the found values by key (missing keys resolve to None).
+        max_batch_size: Maximum keys passed to a single batch_fn call.
+    """
+    def __init__(self, batch_fn: Callable[[List[K]], Awaitable[Dict[K, V]]], max_batch_size: int = 500):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Dict[K, asyncio.Future] = {}
+        self.batches = 0
+        self.keys_requested = 0
+        self.keys_loaded = 0
+
+    async def load(self, key: K) -> Optional[V]:
+        """
+        Loads the value of a key, batched with the other keys requested in this tick.
+
+        Args:
+            key: Key to load (e.g. a row ID).
+        Returns:
+            The value, or None if the key was not found.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures belong to one loop: start clean when running in a new one
+            self._loop = loop
+            self._pending = {}
+        self.keys_requested += 1
+        future = self._pending.get(key)
+        if future is None:
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = loop.create_future()
+            self._pending[key] = future
+        # Shield the shared future so one cancelled caller does not cancel the others
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: List[K]) -> List[Optional[V]]:
+        """
+        Loads several keys in the same batch.
+        """
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch_size):
+            batch = {key: pending[key] for key in keys[start:start + self.max_batch_size]}
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: Dict[K, asyncio.Future]):
+        self.batches += 1
+        self.keys_loaded += len(batch)
+        try:
+            values = await self._batch_fn(list(batch))
+        except Exception as e:
+            logger.error(f"Batch load of {len(batch)} keys failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(values.get(key))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Reports how many lookups were coalesced.
+        """
+        return {
+            "batches": self.batches,
+            "keys_requested": self.keys_requested,
+            "keys_loaded": self.keys_loaded,
+        }
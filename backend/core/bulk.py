@@ -0,0 +1,64 @@
+"""
+Helpers for the bulk tools.
+
+Rows sent by an agent are validated as one batch with a Pydantic TypeAdapter;
+validation errors are grouped by row so every row gets its own result.
+"""
+
+from typing import Any, Dict, List, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+
+
+def validate_rows(model: Type[M], rows: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, M]], Dict[int, str]]:
+    """
+    Validates a list of rows against a Pydantic model in a single pass.
+    Empty strings are treated as missing values, as in the single-row tools.
+
+    Args:
+        model: Pydantic model of a row.
+        rows: Raw rows (dictionaries) received by the tool.
+    Returns:
+        Tuple with the valid rows as (index, model) pairs and the error message of
+        every invalid row by index.
+    """
+    rows = [
+        {key: value for key, value in row.items() if value != ""} if isinstance(row, dict) else row
+        for row in rows
+    ]
+    adapter = TypeAdapter(List[model])
+    try:
+        return list(enumerate(adapter.validate_python(rows))), {}
+    except ValidationError as e:
+        errors: Dict[int, List[str]] = {}
+        for error in e.errors():
+            index, *field = error["loc"]
+            location = ".".join(str(part) for part in field)
+            message = f"{location}: {error['msg']}" if location else error["msg"]
+            errors.setdefault(index, []).append(message)
+    # Only the rows without errors are validated again to build their models
+    valid = [(index, model.model_validate(row)) for index, row in enumerate(rows) if index not in errors]
+    return valid, {index: "; ".join(messages) for index, messages in errors.items()}
+
+
+def row_results(count: int, created: Dict[int, Dict[str, Any]], errors: Dict[int, str], key: str) -> List[Dict[str, Any]]:
+    """
+    Builds the per-row results of a bulk tool, in input order.
+
+    Args:
+        count: Number of rows received.
+        created: Created record of every successful row by index.
+        errors: Error message of every failed row by index.
+        key: Name of the record field in a successful result (e.g. 'invoice').
+    Returns:
+        List with one result dictionary per input row.
+    """
+    results = []
+    for index in range(count):
+        if index in created:
+            results.append({"index": index, "success": True, key: created[index]})
+        else:
+            results.append({"index": index, "success": False, "error": errors.get(index, "Row was not processed")})
+    return results
@@ -4,6 +4,13 @@ from dotenv import load_dotenv
 # Load environment variables only once
 load_dotenv()
 
+def _get_bool(name: str, default: bool = False) -> bool:
+    """Reads a boolean flag from the environment ('1', 'true', 'yes' or 'on')."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
 # Database configuration
 DB_USER = os.getenv('DB_USER')
 DB_PASSWORD = os.getenv('DB_PASSWORD')
@@ -12,18 +19,145 @@ DB_PORT = os.getenv('DB_PORT')
 DB_NAME = os.getenv('DB_NAME')
 DATABASE_URL = os.getenv('DATABASE_URL')
 
+# Connection pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', 10))  # Seconds to wait for a free connection
+DB_POOL_MAX_INACTIVE_LIFETIME = float(os.getenv('DB_POOL_MAX_INACTIVE_LIFETIME', 300))  # Seconds before idle connections are closed
+DB_POOL_MAX_QUERIES = int(os.getenv('DB_POOL_MAX_QUERIES', 50000))  # Queries before a connection is recycled
+DB_COMMAND_TIMEOUT = float(os.getenv('DB_COMMAND_TIMEOUT', 60))  # Default per-statement timeout in seconds
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 100))  # Prepared statements cached per connection (0 disables)
+# Adaptive mode: the number of connections handed out concurrently is tuned between
+# the min and max size according to the observed acquire wait times
+DB_POOL_ADAPTIVE = _get_bool('DB_POOL_ADAPTIVE')
+DB_POOL_TARGET_WAIT_MS = float(os.getenv('DB_POOL_TARGET_WAIT_MS', 50))
+DB_POOL_ADAPT_INTERVAL = float(os.getenv('DB_POOL_ADAPT_INTERVAL', 10))  # Seconds between adjustments
+
+# Read replicas: comma-separated DSNs, each with its own pool. Read-only service calls
+# go to the replicas whose replication lag is under DB_REPLICA_MAX_LAG, otherwise to the primary
+DB_REPLICA_URLS = [url.strip() for url in os.getenv('DB_REPLICA_URLS', '').split(',') if url.strip()]
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))  # Seconds
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 5))  # Seconds between lag checks
+
+# Query instrumentation: latency histograms, row and error counts per normalized statement
+# and calling service function, reported by the query_stats admin tool (can also be enabled there)
+DB_QUERY_STATS = _get_bool('DB_QUERY_STATS')
+DB_QUERY_STATS_MAX_ENTRIES = int(os.getenv('DB_QUERY_STATS_MAX_ENTRIES', 2000))  # Distinct (statement, caller) pairs tracked
+
+# Slow-query log: statements slower than DB_SLOW_QUERY_MS are logged with their normalized text,
+# parameter types and caller (0 disables it). With DB_SLOW_QUERY_EXPLAIN their plan is captured
+# on a separate connection (EXPLAIN ANALYZE for reads, in a rolled-back transaction)
+DB_SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 0))
+DB_SLOW_QUERY_EXPLAIN = _get_bool('DB_SLOW_QUERY_EXPLAIN')
+DB_SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv('DB_SLOW_QUERY_EXPLAIN_INTERVAL', 300))  # Seconds between plans of the same statement
+DB_SLOW_QUERY_EXPLAIN_TIMEOUT = float(os.getenv('DB_SLOW_QUERY_EXPLAIN_TIMEOUT', 30))  # Statement/lock timeout of the EXPLAIN
+DB_SLOW_QUERY_HISTORY = int(os.getenv('DB_SLOW_QUERY_HISTORY', 100))  # Slow statements kept for the slow_queries tool
+
+# Query result cache for the client, invoice and manager reads, tagged by table and invalidated
+# by the write services and by the NOTIFY sent from the table triggers (database/notify_changes.sql)
+QUERY_CACHE = _get_bool('QUERY_CACHE')
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', 1000))  # Results kept (least recently used evicted)
+QUERY_CACHE_MAX_ROWS = int(os.getenv('QUERY_CACHE_MAX_ROWS', 1000))  # Longest list result stored (0: no limit)
+QUERY_CACHE_TTL = float(os.getenv('QUERY_CACHE_TTL', 300))  # Seconds a result is kept at most (0: until invalidated)
+QUERY_CACHE_CHANNEL = os.getenv('QUERY_CACHE_CHANNEL', 'table_changes')  # NOTIFY channel carrying the changed table
+QUERY_CACHE_LISTEN_CHECK_INTERVAL = float(os.getenv('QUERY_CACHE_LISTEN_CHECK_INTERVAL', 10))  # Seconds between listener checks
+
+# In-process replica of the clients and managers tables, indexed by id, case-folded name and email.
+# Loaded at startup and kept current by the row triggers of database/notify_changes.sql;
+# lookups fall back to the database while it is not loaded or its listener is down
+REFERENCE_SNAPSHOT = _get_bool('REFERENCE_SNAPSHOT')
+REFERENCE_SNAPSHOT_CHANNEL = os.getenv('REFERENCE_SNAPSHOT_CHANNEL', 'row_changes')  # NOTIFY channel carrying the changed rows
+REFERENCE_SNAPSHOT_MAX_ROWS = int(os.getenv('REFERENCE_SNAPSHOT_MAX_ROWS', 100000))  # Larger tables are not replicated
+REFERENCE_SNAPSHOT_CHECK_INTERVAL = float(os.getenv('REFERENCE_SNAPSHOT_CHECK_INTERVAL', 10))  # Seconds between listener checks
+
 # Server configuration
 SERVER_HOST = os.getenv('SERVER_HOST', 'localhost')
 SERVER_PORT = int(os.getenv('SERVER_PORT', 8000))
 
+# Server lifecycle
+# At startup the pool is opened (min size, statements prepared) before the server reports ready;
+# at shutdown new tool calls are rejected and the calls in flight get a deadline to finish
+WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', 30))  # Seconds allowed for the warm-up
+WARMUP_RETRY_INTERVAL = float(os.getenv('WARMUP_RETRY_INTERVAL', 5))  # Seconds between warm-up retries after a failure
+WARMUP_PRELOAD = _get_bool('WARMUP_PRELOAD')  # Also read the reference data (managers, first clients page) at startup
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv('SHUTDOWN_DRAIN_TIMEOUT', 20))  # Seconds to let tool calls in flight finish
+
+# Metrics endpoint
+# Per-tool metrics in Prometheus text format, served next to the SSE transport (empty path disables it)
+METRICS_PATH = os.getenv('METRICS_PATH', '/metrics')
+METRICS_API_TOKEN = os.getenv('METRICS_API_TOKEN')  # If set, scrapers must send 'Authorization: Bearer <token>'
+
+# Tracing
+# Spans per tool call (services, SQL, LLM, chart, sanitization, email), exported as
+# JSON lines ('jsonl') or to an OTLP/HTTP collector ('otlp'); empty disables tracing
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', '').strip().lower()
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.1))  # Fraction of tool calls traced
+TRACE_JSONL_PATH = os.getenv('TRACE_JSONL_PATH', '/app/logs/traces.jsonl')
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'ai-client-agent-mcp')
+TRACE_EXPORT_INTERVAL = float(os.getenv('TRACE_EXPORT_INTERVAL', 5))  # Seconds between exports
+
+# Pagination configuration
+# Default and maximum page sizes for list tools (keyset pagination on id)
+PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', 100))
+PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', 500))
+
+# Bulk tools configuration
+# Maximum rows accepted by a single bulk_create_clients / bulk_create_invoices call
+BULK_MAX_ROWS = int(os.getenv('BULK_MAX_ROWS', 10000))
+
+# Streaming configuration
+# Rows per chunk when streaming invoices with a server-side cursor, and its upper bound
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 500))
+STREAM_CHUNK_SIZE_MAX = int(os.getenv('STREAM_CHUNK_SIZE_MAX', 5000))
+
+# Report persistence
+# Generated reports are stored through a bounded write-behind queue that batches the INSERTs
+REPORT_QUEUE_MAX_SIZE = int(os.getenv('REPORT_QUEUE_MAX_SIZE', 1000))  # Reports waiting to be written before callers block
+REPORT_BATCH_SIZE = int(os.getenv('REPORT_BATCH_SIZE', 100))  # Maximum reports written per COPY
+REPORT_FLUSH_TIMEOUT = float(os.getenv('REPORT_FLUSH_TIMEOUT', 10))  # Seconds to flush pending reports on shutdown
+REPORT_WRITE_MAX_RETRIES = int(os.getenv('REPORT_WRITE_MAX_RETRIES', 5))  # Retries of a batch after connection errors
+REPORT_WRITE_RETRY_BASE_DELAY = float(os.getenv('REPORT_WRITE_RETRY_BASE_DELAY', 0.5))  # Seconds, doubled every retry (full jitter)
+REPORT_WRITE_RETRY_MAX_DELAY = float(os.getenv('REPORT_WRITE_RETRY_MAX_DELAY', 30))  # Upper bound of a retry delay in seconds
+
+# Report prompt: invoices are sent one per line while they fit in REPORT_PROMPT_TOKEN_BUDGET
+# (approximate tokens); larger sets are replaced by a digest of totals, aging, monthly series
+# and the REPORT_PROMPT_TOP_N largest and most overdue invoices and clients
+REPORT_PROMPT_TOKEN_BUDGET = int(os.getenv('REPORT_PROMPT_TOKEN_BUDGET', 8000))  # 0 always sends every invoice
+REPORT_PROMPT_TOP_N = int(os.getenv('REPORT_PROMPT_TOP_N', 10))
+
 # OpenAI configuration
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None  # Any OpenAI-compatible endpoint (e.g. a local stub in tests)
+# Shared async LLM client: one connection pool, a global concurrency limit and retries with jitter
+LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-4o-mini-2024-07-18')
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 120))  # Seconds allowed for each completion attempt
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 4))  # Completions running at once per worker
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 3))  # Retries after timeouts, connection errors, 429 and 5xx
+LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', 1))  # Seconds, doubled on every retry (full jitter)
+LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', 20))  # Upper bound of a retry delay in seconds
+
+# LLM report cache (database/llm_report_cache.sql): report texts are reused while the report
+# type, client, period, recipient, model, prompt template and invoice data are unchanged
+LLM_REPORT_CACHE = _get_bool('LLM_REPORT_CACHE')
+LLM_REPORT_CACHE_TTL = int(os.getenv('LLM_REPORT_CACHE_TTL', 604800))  # Seconds a report text is reused (0: no expiry)
 
 # SMTP configuration
 SMTP_HOST = os.getenv('SMTP_HOST')
 SMTP_PORT = int(os.getenv('SMTP_PORT', 465))
 SMTP_USER = os.getenv('SMTP_USER')
 SMTP_PASS = os.getenv('SMTP_PASS')
+SMTP_SECURITY = os.getenv('SMTP_SECURITY', 'ssl').lower()  # 'ssl' (implicit TLS), 'starttls' or 'none'
+SMTP_TIMEOUT = float(os.getenv('SMTP_TIMEOUT', 30))  # Seconds allowed for each SMTP operation
+# Email dispatcher: a bounded queue served by a few workers, each keeping its SMTP session
+# open across messages; transient failures are retried with backoff and full jitter
+EMAIL_QUEUE_MAX_SIZE = int(os.getenv('EMAIL_QUEUE_MAX_SIZE', 1000))  # Emails waiting to be sent before callers block
+EMAIL_WORKERS = int(os.getenv('EMAIL_WORKERS', 2))  # Concurrent SMTP sessions per server worker
+EMAIL_MAX_RETRIES = int(os.getenv('EMAIL_MAX_RETRIES', 3))  # Retries after connection errors and 4xx answers
+EMAIL_RETRY_BASE_DELAY = float(os.getenv('EMAIL_RETRY_BASE_DELAY', 2))  # Seconds, doubled on every retry (full jitter)
+EMAIL_RETRY_MAX_DELAY = float(os.getenv('EMAIL_RETRY_MAX_DELAY', 60))  # Upper bound of a retry delay in seconds
+EMAIL_SESSION_IDLE_TIMEOUT = float(os.getenv('EMAIL_SESSION_IDLE_TIMEOUT', 60))  # Seconds an unused SMTP session stays open
+EMAIL_FLUSH_TIMEOUT = float(os.getenv('EMAIL_FLUSH_TIMEOUT', 30))  # Seconds to send pending emails on shutdown
 
 # pgAdmin configuration
 PGADMIN_EMAIL = os.getenv('PGADMIN_EMAIL')
@@ -31,4 +165,8 @@ PGADMIN_PASSWORD = os.getenv('PGADMIN_PASSWORD')
 PGADMIN_PORT = int(os.getenv('PGADMIN_PORT', 5050))
 
 # New variable
-REPORT_API_TOKEN = os.getenv("REPORT_API_TOKEN", "changeme-token-dev") 
\ No newline at end of file
+REPORT_API_TOKEN = os.getenv("REPORT_API_TOKEN", "changeme-token-dev")
+
+# API token for administrative tools (pool and query statistics, caches, ...).
+# No default: the administrative tools refuse every call unless it is set.
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN") or None 
\ No newline at end of file
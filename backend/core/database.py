@@ -1,9 +1,24 @@
 # backend/core/database.py
+import asyncio
+import time
 import asyncpg
-from backend.core.config import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME, DATABASE_URL
+from backend.core.config import (
+    DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME, DATABASE_URL,
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_ACQUIRE_TIMEOUT, DB_POOL_MAX_INACTIVE_LIFETIME,
+    DB_POOL_MAX_QUERIES, DB_COMMAND_TIMEOUT, DB_STATEMENT_CACHE_SIZE,
+    DB_POOL_ADAPTIVE, DB_POOL_TARGET_WAIT_MS, DB_POOL_ADAPT_INTERVAL,
+    DB_REPLICA_URLS, DB_REPLICA_MAX_LAG, DB_REPLICA_CHECK_INTERVAL, DB_QUERY_STATS
+)
+from backend.core.instrumentation import InstrumentedConnection, QueryEvent
 from backend.core.logging import get_logger
+from backend.core.pool_stats import PoolStats, AdaptivePoolLimiter
+from backend.core.queries import prepare_statements
+from backend.core.query_stats import query_stats
+from backend.core.replicas import Replica, ReplicaSet
+from backend.core.slow_queries import SlowQueryLog
+from backend.core.tracing import tracer
 from contextlib import asynccontextmanager
-from typing import Optional, Any
+from typing import Optional, Any, Callable, List
 
 logger = get_logger(__name__)
 
@@ -16,6 +31,20 @@ class Database:
         # Initialize connection pool as None
         self._pool = None
         self._connection_params = self._get_connection_params()
+        self._connect_lock = asyncio.Lock()
+        self._stats = PoolStats()
+        self._limiter: Optional[AdaptivePoolLimiter] = None
+        self._adapt_task: Optional[asyncio.Task] = None
+        self._replica_set: Optional[ReplicaSet] = None
+        self._replica_task: Optional[asyncio.Task] = None
+        self._query_observers: List[Callable[[QueryEvent], None]] = []
+        if DB_QUERY_STATS:
+            self.add_query_observer(query_stats)
+        if tracer.enabled:
+            self.add_query_observer(tracer.observe_query)
+        self.slow_query_log = SlowQueryLog(connect=self._explain_connection)
+        if self.slow_query_log.enabled:
+            self.add_query_observer(self.slow_query_log)
 
     def _get_connection_params(self) -> dict:
         """
@@ -49,31 +78,221 @@ class Database:
             Database connection pool.
         """
         if not self._pool:
+            async with self._connect_lock:
+                if not self._pool:
+                    try:
+                        # Create a new connection pool if it doesn't exist
+                        self._pool = await self._create_pool(**self._connection_params)
+                        logger.info(f"Database connection pool created (min_size={DB_POOL_MIN_SIZE}, max_size={DB_POOL_MAX_SIZE})")
+                    except Exception as e:
+                        logger.error(f"Failed to create database connection pool: {e}")
+                        raise
+                    if DB_POOL_ADAPTIVE:
+                        self._start_adaptive_mode()
+                    if DB_REPLICA_URLS:
+                        await self._connect_replicas()
+        return self._pool
+
+    async def _create_pool(self, **connection_params) -> asyncpg.Pool:
+        """
+        Creates a connection pool with the configured pool settings.
+        """
+        return await asyncpg.create_pool(
+            **connection_params,
+            min_size=DB_POOL_MIN_SIZE,
+            max_size=DB_POOL_MAX_SIZE,
+            max_queries=DB_POOL_MAX_QUERIES,
+            max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_LIFETIME,
+            command_timeout=DB_COMMAND_TIMEOUT or None,
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+            init=self._init_connection
+        )
+
+    async def _connect_replicas(self):
+        """
+        Creates one pool per read replica and starts the lag monitor.
+        A replica that cannot be reached is kept out of rotation until a later check succeeds.
+        """
+        replicas = [Replica(dsn) for dsn in DB_REPLICA_URLS]
+        for replica in replicas:
             try:
-                # Create a new connection pool if it doesn't exist
-                self._pool = await asyncpg.create_pool(
-                    **self._connection_params,
-                    min_size=1,
-                    max_size=10
-                )
-                logger.info("Database connection pool created")
+                replica.pool = await self._create_pool(dsn=replica.dsn)
+                await replica.check_lag()
+                logger.info(f"Read replica pool created for {replica.name} (lag={replica.lag}s)")
             except Exception as e:
-                logger.error(f"Failed to create database connection pool: {e}")
-                raise
-        return self._pool
+                replica.last_error = str(e)
+                logger.error(f"Failed to create read replica pool for {replica.name}: {e}")
+        self._replica_set = ReplicaSet(replicas, DB_REPLICA_MAX_LAG)
+        self._replica_task = asyncio.create_task(self._replica_loop())
+
+    async def _replica_loop(self):
+        """
+        Periodically measures the replication lag of every replica, retrying the
+        pools that could not be created.
+        """
+        while True:
+            await asyncio.sleep(DB_REPLICA_CHECK_INTERVAL)
+            for replica in self._replica_set.replicas:
+                try:
+                    if replica.pool is None:
+                        replica.pool = await self._create_pool(dsn=replica.dsn)
+                    await replica.check_lag()
+                except Exception as e:
+                    replica.last_error = str(e)
+                    logger.error(f"Error checking read replica {replica.name}: {e}")
+
+    async def _init_connection(self, conn):
+        """
+        Pool init hook, run once for every new connection.
+        Prepares the registered hot statements so the first call on the connection
+        does not pay the parse/plan round trip.
+        """
+        prepared = await prepare_statements(conn)
+        logger.debug(f"Prepared {prepared} statements on new pooled connection")
+
+    def _start_adaptive_mode(self):
+        """
+        Starts the background task that tunes the adaptive pool limit.
+        """
+        self._limiter = AdaptivePoolLimiter(
+            DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TARGET_WAIT_MS / 1000
+        )
+        self._stats.drain_interval()
+        self._adapt_task = asyncio.create_task(self._adapt_loop())
+        logger.info(f"Adaptive pool mode enabled (target acquire wait {DB_POOL_TARGET_WAIT_MS} ms)")
+
+    async def _adapt_loop(self):
+        """
+        Periodically adjusts the adaptive limit from the acquire waits of the last interval.
+        """
+        while True:
+            await asyncio.sleep(DB_POOL_ADAPT_INTERVAL)
+            try:
+                await self._limiter.adjust(self._stats.drain_interval())
+            except Exception as e:
+                logger.error(f"Error adjusting adaptive pool limit: {e}")
 
     async def disconnect(self):
         """
         Closes the database connection pool if active.
         """
+        if self._adapt_task:
+            self._adapt_task.cancel()
+            self._adapt_task = None
+        self._limiter = None
+        if self._replica_task:
+            self._replica_task.cancel()
+            self._replica_task = None
+        if self._replica_set:
+            for replica in self._replica_set.replicas:
+                if replica.pool:
+                    await replica.pool.close()
+            self._replica_set = None
+            logger.info("Read replica pools closed")
         if self._pool:
             # Close all connections in the pool
             await self._pool.close()
             self._pool = None
             logger.info("Database connection pool closed")
+
+    def add_query_observer(self, observer: Callable[[QueryEvent], None]):
+        """
+        Registers a callable that receives a QueryEvent for every statement run on
+        the connections handed out from now on.
+        """
+        if observer not in self._query_observers:
+            self._query_observers.append(observer)
+
+    def remove_query_observer(self, observer: Callable[[QueryEvent], None]):
+        """
+        Unregisters a query observer. Without observers connections are not instrumented.
+        """
+        if observer in self._query_observers:
+            self._query_observers.remove(observer)
+
+    def has_query_observer(self, observer: Callable[[QueryEvent], None]) -> bool:
+        """
+        Whether a query observer is registered.
+        """
+        return observer in self._query_observers
+
+    @asynccontextmanager
+    async def _explain_connection(self):
+        """
+        Raw connection from the primary pool for the slow-query log's EXPLAIN.
+        It is not instrumented (the EXPLAIN is not itself reported) and not
+        accounted in the pool statistics.
+        """
+        pool = await self.connect()
+        async with pool.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT) as conn:
+            yield conn
+
+    async def dedicated_connection(self) -> asyncpg.Connection:
+        """
+        Opens a connection to the primary outside the pool, for long-lived uses
+        (LISTEN) that must not hold a pooled connection. The caller closes it.
+        """
+        return await asyncpg.connect(**self._connection_params)
+
+    def _instrument(self, conn):
+        """
+        Wraps a connection so its statements reach the query observers, if any.
+        """
+        if self._query_observers:
+            return InstrumentedConnection(conn, self._query_observers)
+        return conn
+
+    def pool_stats(self) -> dict:
+        """
+        Reports the current health of the connection pool.
+
+        Returns:
+            Dictionary with pool sizes, in-use and idle connections, waiters,
+            acquire counters and acquire-latency percentiles in milliseconds.
+        """
+        stats = {
+            "initialized": self._pool is not None,
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "size": 0,
+            "in_use": 0,
+            "idle": 0,
+            "waiting": self._stats.waiting,
+            "acquired_total": self._stats.acquired_total,
+            "acquire_timeouts": self._stats.timeouts,
+            "acquire_wait_ms": self._stats.wait_percentiles(),
+            "adaptive": self._limiter is not None,
+        }
+        if self._pool:
+            size = self._pool.get_size()
+            idle = self._pool.get_idle_size()
+            stats.update(size=size, idle=idle, in_use=size - idle)
+        if self._limiter:
+            stats["adaptive_limit"] = self._limiter.limit
+        if self._replica_set:
+            stats["replica_max_lag_seconds"] = self._replica_set.max_lag
+            stats["replica_fallbacks"] = self._replica_set.fallbacks
+            stats["replicas"] = [replica.stats() for replica in self._replica_set.replicas]
+        return stats
     
+    async def _acquire_replica(self, replica: Replica):
+        """
+        Acquires a connection from a replica pool.
+
+        Returns:
+            The connection, or None if the replica failed and the primary must be used.
+        """
+        try:
+            return await replica.pool.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT)
+        except (asyncio.TimeoutError, OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+            # Out of rotation until the next lag check succeeds
+            replica.lag = None
+            replica.last_error = str(e)
+            logger.warning(f"Could not acquire a connection from replica {replica.name}, using the primary: {e}")
+            return None
+
     @asynccontextmanager
-    async def connection(self):
+    async def connection(self, read_only: bool = False):
         """
         Async context manager for database connections.
         Automatically acquires and releases connections from the pool.
@@ -82,17 +301,49 @@ class Database:
             async with database.connection() as conn:
                 result = await conn.fetch("SELECT * FROM table")
         
+        Args:
+            read_only: The caller only reads; the connection may come from a read
+                replica within the lag threshold (falls back to the primary).
+
         Yields:
-            Database connection from the pool.
+            Database connection from the pool (wrapped in an InstrumentedConnection
+            while query observers are registered).
         """
         pool = await self.connect()
-        conn = None
+        if read_only and self._replica_set:
+            replica = self._replica_set.choose()
+            conn = await self._acquire_replica(replica) if replica else None
+            if conn is not None:
+                try:
+                    yield self._instrument(conn)
+                finally:
+                    await replica.pool.release(conn)
+                return
+        limiter = self._limiter
+        self._stats.waiting += 1
+        start = time.perf_counter()
         try:
-            conn = await pool.acquire()
-            yield conn
+            if limiter:
+                await asyncio.wait_for(limiter.acquire(), DB_POOL_ACQUIRE_TIMEOUT)
+            try:
+                conn = await pool.acquire(timeout=DB_POOL_ACQUIRE_TIMEOUT)
+            except BaseException:
+                if limiter:
+                    await limiter.release()
+                raise
+        except asyncio.TimeoutError:
+            self._stats.timeouts += 1
+            logger.error(f"Timed out after {DB_POOL_ACQUIRE_TIMEOUT}s waiting for a database connection")
+            raise
+        finally:
+            self._stats.waiting -= 1
+        self._stats.record_wait(time.perf_counter() - start)
+        try:
+            yield self._instrument(conn)
         finally:
-            if conn:
-                await pool.release(conn)
+            await pool.release(conn)
+            if limiter:
+                await limiter.release()
 
     async def execute(self, query: str, *args, **kwargs) -> str:
         """
@@ -108,47 +359,50 @@ class Database:
         async with self.connection() as conn:
             return await conn.execute(query, *args, **kwargs)
             
-    async def fetch(self, query: str, *args, **kwargs) -> list:
+    async def fetch(self, query: str, *args, read_only: bool = False, **kwargs) -> list:
         """
         Fetches multiple rows from the database.
         
         Args:
             query: SQL query to execute
             *args, **kwargs: Parameters for the query
+            read_only: Allow the query to run on a read replica
             
         Returns:
             List of query results
         """
-        async with self.connection() as conn:
+        async with self.connection(read_only=read_only) as conn:
             return await conn.fetch(query, *args, **kwargs)
             
-    async def fetchrow(self, query: str, *args, **kwargs) -> Optional[dict]:
+    async def fetchrow(self, query: str, *args, read_only: bool = False, **kwargs) -> Optional[dict]:
         """
         Fetches a single row from the database.
         
         Args:
             query: SQL query to execute
             *args, **kwargs: Parameters for the query
+            read_only: Allow the query to run on a read replica
             
         Returns:
             Query result as a dictionary or None if no result
         """
-        async with self.connection() as conn:
+        async with self.connection(read_only=read_only) as conn:
             row = await conn.fetchrow(query, *args, **kwargs)
             return dict(row) if row else None
             
-    async def fetchval(self, query: str, *args, **kwargs) -> Any:
+    async def fetchval(self, query: str, *args, read_only: bool = False, **kwargs) -> Any:
         """
         Fetches a single value from the database.
         
         Args:
             query: SQL query to execute
             *args, **kwargs: Parameters for the query
+            read_only: Allow the query to run on a read replica
             
         Returns:
             Single value from query result
         """
-        async with self.connection() as conn:
+        async with self.connection(read_only=read_only) as conn:
             return await conn.fetchval(query, *args, **kwargs)
 
 # Singleton instance of Database class to be used throughout the application
@@ -9,6 +9,7 @@ from backend.core.logging import get_logger
 from typing import Callable, Optional, Any, TypeVar
 import asyncpg
 from backend.core.database import database
+from backend.core.tracing import tracer
 
 logger = get_logger(__name__)
 
@@ -16,7 +17,7 @@ logger = get_logger(__name__)
 T = TypeVar('T')
 F = TypeVar('F', bound=Callable[..., Any])
 
-def with_db_connection(func: F) -> F:
+def with_db_connection(func: Optional[F] = None, *, read_only: bool = False) -> F:
     """
     Decorator that automatically handles database connection acquisition and release.
     
@@ -25,6 +26,7 @@ def with_db_connection(func: F) -> F:
     
     Args:
         func: The async function to decorate
+        read_only: The function only reads; its connection may come from a read replica
         
     Returns:
         The decorated function
@@ -34,9 +36,23 @@ def with_db_connection(func: F) -> F:
         async def get_user(user_id, conn=None):
             # No need to acquire or release connection manually
             return await conn.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
+
+        @with_db_connection(read_only=True)
+        async def list_users(conn=None):
+            return await conn.fetch("SELECT * FROM users")
     """
+    if func is None:
+        return functools.partial(with_db_connection, read_only=read_only)
+
+    span_name = f"service {func.__qualname__}"
+    span_attributes = {"code.namespace": func.__module__, "db.read_only": read_only}
+
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
+        with tracer.span(span_name, **span_attributes):
+            return await _call(*args, **kwargs)
+
+    async def _call(*args, **kwargs):
         # Check if a connection was provided
         conn_provided = 'conn' in kwargs and kwargs['conn'] is not None
         conn = kwargs.get('conn')
@@ -45,7 +61,7 @@ def with_db_connection(func: F) -> F:
             # If no connection provided, create a new one
             try:
                 # Use the database utility to get a connection
-                async with database.connection() as new_conn:
+                async with database.connection(read_only=read_only) as new_conn:
                     # Update kwargs with the new connection
                     kwargs['conn'] = new_conn
                     # Call the wrapped function with the new connection
@@ -90,8 +106,15 @@ def db_transaction(func: F) -> F:
             await conn.execute("UPDATE accounts SET balance = balance - $1 WHERE id = $2", amount, from_account)
             await conn.execute("UPDATE accounts SET balance = balance + $1 WHERE id = $2", amount, to_account)
     """
+    span_name = f"service {func.__qualname__}"
+    span_attributes = {"code.namespace": func.__module__, "db.transaction": True}
+
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
+        with tracer.span(span_name, **span_attributes):
+            return await _call(*args, **kwargs)
+
+    async def _call(*args, **kwargs):
         # Check if a connection was provided
         conn_provided = 'conn' in kwargs and kwargs['conn'] is not None
         conn = kwargs.get('conn')
@@ -99,13 +122,12 @@ def db_transaction(func: F) -> F:
         if not conn_provided:
             # If no connection provided, create a new one
             try:
-                pool = await database.connect()
-                conn = await pool.acquire()
-                
-                # Start a transaction
-                async with conn.transaction():
-                    kwargs['conn'] = conn
-                    result = await func(*args, **kwargs)
+                # Use the database utility so the acquisition is accounted in the pool stats
+                async with database.connection() as new_conn:
+                    # Start a transaction
+                    async with new_conn.transaction():
+                        kwargs['conn'] = new_conn
+                        result = await func(*args, **kwargs)
                 
                 return result
             except asyncpg.PostgresError as e:
@@ -114,10 +136,6 @@ def db_transaction(func: F) -> F:
             except Exception as e:
                 logger.error(f"Unexpected transaction error in {func.__name__}: {e}", exc_info=True)
                 raise
-            finally:
-                # Release the connection
-                if conn and pool:
-                    await pool.release(conn)
         else:
             # If a connection was provided, start a transaction on it
             async with conn.transaction():
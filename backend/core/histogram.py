@@ -0,0 +1,93 @@
+"""
+Fixed-bucket latency histogram.
+
+Observations are counted in cumulative-friendly buckets (the same layout as a
+Prometheus histogram), so recording is O(log buckets) with constant memory, and
+percentiles are estimated from the bucket boundaries.
+"""
+
+import bisect
+from typing import Dict, List, Optional, Sequence
+
+# Upper bounds in seconds, from 0.5 ms to 30 s
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+
+class Histogram:
+    """
+    Counts observations (in seconds) per bucket and keeps their sum and maximum.
+    """
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        # One count per bucket plus the overflow (+Inf) bucket
+        self.counts: List[int] = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Records an observation.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        """
+        Adds the observations of another histogram with the same buckets.
+        """
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> float:
+        """
+        Estimates a percentile as the upper bound of the bucket holding its rank
+        (the maximum observed value for the overflow bucket).
+
+        Args:
+            pct: Percentile between 0 and 100.
+        Returns:
+            Estimated value in seconds, or 0.0 without observations.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, pct / 100 * self.count)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def cumulative(self) -> List[int]:
+        """
+        Returns the cumulative count per bucket, +Inf last (Prometheus 'le' semantics).
+        """
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def summary(self, scale: float = 1000.0, digits: int = 3) -> Dict[str, Optional[float]]:
+        """
+        Summarizes the histogram, in milliseconds by default.
+        """
+        return {
+            "count": self.count,
+            "avg": round(self.sum / self.count * scale, digits) if self.count else 0.0,
+            "p50": round(self.percentile(50) * scale, digits),
+            "p90": round(self.percentile(90) * scale, digits),
+            "p99": round(self.percentile(99) * scale, digits),
+            "max": round(self.max * scale, digits),
+        }
@@ -0,0 +1,171 @@
+"""
+Query instrumentation hooks for pooled connections.
+
+When at least one query observer is registered, Database.connection() hands out
+an InstrumentedConnection instead of the raw asyncpg connection. The proxy times
+every execute/fetch/fetchrow/fetchval/executemany/COPY call, including the ones
+service functions run directly on their ``conn`` argument, and passes a
+QueryEvent to the observers. With no observer registered the raw connection is
+returned and nothing is measured.
+
+Events carry the normalized statement text (literals replaced by '?', so the
+same statement with different inline values is counted once) and the calling
+function, found by walking the stack past the backend.core wrappers.
+"""
+
+import functools
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Frames of these modules are wrappers, not callers
+_WRAPPER_MODULES = ("backend.core.", "contextlib", "asyncio", "functools")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+_caller_names: Dict[Any, str] = {}
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """
+    Normalizes a statement for aggregation: collapses whitespace and replaces
+    string and numeric literals with '?' (lists of literals become a single '?').
+    Positional parameters ($1, $2...) are kept.
+
+    Args:
+        sql: SQL text as sent to the server.
+    Returns:
+        Normalized statement text.
+    """
+    text = " ".join(sql.split())
+    text = _STRING_LITERAL.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    return _VALUE_LIST.sub("(?)", text)
+
+
+def find_caller() -> str:
+    """
+    Returns the qualified name ('module.function') of the innermost function on
+    the stack that is not part of the backend.core wrappers.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        name = _caller_names.get(code)
+        if name is None:
+            module = frame.f_globals.get("__name__", "")
+            if module.startswith(_WRAPPER_MODULES):
+                name = ""
+            else:
+                name = f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+            _caller_names[code] = name
+        if name:
+            return name
+        frame = frame.f_back
+    return "unknown"
+
+
+def _status_rows(status: Any) -> Optional[int]:
+    # Command tags end with the affected row count: 'UPDATE 3', 'INSERT 0 5', 'COPY 100'
+    if isinstance(status, str):
+        count = status.rpartition(" ")[2]
+        if count.isdigit():
+            return int(count)
+    return None
+
+
+class QueryEvent:
+    """
+    One statement executed on an instrumented connection.
+    """
+    __slots__ = ("statement", "sql", "args", "method", "caller", "started_at", "duration", "rows", "error")
+
+    def __init__(self, sql: str, args: tuple, method: str, caller: str, started_at: float,
+                 duration: float, rows: Optional[int], error: Optional[BaseException]):
+        self.statement = normalize_sql(sql)
+        self.sql = sql
+        self.args = args
+        self.method = method
+        self.caller = caller
+        self.started_at = started_at  # Wall-clock start (time.time())
+        self.duration = duration  # Seconds
+        self.rows = rows
+        self.error = error
+
+
+class InstrumentedConnection:
+    """
+    Proxy around an asyncpg connection that reports every statement to the observers.
+    Everything else (transaction(), cursor(), prepare()...) is delegated unchanged.
+    """
+    __slots__ = ("_conn", "_observers")
+
+    def __init__(self, conn, observers: Iterable[Callable[[QueryEvent], None]]):
+        self._conn = conn
+        self._observers = tuple(observers)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    @property
+    def raw_connection(self):
+        """
+        The underlying asyncpg connection.
+        """
+        return self._conn
+
+    async def _run(self, method: str, sql: str, args: tuple, call, count_rows: Callable[[Any], Optional[int]]):
+        caller = find_caller()
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            result = await call
+        except BaseException as e:
+            self._emit(QueryEvent(sql, args, method, caller, started_at, time.perf_counter() - start, None, e))
+            raise
+        self._emit(QueryEvent(sql, args, method, caller, started_at, time.perf_counter() - start, count_rows(result), None))
+        return result
+
+    def _emit(self, event: QueryEvent):
+        for observer in self._observers:
+            try:
+                observer(event)
+            except Exception as e:
+                logger.error(f"Query observer {observer!r} failed: {e}")
+
+    async def execute(self, query: str, *args, **kwargs):
+        return await self._run("execute", query, args, self._conn.execute(query, *args, **kwargs), _status_rows)
+
+    async def executemany(self, command: str, args, **kwargs):
+        args = list(args)
+        return await self._run(
+            "executemany", command, (), self._conn.executemany(command, args, **kwargs), lambda _: len(args)
+        )
+
+    async def fetch(self, query: str, *args, **kwargs):
+        return await self._run("fetch", query, args, self._conn.fetch(query, *args, **kwargs), len)
+
+    async def fetchrow(self, query: str, *args, **kwargs):
+        return await self._run(
+            "fetchrow", query, args, self._conn.fetchrow(query, *args, **kwargs), lambda row: int(row is not None)
+        )
+
+    async def fetchval(self, query: str, *args, **kwargs):
+        return await self._run(
+            "fetchval", query, args, self._conn.fetchval(query, *args, **kwargs), lambda value: int(value is not None)
+        )
+
+    async def copy_records_to_table(self, table_name: str, *, records, **kwargs):
+        columns = kwargs.get("columns")
+        sql = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN" if columns else f"COPY {table_name} FROM STDIN"
+        return await self._run(
+            "copy", sql, (), self._conn.copy_records_to_table(table_name, records=records, **kwargs), _status_rows
+        )
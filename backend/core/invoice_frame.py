@@ -0,0 +1,257 @@
+"""
+Columnar invoice container with vectorized billing analytics.
+
+Report data is otherwise a list of dictionaries with Decimal amounts, and every
+aggregate a Python loop over it. InvoiceFrame keeps one NumPy array per column:
+
+- ids (int64) and client_ids (int32, -1 for none)
+- amount_cents (int64): exact integer cents, so sums do not accumulate float errors
+- issued / due (int32): proleptic Gregorian ordinals (date.toordinal()), 0 for none
+- status (int8): index in STATUSES, -1 for none or another value
+
+It is built straight from the rows of queries.INVOICE_FRAME_COLUMNS (the database
+already returns cents, ordinals and status codes) or from invoice dictionaries.
+Rows keep their input order, so a position in the frame is also a position in the
+list it was built from.
+
+NumPy is imported with this module: import it inside the functions that need it, as
+the server does not load NumPy at startup.
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+STATUSES = ("paid", "pending", "canceled")
+PAID, PENDING, CANCELED = range(len(STATUSES))
+NO_DATE = 0
+# Upper limits (days past due) of the aging buckets of pending invoices; the last bucket is open
+AGING_LIMITS = (0, 30, 60, 90)
+AGING_LABELS = ("not yet due", "1-30 days overdue", "31-60 days overdue", "61-90 days overdue", "over 90 days overdue")
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def _ordinal(value: Any) -> int:
+    if value is None:
+        return NO_DATE
+    if isinstance(value, date):
+        return value.toordinal()
+    return date.fromisoformat(str(value)[:10]).toordinal()
+
+
+def _codes(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Distinct values (sorted) and the index of each element in them, like
+    np.unique(values, return_inverse=True). Integer values within a range not much
+    larger than their number are coded with a lookup table instead of a sort.
+    """
+    if not len(values):
+        return values[:0], np.zeros(0, dtype=np.intp)
+    low = int(values.min())
+    span = int(values.max()) - low + 1
+    if span > 4 * len(values) + 1024:
+        return np.unique(values, return_inverse=True)
+    offsets = values.astype(np.int64) - low
+    present = np.bincount(offsets, minlength=span) > 0
+    lookup = np.cumsum(present) - 1
+    return (np.flatnonzero(present) + low).astype(values.dtype), lookup[offsets]
+
+
+class InvoiceFrame:
+    """
+    Invoices stored by column. See the module docstring for the column encodings.
+    """
+    __slots__ = ("ids", "client_ids", "amount_cents", "issued", "due", "status")
+
+    def __init__(self, ids: np.ndarray, client_ids: np.ndarray, amount_cents: np.ndarray,
+                 issued: np.ndarray, due: np.ndarray, status: np.ndarray):
+        self.ids = ids
+        self.client_ids = client_ids
+        self.amount_cents = amount_cents
+        self.issued = issued
+        self.due = due
+        self.status = status
+
+    @classmethod
+    def from_records(cls, rows: Sequence[Sequence[int]]) -> "InvoiceFrame":
+        """
+        Builds the frame from rows of queries.INVOICE_FRAME_COLUMNS (asyncpg Records or tuples):
+        id, client_id, amount_cents, issued_ordinal, due_ordinal, status_code.
+        """
+        count = len(rows)
+        flat = np.fromiter((value for row in rows for value in row), dtype=np.int64, count=count * 6)
+        table = flat.reshape(count, 6)
+        return cls(
+            table[:, 0].copy(),
+            table[:, 1].astype(np.int32),
+            table[:, 2].copy(),
+            table[:, 3].astype(np.int32),
+            table[:, 4].astype(np.int32),
+            table[:, 5].astype(np.int8),
+        )
+
+    @classmethod
+    def from_dicts(cls, invoices: Sequence[Dict[str, Any]]) -> "InvoiceFrame":
+        """
+        Builds the frame from invoice dictionaries (amount as Decimal, number or string;
+        dates as date or ISO string).
+        """
+        count = len(invoices)
+        amounts = np.fromiter((float(i["amount"]) for i in invoices), dtype=np.float64, count=count)
+        return cls(
+            np.fromiter((i["id"] for i in invoices), dtype=np.int64, count=count),
+            np.fromiter((-1 if i.get("client_id") is None else i["client_id"] for i in invoices), dtype=np.int32, count=count),
+            # Amounts have two decimals: rounding the float cents recovers them exactly
+            np.rint(amounts * 100).astype(np.int64),
+            np.fromiter((_ordinal(i.get("issued_at")) for i in invoices), dtype=np.int32, count=count),
+            np.fromiter((_ordinal(i.get("due_date")) for i in invoices), dtype=np.int32, count=count),
+            np.fromiter((_STATUS_CODES.get(i.get("status"), -1) for i in invoices), dtype=np.int8, count=count),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def invoice(self, position: int) -> Dict[str, Any]:
+        """
+        The invoice at a position as a dictionary like the services return (amount as a
+        string with two decimals), to list it without the dictionaries the frame came from.
+        """
+        client_id, issued, due, status = (int(self.client_ids[position]), int(self.issued[position]),
+                                          int(self.due[position]), int(self.status[position]))
+        return {
+            "id": int(self.ids[position]),
+            "client_id": client_id if client_id >= 0 else None,
+            "amount": cents_to_str(self.amount_cents[position]),
+            "issued_at": date.fromordinal(issued) if issued != NO_DATE else None,
+            "due_date": date.fromordinal(due) if due != NO_DATE else None,
+            "status": STATUSES[status] if status >= 0 else None,
+        }
+
+    def total_cents(self) -> int:
+        return int(self.amount_cents.sum())
+
+    def issued_range(self) -> Tuple[Optional[date], Optional[date]]:
+        """
+        First and last issue dates, or (None, None) if no invoice has one.
+        """
+        issued = self.issued[self.issued != NO_DATE]
+        if not len(issued):
+            return None, None
+        return date.fromordinal(int(issued.min())), date.fromordinal(int(issued.max()))
+
+    def status_totals(self) -> Dict[Optional[str], Tuple[int, int]]:
+        """
+        Invoice count and cents per status (None for invoices without a known status).
+        """
+        codes = self.status.astype(np.int64) + 1
+        counts = np.bincount(codes, minlength=len(STATUSES) + 1)
+        # bincount sums the weights as float64, exact for integers below 2**53 cents
+        cents = np.bincount(codes, weights=self.amount_cents, minlength=len(STATUSES) + 1)
+        return {
+            (STATUSES[code - 1] if code else None): (int(counts[code]), int(round(cents[code])))
+            for code in range(len(STATUSES) + 1) if counts[code]
+        }
+
+    def days_overdue(self, today: date) -> np.ndarray:
+        """
+        Days past the due date (the issue date if there is none) of every invoice;
+        0 for invoices without either date.
+        """
+        reference = np.where(self.due != NO_DATE, self.due, self.issued)
+        return np.where(reference != NO_DATE, today.toordinal() - reference.astype(np.int64), 0)
+
+    def aging(self, today: date) -> List[Tuple[str, int, int]]:
+        """
+        Pending invoices by days past due: (label, count, cents) for each bucket of AGING_LABELS.
+        """
+        pending = self.status == PENDING
+        buckets = np.searchsorted(np.array(AGING_LIMITS), self.days_overdue(today)[pending], side="left")
+        counts = np.bincount(buckets, minlength=len(AGING_LABELS))
+        cents = np.bincount(buckets, weights=self.amount_cents[pending], minlength=len(AGING_LABELS))
+        return [(label, int(counts[b]), int(round(cents[b]))) for b, label in enumerate(AGING_LABELS)]
+
+    def dso(self, today: date, days: int = 90) -> Optional[float]:
+        """
+        Days sales outstanding: pending amount over the amount billed (not canceled) in
+        the last `days` days, times `days`. None if nothing was billed in that window.
+        """
+        issued_so_far = (self.issued != NO_DATE) & (self.issued <= today.toordinal())
+        window = issued_so_far & (self.issued > today.toordinal() - days) & (self.status != CANCELED)
+        billed = int(self.amount_cents[window].sum())
+        if billed <= 0:
+            return None
+        receivable = int(self.amount_cents[issued_so_far & (self.status == PENDING)].sum())
+        return receivable / billed * days
+
+    def client_rollup(self) -> Dict[str, np.ndarray]:
+        """
+        Per client: 'client_id', 'count', 'cents' and 'pending_cents', ordered by client_id.
+        """
+        clients, codes = _codes(self.client_ids)
+        size = len(clients)
+        pending = self.status == PENDING
+        return {
+            "client_id": clients,
+            "count": np.bincount(codes, minlength=size),
+            "cents": np.bincount(codes, weights=self.amount_cents, minlength=size).round().astype(np.int64),
+            "pending_cents": np.bincount(codes[pending], weights=self.amount_cents[pending], minlength=size).round().astype(np.int64),
+        }
+
+    def monthly(self) -> Dict[str, np.ndarray]:
+        """
+        Per issue month: 'month' (datetime64[M]), 'count', 'cents', 'paid_cents' and
+        'pending_cents', in chronological order. Invoices without issue date are left out.
+        """
+        dated = self.issued != NO_DATE
+        # Months are computed on the distinct issue days only
+        days, day_codes = _codes(self.issued[dated])
+        day_months = (days.astype(np.int64) - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]")
+        months, month_of_day = np.unique(day_months, return_inverse=True)
+        codes = month_of_day[day_codes]
+        size = len(months)
+        cents = self.amount_cents[dated]
+        status = self.status[dated]
+
+        def by_month(mask: Optional[np.ndarray] = None) -> np.ndarray:
+            selected = slice(None) if mask is None else mask
+            return np.bincount(codes[selected], weights=cents[selected], minlength=size).round().astype(np.int64)
+
+        return {
+            "month": months,
+            "count": np.bincount(codes, minlength=size),
+            "cents": by_month(),
+            "paid_cents": by_month(status == PAID),
+            "pending_cents": by_month(status == PENDING),
+        }
+
+    def largest(self, n: int) -> np.ndarray:
+        """
+        Positions of the n invoices with the highest amounts, highest first (ties by position).
+        """
+        order = np.argsort(-self.amount_cents, kind="stable")
+        return order[:n]
+
+    def most_overdue(self, today: date, n: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Pending invoices past due, most overdue first.
+
+        Returns:
+            Tuple with the positions of at most n of them, their days overdue, and how many there are.
+        """
+        days = self.days_overdue(today)
+        overdue = np.flatnonzero((self.status == PENDING) & (days > 0))
+        order = overdue[np.argsort(-days[overdue], kind="stable")][:n]
+        return order, days[order], len(overdue)
+
+
+def cents_to_str(cents: int) -> str:
+    """
+    Formats integer cents as an amount with two decimals.
+    """
+    sign = "-" if cents < 0 else ""
+    whole, part = divmod(abs(int(cents)), 100)
+    return f"{sign}{whole}.{part:02d}"
+
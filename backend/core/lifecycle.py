@@ -0,0 +1,211 @@
+"""
+Server lifecycle: warm-up, readiness and graceful drain.
+
+The server moves through four states:
+
+- starting: the startup hooks (pool creation, statement preparation, optional
+  reference-data preload) are running; /ready answers 503.
+- ready: warm-up finished; /ready answers 200.
+- draining: shutdown was requested; new tool calls are rejected with
+  ``{"success": False}`` while the calls in flight finish (up to a deadline).
+- stopped: the shutdown hooks (report queue flush, span export, pool close) ran.
+
+Tool calls are counted through guard_tool(), applied to every tool by the shared
+mcp instance.
+"""
+
+import asyncio
+import functools
+import inspect
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+STARTING = "starting"
+READY = "ready"
+DRAINING = "draining"
+STOPPED = "stopped"
+
+SHUTTING_DOWN_RESPONSE = {"success": False, "error": "Server is shutting down. Please retry the call."}
+
+Hook = Callable[[], Awaitable[None]]
+
+
+class Lifecycle:
+    """
+    Tracks the server state, the tool calls in flight and the startup/shutdown hooks.
+    """
+    def __init__(self):
+        self.state = STARTING
+        self.inflight = 0
+        self.started_at = time.time()
+        self.ready_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._startup_hooks: List[Tuple[str, Hook]] = []
+        self._shutdown_hooks: List[Tuple[str, Hook]] = []
+        self._retry_task: Optional[asyncio.Task] = None
+        self._drained = False
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+    @property
+    def accepting(self) -> bool:
+        """
+        Whether new tool calls are served (also while starting: the pool is created lazily).
+        """
+        return self.state in (STARTING, READY)
+
+    def on_startup(self, name: str, hook: Hook) -> None:
+        """
+        Registers a warm-up step, run in registration order before readiness.
+        """
+        self._startup_hooks.append((name, hook))
+
+    def on_shutdown(self, name: str, hook: Hook) -> None:
+        """
+        Registers a shutdown step, run in registration order after the drain.
+        """
+        self._shutdown_hooks.append((name, hook))
+
+    async def _run_startup_hooks(self):
+        for name, hook in self._startup_hooks:
+            start = time.perf_counter()
+            await hook()
+            logger.info(f"Warm-up step '{name}' done in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    async def startup(self, timeout: float, retry_interval: float = 5) -> bool:
+        """
+        Runs the warm-up steps and marks the server ready. If they fail, the
+        server keeps serving (not ready) and the warm-up is retried in the background.
+
+        Args:
+            timeout: Seconds allowed for the warm-up.
+            retry_interval: Seconds between retries after a failure.
+        Returns:
+            True if the server is ready.
+        """
+        self.state = STARTING
+        try:
+            await asyncio.wait_for(self._run_startup_hooks(), timeout)
+        except Exception as e:
+            self.last_error = str(e) or type(e).__name__
+            logger.error(f"Warm-up failed, retrying every {retry_interval}s: {self.last_error}")
+            self._retry_task = asyncio.create_task(self._retry_startup(timeout, retry_interval))
+            return False
+        self._mark_ready()
+        return True
+
+    async def _retry_startup(self, timeout: float, retry_interval: float):
+        while self.state == STARTING:
+            await asyncio.sleep(retry_interval)
+            try:
+                await asyncio.wait_for(self._run_startup_hooks(), timeout)
+            except Exception as e:
+                self.last_error = str(e) or type(e).__name__
+                logger.warning(f"Warm-up retry failed: {self.last_error}")
+                continue
+            if self.state == STARTING:
+                self._mark_ready()
+
+    def _mark_ready(self):
+        self.state = READY
+        self.ready_at = time.time()
+        self.last_error = None
+        logger.info(f"Server ready in {self.ready_at - self.started_at:.2f}s")
+
+    def _call_finished(self):
+        self.inflight -= 1
+        if self.inflight == 0 and self._idle is not None:
+            self._idle.set()
+
+    def guard_tool(self, fn: Callable, name: str) -> Callable:
+        """
+        Wraps a tool so calls in flight are counted and new calls are rejected
+        once the server is draining.
+        """
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                if not self.accepting:
+                    logger.warning(f"Rejected call to {name}: server is {self.state}")
+                    return dict(SHUTTING_DOWN_RESPONSE)
+                self.inflight += 1
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self._call_finished()
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.accepting:
+                    logger.warning(f"Rejected call to {name}: server is {self.state}")
+                    return dict(SHUTTING_DOWN_RESPONSE)
+                self.inflight += 1
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._call_finished()
+        return wrapper
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Stops accepting tool calls and waits for the calls in flight to finish.
+
+        Args:
+            timeout: Seconds to wait for the calls in flight.
+        Returns:
+            True if every call finished in time.
+        """
+        if self.state in (STARTING, READY):
+            self.state = DRAINING
+            if self._retry_task is not None:
+                self._retry_task.cancel()
+            logger.info(f"Draining: waiting for {self.inflight} tool call(s) in flight (up to {timeout}s)")
+        if self.inflight == 0 or self._drained:
+            # Already drained (or its deadline already passed): do not wait twice
+            return self.inflight == 0
+        self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.error(f"Drain deadline exceeded with {self.inflight} tool call(s) still in flight")
+            return False
+        finally:
+            self._drained = True
+
+    async def shutdown(self, drain_timeout: float) -> None:
+        """
+        Drains the tool calls in flight, then runs the shutdown hooks. A failing
+        hook does not prevent the following ones from running.
+        """
+        await self.drain(drain_timeout)
+        for name, hook in self._shutdown_hooks:
+            try:
+                await hook()
+            except Exception as e:
+                logger.error(f"Shutdown step '{name}' failed: {e}")
+        self.state = STOPPED
+        logger.info("Server stopped")
+
+    def status(self) -> dict:
+        """
+        Reports the lifecycle state for the readiness endpoint.
+        """
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "inflight": self.inflight,
+            "startup_seconds": round(self.ready_at - self.started_at, 3) if self.ready_at else None,
+            "error": self.last_error,
+        }
+
+
+# Singleton instance used by the server and the shared mcp instance
+lifecycle = Lifecycle()
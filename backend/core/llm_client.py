@@ -0,0 +1,196 @@
+"""
+Shared asynchronous LLM client for report generation.
+
+One AsyncOpenAI client, created on first use, is reused by every report: its
+HTTP connection pool keeps the TLS connections to the provider open between
+calls instead of building a new client per report, and awaiting the completion
+leaves the event loop free for the other MCP sessions.
+
+- At most LLM_MAX_CONCURRENCY completions run at once; further calls wait for a slot.
+- Each attempt is bounded by LLM_TIMEOUT seconds.
+- Timeouts, connection errors, 429 and 5xx answers are retried up to LLM_MAX_RETRIES
+  times with exponential backoff and full jitter (honouring Retry-After when sent).
+- OPENAI_BASE_URL points the client at any OpenAI-compatible endpoint, such as a
+  local stub server in tests.
+
+The openai package is imported on first use, as it is not loaded at startup.
+"""
+
+import asyncio
+import random
+from typing import Any, Dict, List, Optional
+
+from backend.core.config import (
+    OPENAI_API_KEY, OPENAI_BASE_URL, LLM_MODEL, LLM_TIMEOUT, LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY
+)
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Outcomes counted per completion request
+OUTCOMES = ("success", "failure")
+# HTTP statuses worth retrying: request timeout, conflict, rate limit and server errors
+RETRYABLE_STATUSES = (408, 409, 429)
+
+
+class LLMClient:
+    """
+    Chat completions through a shared AsyncOpenAI client with a concurrency limit and retries.
+
+    Args:
+        api_key: Provider API key.
+        base_url: OpenAI-compatible API base URL (None for the OpenAI default).
+        model: Default model of the completions.
+        timeout: Seconds allowed for each attempt.
+        max_concurrency: Completions running at once (also the size of the connection pool).
+        max_retries: Retries after a retryable error.
+        retry_base_delay: Backoff of the first retry in seconds, doubled on each further retry.
+        retry_max_delay: Upper bound of a retry delay in seconds.
+    """
+    def __init__(self, api_key: Optional[str] = OPENAI_API_KEY, base_url: Optional[str] = OPENAI_BASE_URL,
+                 model: str = LLM_MODEL, timeout: float = LLM_TIMEOUT,
+                 max_concurrency: int = LLM_MAX_CONCURRENCY, max_retries: int = LLM_MAX_RETRIES,
+                 retry_base_delay: float = LLM_RETRY_BASE_DELAY, retry_max_delay: float = LLM_RETRY_MAX_DELAY):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+        self.retries = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self._client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+            import httpx
+            limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                # Retries are made here, under the concurrency limit and with jitter
+                max_retries=0,
+                http_client=DefaultAsyncHttpxClient(limits=limits, timeout=self.timeout),
+            )
+        return self._client
+
+    def _is_retryable(self, error: Exception) -> bool:
+        import openai
+        if isinstance(error, (asyncio.TimeoutError, openai.APIConnectionError)):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRYABLE_STATUSES or error.status_code >= 500
+        return False
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """
+        Full-jitter exponential backoff, or the server's Retry-After if it asks for longer.
+        """
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.retry_max_delay))
+            except ValueError:
+                pass
+        return delay
+
+    async def complete(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+                       timeout: Optional[float] = None, **options: Any) -> str:
+        """
+        Runs a chat completion and returns the text of its first choice.
+
+        Args:
+            messages: Chat messages ({"role", "content"}).
+            model: Model to use instead of the default.
+            timeout: Seconds allowed for each attempt instead of the default.
+            options: Further chat completion parameters (temperature, max_tokens, ...).
+        Raises:
+            Exception: The last error once the retries are exhausted, or a non-retryable error.
+        """
+        client = self._get_client()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        timeout = timeout if timeout is not None else self.timeout
+        attempt = 0
+        while True:
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            try:
+                # wait_for bounds the whole attempt; the client timeout only bounds each read
+                response = await asyncio.wait_for(
+                    client.chat.completions.create(model=model or self.model, messages=messages, timeout=timeout, **options),
+                    timeout
+                )
+                self.counts["success"] += 1
+                return response.choices[0].message.content
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self.counts["failure"] += 1
+                    logger.error(f"LLM completion failed after {attempt + 1} attempts: {e!r}")
+                    raise
+                delay = self._retry_delay(attempt, e)
+                logger.warning(f"LLM completion attempt {attempt + 1} failed ({e!r}); retrying in {delay:.2f}s")
+            finally:
+                self.in_flight -= 1
+                self._semaphore.release()
+            # The slot is released while waiting to retry
+            self.retries += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def close(self) -> None:
+        """
+        Closes the HTTP connections; the next completion opens a new client.
+        """
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(self.counts),
+            "retries": self.retries,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    def render_prometheus(self) -> str:
+        """
+        Renders the LLM client metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP mcp_llm_requests_total LLM completions by outcome (after retries).",
+            "# TYPE mcp_llm_requests_total counter",
+        ]
+        lines += [f'mcp_llm_requests_total{{outcome="{outcome}"}} {count}' for outcome, count in self.counts.items()]
+        lines += [
+            "# HELP mcp_llm_retries_total LLM completion attempts retried.",
+            "# TYPE mcp_llm_retries_total counter",
+            f"mcp_llm_retries_total {self.retries}",
+            "# HELP mcp_llm_in_flight LLM completions running.",
+            "# TYPE mcp_llm_in_flight gauge",
+            f"mcp_llm_in_flight {self.in_flight}",
+            "# HELP mcp_llm_waiting LLM completions waiting for a concurrency slot.",
+            "# TYPE mcp_llm_waiting gauge",
+            f"mcp_llm_waiting {self.waiting}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+# Singleton client shared by the report tools
+llm_client = LLMClient()
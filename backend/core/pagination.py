@@ -0,0 +1,95 @@
+"""
+Keyset pagination helpers.
+
+List tools page through tables by primary key (``WHERE id > $after_id ORDER BY id
+LIMIT $n``) instead of OFFSET, so every page is a bounded index range scan no
+matter how deep into the table it is. The cursor handed back to agents is an
+opaque token wrapping the last id of the page.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.core.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    """
+    Normalizes a requested page size to the range [1, PAGE_SIZE_MAX].
+
+    Args:
+        limit: Page size requested by the caller (None or <= 0 uses the default).
+    Returns:
+        Page size to use.
+    """
+    if not limit or limit <= 0:
+        return PAGE_SIZE_DEFAULT
+    return min(limit, PAGE_SIZE_MAX)
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Builds an opaque cursor pointing just after the given id.
+
+    Args:
+        last_id: ID of the last row returned in the current page.
+    Returns:
+        URL-safe cursor string.
+    """
+    raw = json.dumps({"after_id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Extracts the keyset position from a cursor produced by encode_cursor.
+
+    Args:
+        cursor: Cursor string received from a previous page.
+    Returns:
+        The id after which the next page starts.
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        after_id = int(payload["after_id"])
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if after_id < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return after_id
+
+
+def resolve_after_id(after_id: int = 0, cursor: str = "") -> int:
+    """
+    Resolves the starting position of a page. An explicit cursor takes precedence
+    over after_id.
+
+    Args:
+        after_id: Last id already seen by the caller (0 to start from the beginning).
+        cursor: Opaque cursor returned as next_cursor by a previous call.
+    Returns:
+        The id after which the page starts.
+    """
+    if cursor:
+        return decode_cursor(cursor)
+    return max(after_id or 0, 0)
+
+
+def split_page(rows: List[Dict[str, Any]], limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Splits a result fetched with ``limit + 1`` rows into the page and its next cursor.
+
+    Args:
+        rows: Rows ordered by id, fetched with one extra row to detect more pages.
+        limit: Page size.
+    Returns:
+        Tuple with the rows of the page and the next cursor (None on the last page).
+    """
+    if len(rows) > limit:
+        page = rows[:limit]
+        return page, encode_cursor(page[-1]["id"])
+    return rows, None
@@ -0,0 +1,129 @@
+"""
+Report period grammar.
+
+Periods given to the report tools are turned into a half-open date range
+[start, end) on invoices.issued_at, so the filter runs in SQL on the
+invoices(issued_at) and invoices(client_id, issued_at) indexes instead of
+transferring every invoice and matching substrings in Python.
+
+Accepted forms (case-insensitive):
+
+- Year:          2024
+- Month:         2024-01, 2024-1, 2024/01, 01/2024
+- Quarter:       2024-Q1, 2024Q1, Q1 2024, Q1-2024
+- ISO week:      2024-W05, 2024W05, 2024-W5
+- Day:           2024-03-15
+- Range:         <period>..<period> or <period> to <period> (from the start of the
+                 first to the end of the second, e.g. 2024-01..2024-03)
+- Relative:      last 30 days, last 7 days (today included)
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+_YEAR = re.compile(r"(\d{4})")
+_MONTH = re.compile(r"(\d{4})[-/](\d{1,2})")
+_MONTH_FIRST = re.compile(r"(\d{1,2})/(\d{4})")
+_QUARTER = re.compile(r"(\d{4})-?q([1-4])")
+_QUARTER_FIRST = re.compile(r"q([1-4])[- ]?(\d{4})")
+_WEEK = re.compile(r"(\d{4})-?w(\d{1,2})")
+_DAY = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_LAST_DAYS = re.compile(r"last (\d+) days?")
+_RANGE = re.compile(r"\s*(?:\.\.|\bto\b)\s*")
+
+# Longest accepted "last N days", to keep the range within valid dates
+MAX_RELATIVE_DAYS = 36600
+
+
+@dataclass(frozen=True)
+class Period:
+    """
+    Half-open range of issue dates: start <= issued_at < end.
+    """
+    start: date
+    end: date
+
+    @property
+    def last_day(self) -> date:
+        return self.end - timedelta(days=1)
+
+    def contains(self, day: date) -> bool:
+        return self.start <= day < self.end
+
+    def __str__(self) -> str:
+        return f"{self.start.isoformat()} to {self.last_day.isoformat()}"
+
+
+def _month(year: int, month: int) -> Period:
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month {month}")
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return Period(date(year, month, 1), end)
+
+
+def _single(text: str, today: date) -> Period:
+    match = _YEAR.fullmatch(text)
+    if match:
+        year = int(match.group(1))
+        return Period(date(year, 1, 1), date(year + 1, 1, 1))
+    match = _DAY.fullmatch(text)
+    if match:
+        day = date(*(int(part) for part in match.groups()))
+        return Period(day, day + timedelta(days=1))
+    match = _MONTH.fullmatch(text)
+    if match:
+        return _month(int(match.group(1)), int(match.group(2)))
+    match = _MONTH_FIRST.fullmatch(text)
+    if match:
+        return _month(int(match.group(2)), int(match.group(1)))
+    match = _QUARTER.fullmatch(text) or _QUARTER_FIRST.fullmatch(text)
+    if match:
+        year, quarter = (int(match.group(1)), int(match.group(2))) if match.re is _QUARTER \
+            else (int(match.group(2)), int(match.group(1)))
+        start = _month(year, 3 * quarter - 2).start
+        return Period(start, _month(year, 3 * quarter).end)
+    match = _WEEK.fullmatch(text)
+    if match:
+        start = date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+        return Period(start, start + timedelta(days=7))
+    match = _LAST_DAYS.fullmatch(text)
+    if match:
+        days = int(match.group(1))
+        if not 1 <= days <= MAX_RELATIVE_DAYS:
+            raise ValueError(f"Invalid number of days {days}")
+        end = today + timedelta(days=1)
+        return Period(end - timedelta(days=days), end)
+    raise ValueError("unrecognized format")
+
+
+def parse_period(text: str, today: Optional[date] = None) -> Period:
+    """
+    Parses a report period into a range of issue dates.
+
+    Args:
+        text: Period as written by the user (see the module docstring for the forms).
+        today: Reference date for relative periods (defaults to the current date).
+    Returns:
+        The Period.
+    Raises:
+        ValueError: If the period is not valid.
+    """
+    normalized = " ".join(str(text).strip().lower().split())
+    today = today or date.today()
+    try:
+        bounds = _RANGE.split(normalized)
+        if len(bounds) == 1:
+            return _single(normalized, today)
+        if len(bounds) != 2:
+            raise ValueError("a range has two bounds")
+        first, second = (_single(bound, today) for bound in bounds)
+        if second.end <= first.start:
+            raise ValueError("the range ends before it starts")
+        return Period(first.start, second.end)
+    except ValueError as e:
+        raise ValueError(
+            f"Invalid period '{text}' ({e}). Use a year (2024), month (2024-01), quarter (2024-Q1), "
+            f"ISO week (2024-W05), day (2024-01-31), a range (2024-01..2024-03) or 'last 30 days'."
+        ) from None
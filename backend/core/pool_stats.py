@@ -0,0 +1,142 @@
+"""
+Connection pool statistics and adaptive sizing.
+
+This module provides the bookkeeping used by the Database class to report pool
+health (acquire waits, waiters, timeouts) and the limiter used by the adaptive
+pool mode.
+"""
+
+import asyncio
+import math
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional
+
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """
+    Computes a percentile using the nearest-rank method.
+
+    Args:
+        values: Sample values.
+        pct: Percentile between 0 and 100.
+    Returns:
+        The percentile value, or 0.0 if there are no samples.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class PoolStats:
+    """
+    Records acquire wait times and waiter counts for a connection pool.
+    Keeps a bounded window of recent samples for latency percentiles.
+    """
+    def __init__(self, window: int = 1024):
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._interval_waits: List[float] = []
+        self.waiting = 0
+        self.acquired_total = 0
+        self.timeouts = 0
+
+    def record_wait(self, seconds: float) -> None:
+        """
+        Records the time a caller waited to obtain a connection.
+        """
+        self._waits.append(seconds)
+        self._interval_waits.append(seconds)
+        self.acquired_total += 1
+
+    def drain_interval(self) -> List[float]:
+        """
+        Returns the waits recorded since the previous call and resets them.
+        """
+        waits, self._interval_waits = self._interval_waits, []
+        return waits
+
+    def wait_percentiles(self) -> Dict[str, float]:
+        """
+        Returns acquire wait percentiles over the recent window, in milliseconds.
+        """
+        waits = list(self._waits)
+        return {
+            "p50": round(percentile(waits, 50) * 1000, 3),
+            "p90": round(percentile(waits, 90) * 1000, 3),
+            "p99": round(percentile(waits, 99) * 1000, 3),
+            "max": round(max(waits, default=0.0) * 1000, 3),
+            "samples": len(waits),
+        }
+
+
+class AdaptivePoolLimiter:
+    """
+    Bounds how many pool connections are handed out concurrently.
+
+    The limit moves between the pool's min and max size: it doubles when the p90
+    acquire wait of the last interval exceeds the target, and shrinks by one when
+    waits are negligible and less than half of the limit was in use. Connections
+    above the limit go idle and are closed by the pool's inactive lifetime, so the
+    physical pool follows the limit.
+    """
+    def __init__(self, min_limit: int, max_limit: int, target_wait: float):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.target_wait = target_wait
+        self.limit = self.min_limit
+        self.in_use = 0
+        self.peak_in_use = 0
+        self._condition: Optional[asyncio.Condition] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire(self) -> None:
+        """
+        Waits until a slot below the current limit is free and takes it.
+        """
+        condition = self._get_condition()
+        async with condition:
+            await condition.wait_for(lambda: self.in_use < self.limit)
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    async def release(self) -> None:
+        """
+        Frees a slot taken with acquire.
+        """
+        condition = self._get_condition()
+        async with condition:
+            self.in_use -= 1
+            condition.notify()
+
+    async def adjust(self, waits: List[float]) -> int:
+        """
+        Recomputes the limit from the acquire waits observed in the last interval.
+
+        Args:
+            waits: Acquire wait times in seconds.
+        Returns:
+            The new limit.
+        """
+        p90 = percentile(waits, 90)
+        previous = self.limit
+        if p90 > self.target_wait and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit * 2)
+        elif p90 < self.target_wait / 4 and self.peak_in_use * 2 < self.limit:
+            self.limit = max(self.min_limit, self.limit - 1)
+        self.peak_in_use = self.in_use
+        if self.limit != previous:
+            logger.info(f"Adaptive pool limit changed from {previous} to {self.limit} (p90 wait {p90 * 1000:.1f} ms)")
+            if self.limit > previous:
+                condition = self._get_condition()
+                async with condition:
+                    condition.notify(self.limit - previous)
+        return self.limit
@@ -0,0 +1,264 @@
+"""
+Central registry of the hot SQL statements used by the services.
+
+Every statement is registered under a name and exposed as a module constant, so
+all services send byte-identical query text and share asyncpg's per-connection
+statement cache. The pool's ``init`` hook calls prepare_statements() on every new
+connection, so the first tool call served by a connection does not pay the
+parse/plan round trip.
+
+Dynamic UPDATEs are built by build_update(), which orders the SET clause by the
+sorted field names: the same set of fields always produces the same text and
+reuses the cached plan instead of churning the cache.
+"""
+
+import functools
+from typing import Any, Dict, Iterable, List, Tuple
+
+import asyncpg
+
+from backend.core.config import DB_STATEMENT_CACHE_SIZE
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_REGISTRY: Dict[str, str] = {}
+
+
+def register(name: str, sql: str) -> str:
+    """
+    Registers a statement to be prepared on every pooled connection.
+
+    Args:
+        name: Unique name of the statement (e.g. 'clients.get_by_id').
+        sql: SQL text of the statement.
+    Returns:
+        The normalized SQL text, to be used by the services.
+    """
+    text = " ".join(sql.split())
+    if name in _REGISTRY and _REGISTRY[name] != text:
+        raise ValueError(f"Query '{name}' is already registered with a different text")
+    _REGISTRY[name] = text
+    return text
+
+
+def registered_queries() -> Dict[str, str]:
+    """
+    Returns a copy of the registered statements by name.
+    """
+    return dict(_REGISTRY)
+
+
+# Clients
+CLIENT_COLUMNS = "id, name, city, email, created_at"
+CLIENTS_LIST = register("clients.list", f"""
+    SELECT {CLIENT_COLUMNS} FROM clients WHERE id > $1 ORDER BY id LIMIT $2
+""")
+CLIENT_GET_BY_ID = register("clients.get_by_id", f"""
+    SELECT {CLIENT_COLUMNS} FROM clients WHERE id = $1
+""")
+CLIENTS_GET_BY_IDS = register("clients.get_by_ids", f"""
+    SELECT {CLIENT_COLUMNS} FROM clients WHERE id = ANY($1::int[])
+""")
+CLIENT_GET_BY_NAME = register("clients.get_by_name", f"""
+    SELECT {CLIENT_COLUMNS} FROM clients WHERE LOWER(name) = LOWER($1)
+""")
+CLIENT_EXISTS = register("clients.exists", """
+    SELECT id FROM clients WHERE id = $1
+""")
+CLIENT_INSERT = register("clients.insert", f"""
+    INSERT INTO clients (name, city, email) VALUES ($1, $2, $3) RETURNING {CLIENT_COLUMNS}
+""")
+CLIENT_DELETE = register("clients.delete", """
+    DELETE FROM clients WHERE id = $1
+""")
+CLIENT_DELETE_RETURNING = register("clients.delete_returning", f"""
+    DELETE FROM clients WHERE id = $1 RETURNING {CLIENT_COLUMNS}
+""")
+CLIENTS_EXISTING = register("clients.existing", """
+    SELECT id FROM clients WHERE id = ANY($1::int[]) FOR KEY SHARE
+""")
+# Reserves ids for a bulk COPY; LOCALTIMESTAMP is what the created_at default would store
+CLIENTS_RESERVE_IDS = register("clients.reserve_ids", """
+    SELECT nextval(pg_get_serial_sequence('clients', 'id'))::int AS id, LOCALTIMESTAMP AS created_at
+    FROM generate_series(1, $1)
+""")
+
+# Invoices
+INVOICE_COLUMNS = "id, client_id, amount, issued_at, due_date, status"
+INVOICES_LIST = register("invoices.list", f"""
+    SELECT {INVOICE_COLUMNS} FROM invoices WHERE id > $1 ORDER BY id LIMIT $2
+""")
+INVOICES_STREAM = register("invoices.stream", f"""
+    SELECT {INVOICE_COLUMNS} FROM invoices ORDER BY id
+""")
+INVOICE_GET_BY_ID = register("invoices.get_by_id", f"""
+    SELECT {INVOICE_COLUMNS} FROM invoices WHERE id = $1
+""")
+INVOICES_GET_BY_IDS = register("invoices.get_by_ids", f"""
+    SELECT {INVOICE_COLUMNS} FROM invoices WHERE id = ANY($1::int[])
+""")
+INVOICES_BY_CLIENT = register("invoices.list_by_client", f"""
+    SELECT {INVOICE_COLUMNS} FROM invoices WHERE client_id = $1 AND id > $2 ORDER BY id LIMIT $3
+""")
+INVOICES_BY_PERIOD = register("invoices.list_by_period", f"""
+    SELECT {INVOICE_COLUMNS} FROM invoices WHERE issued_at >= $1 AND issued_at < $2 ORDER BY id
+""")
+INVOICES_BY_CLIENT_PERIOD = register("invoices.list_by_client_period", f"""
+    SELECT {INVOICE_COLUMNS} FROM invoices
+    WHERE client_id = $1 AND issued_at >= $2 AND issued_at < $3 ORDER BY id
+""")
+# Columns of backend.core.invoice_frame.InvoiceFrame.from_records: cents, date ordinals and status codes
+INVOICE_FRAME_COLUMNS = """
+    id, COALESCE(client_id, -1), (amount * 100)::bigint,
+    COALESCE(issued_at - DATE '0001-01-01' + 1, 0), COALESCE(due_date - DATE '0001-01-01' + 1, 0),
+    CASE status WHEN 'paid' THEN 0 WHEN 'pending' THEN 1 WHEN 'canceled' THEN 2 ELSE -1 END
+"""
+INVOICE_INSERT = register("invoices.insert", f"""
+    INSERT INTO invoices (client_id, amount, issued_at, due_date, status)
+    VALUES ($1, $2, $3, $4, $5) RETURNING {INVOICE_COLUMNS}
+""")
+INVOICE_DELETE = register("invoices.delete", """
+    DELETE FROM invoices WHERE id = $1
+""")
+INVOICE_DELETE_RETURNING = register("invoices.delete_returning", f"""
+    DELETE FROM invoices WHERE id = $1 RETURNING {INVOICE_COLUMNS}
+""")
+INVOICES_RESERVE_IDS = register("invoices.reserve_ids", """
+    SELECT nextval(pg_get_serial_sequence('invoices', 'id'))::int AS id FROM generate_series(1, $1)
+""")
+
+# Managers
+MANAGER_COLUMNS = "id, name, email, role, created_at"
+MANAGER_GET_BY_NAME = register("managers.get_by_name", f"""
+    SELECT {MANAGER_COLUMNS} FROM managers WHERE name = $1
+""")
+MANAGER_GET_BY_EMAIL = register("managers.get_by_email", f"""
+    SELECT {MANAGER_COLUMNS} FROM managers WHERE email = $1
+""")
+MANAGERS_LIST = register("managers.list", f"""
+    SELECT {MANAGER_COLUMNS} FROM managers ORDER BY id
+""")
+
+# Billing summary (database/summary_billing.sql); the grouped reads are built in billing_service
+BILLING_SUMMARY_REBUILD = register("billing_summary.rebuild", """
+    SELECT rebuild_billing_summary()
+""")
+
+# Reports
+REPORT_INSERT = register("reports.insert", """
+    INSERT INTO reports (client_id, client_name, period, manager_email, manager_name, report_type, report_text, delivery_id)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+""")
+REPORTS_LIST = register("reports.list", """
+    SELECT r.*, d.status AS delivery_status, d.attempts AS delivery_attempts,
+           d.last_error AS delivery_error, d.sent_at AS delivered_at
+    FROM reports r LEFT JOIN report_deliveries d ON d.delivery_id = r.delivery_id
+    ORDER BY r.created_at DESC
+""")
+# Email delivery status of a report, written by the email dispatcher at each state change
+REPORT_DELIVERY_UPSERT = register("report_deliveries.upsert", """
+    INSERT INTO report_deliveries (delivery_id, recipient, subject, status, attempts, last_error, sent_at)
+    VALUES ($1, $2, $3, $4, $5, $6, CASE WHEN $4 = 'sent' THEN LOCALTIMESTAMP END)
+    ON CONFLICT (delivery_id) DO UPDATE
+    SET status = EXCLUDED.status, attempts = EXCLUDED.attempts, last_error = EXCLUDED.last_error,
+        sent_at = EXCLUDED.sent_at, updated_at = LOCALTIMESTAMP
+""")
+
+# LLM report text cache (database/llm_report_cache.sql); the TTL parameters are seconds (0: no expiry)
+LLM_REPORT_CACHE_GET = register("llm_report_cache.get", """
+    UPDATE llm_report_cache SET hits = hits + 1, last_hit_at = LOCALTIMESTAMP
+    WHERE cache_key = $1 AND ($2::float8 <= 0 OR created_at > LOCALTIMESTAMP - make_interval(secs => $2::float8))
+    RETURNING report_text
+""")
+LLM_REPORT_CACHE_PUT = register("llm_report_cache.put", """
+    INSERT INTO llm_report_cache (cache_key, report_type, client_id, period, model, template_version, data_fingerprint, report_text)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    ON CONFLICT (cache_key) DO UPDATE
+    SET report_text = EXCLUDED.report_text, created_at = LOCALTIMESTAMP, hits = 0, last_hit_at = NULL
+""")
+LLM_REPORT_CACHE_PRUNE = register("llm_report_cache.prune", """
+    DELETE FROM llm_report_cache WHERE $1::float8 > 0 AND created_at <= LOCALTIMESTAMP - make_interval(secs => $1::float8)
+""")
+LLM_REPORT_CACHE_CLEAR = register("llm_report_cache.clear", """
+    DELETE FROM llm_report_cache
+""")
+LLM_REPORT_CACHE_STATS = register("llm_report_cache.stats", """
+    SELECT count(*) AS entries, COALESCE(sum(hits), 0)::bigint AS hits FROM llm_report_cache
+""")
+
+
+@functools.lru_cache(maxsize=256)
+def _update_sql(table: str, fields: Tuple[str, ...], returning: str) -> str:
+    set_clause = ", ".join(f"{field} = ${idx}" for idx, field in enumerate(fields, start=1))
+    return f"UPDATE {table} SET {set_clause} WHERE id = ${len(fields) + 1} RETURNING {returning}"
+
+
+def build_update(table: str, fields: Dict[str, Any], row_id: int, returning: str, allowed: Iterable[str]) -> Tuple[str, List[Any]]:
+    """
+    Builds a canonical UPDATE ... WHERE id = $n RETURNING statement.
+
+    The SET clause is ordered by the sorted field names, so every call with the
+    same set of fields produces the same text and hits the statement cache.
+
+    Args:
+        table: Table to update.
+        fields: Column values to set.
+        row_id: ID of the row to update.
+        returning: Columns of the RETURNING clause.
+        allowed: Columns that may be updated (guards the interpolated names).
+    Returns:
+        Tuple with the SQL text and its positional arguments.
+    """
+    names = tuple(sorted(fields))
+    unknown = set(names) - set(allowed)
+    if unknown:
+        raise ValueError(f"Cannot update unknown columns of {table}: {', '.join(sorted(unknown))}")
+    values = [fields[name] for name in names]
+    values.append(row_id)
+    return _update_sql(table, names, returning), values
+
+
+async def prepare_statements(conn: asyncpg.Connection) -> int:
+    """
+    Prepares every registered statement on a new connection (pool ``init`` hook).
+
+    Statements are put in the connection's own statement cache, which is what
+    conn.fetch()/fetchrow()/execute() look up by query text. A statement that
+    cannot be prepared (e.g. its table does not exist yet) is skipped.
+
+    Args:
+        conn: Freshly opened connection.
+    Returns:
+        Number of statements prepared.
+    """
+    if DB_STATEMENT_CACHE_SIZE <= 0:
+        return 0
+    if len(_REGISTRY) > DB_STATEMENT_CACHE_SIZE:
+        logger.warning(
+            f"{len(_REGISTRY)} registered statements exceed DB_STATEMENT_CACHE_SIZE={DB_STATEMENT_CACHE_SIZE}; "
+            "some will be evicted from the statement cache"
+        )
+    # Connection.prepare() bypasses the statement cache; _prepare(use_cache=True) is the
+    # call asyncpg itself uses for conn.fetch() and friends, so prefer it when available.
+    prepare = getattr(conn, "_prepare", None)
+    prepared = 0
+    for name, sql in _REGISTRY.items():
+        try:
+            if conn.is_in_transaction():
+                # A failed prepare would abort the caller's transaction: isolate it in a savepoint
+                async with conn.transaction():
+                    await _prepare_one(conn, prepare, sql)
+            else:
+                await _prepare_one(conn, prepare, sql)
+            prepared += 1
+        except asyncpg.PostgresError as e:
+            logger.warning(f"Could not prepare statement '{name}': {e}")
+    return prepared
+
+
+async def _prepare_one(conn: asyncpg.Connection, prepare, sql: str) -> None:
+    if prepare is not None:
+        await prepare(sql, use_cache=True)
+    else:
+        await conn.prepare(sql)
@@ -0,0 +1,400 @@
+"""
+Tag-invalidated cache of service read results.
+
+Agents repeat the same reads many times within a conversation (list the
+clients, get a client, list its invoices). QueryCache keeps the results of the
+read services decorated with cached() in a bounded LRU, so a repeated call is
+answered without a pooled connection or a round trip.
+
+- Every entry is tagged with the tables its query reads. The write services
+  decorated with invalidates() drop the entries of the tables they write once
+  they return, i.e. after their transaction committed.
+- Writes made elsewhere (other processes, psql, migrations) reach the cache
+  through LISTEN: the statement triggers of database/notify_changes.sql send the
+  changed table on QUERY_CACHE_CHANNEL when the writing transaction commits.
+  While the listening connection is down the cache is bypassed, and it is
+  emptied when the connection is back, since notifications may have been missed.
+- Concurrent misses of the same call share one query (single flight).
+- A read that started before an invalidation of one of its tags does not store
+  its result, which may predate the write. With read replicas, neither does a
+  read started less than replica_lag seconds (DB_REPLICA_MAX_LAG) after one: it
+  may have gone to a replica that has not replayed the write yet.
+- Lists of more than max_rows rows (e.g. every invoice, limit=None) are returned
+  but not stored, so one unbounded read cannot hold a whole table in memory.
+
+Calls given an explicit connection (conn=...) are never cached: the caller's
+transaction may see uncommitted rows. Empty results (None, [], {}) and error
+dictionaries ({"success": False, ...}) are not cached either, since the read
+services return them on a database error.
+"""
+
+import asyncio
+import functools
+import inspect
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from backend.core.config import (
+    QUERY_CACHE, QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_MAX_ROWS, QUERY_CACHE_TTL, QUERY_CACHE_CHANNEL,
+    QUERY_CACHE_LISTEN_CHECK_INTERVAL, DB_REPLICA_URLS, DB_REPLICA_MAX_LAG
+)
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# How a call to a cached function was answered
+RESULTS = ("hit", "miss", "coalesced", "bypass")
+
+
+class _Entry:
+    __slots__ = ("value", "tags", "expires_at")
+
+    def __init__(self, value: Any, tags: Tuple[str, ...], expires_at: Optional[float]):
+        self.value = value
+        self.tags = tags
+        self.expires_at = expires_at
+
+
+def _cacheable(value: Any) -> bool:
+    """
+    Whether a result may be stored: not empty and not an error dictionary.
+    """
+    return bool(value) and not (isinstance(value, dict) and value.get("success") is False)
+
+
+def _copy(value: Any) -> Any:
+    """
+    Copies a result one level deep, so callers may modify the rows they receive
+    without altering the cached ones.
+    """
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+class QueryCache:
+    """
+    Bounded LRU of service read results, invalidated by table tags.
+
+    Args:
+        enabled: Serve and store results (the decorators are always applied).
+        max_entries: Results kept; the least recently used are evicted.
+        ttl: Seconds a result is kept at most (0 keeps it until invalidated).
+        channel: NOTIFY channel on which the changed tables are announced.
+        max_rows: Longest list result stored (0: no limit).
+        replica_lag: Seconds after an invalidation during which reads of the table are
+            not stored, since a replica may not have replayed the write (0 without replicas).
+    """
+    def __init__(self, enabled: bool = QUERY_CACHE, max_entries: int = QUERY_CACHE_MAX_ENTRIES,
+                 ttl: float = QUERY_CACHE_TTL, channel: str = QUERY_CACHE_CHANNEL,
+                 max_rows: int = QUERY_CACHE_MAX_ROWS,
+                 replica_lag: float = DB_REPLICA_MAX_LAG if DB_REPLICA_URLS else 0):
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.channel = channel
+        self.max_rows = max_rows
+        self.replica_lag = replica_lag
+        self.listening = False
+        self.counts: Dict[str, Dict[str, int]] = {}
+        self.invalidations: Dict[str, int] = {}
+        self.evictions = 0
+        self.expirations = 0
+        # Results returned but not stored: too many rows, or read too soon after an invalidation
+        self.oversized = 0
+        self.unsettled = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._by_tag: Dict[str, Set[Hashable]] = {}
+        self._generations: Dict[str, int] = {}
+        self._invalidated_at: Dict[str, float] = {}
+        self._epoch = 0
+        self._inflight: Dict[Hashable, Tuple[asyncio.Task, Tuple[str, ...]]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        """
+        Whether results are served from the cache: it is enabled and, once a
+        listener was started, the listening connection is up.
+        """
+        return self.enabled and (self._listener_task is None or self.listening)
+
+    def cached(self, *tags: str) -> Callable:
+        """
+        Decorator caching the results of an async read function by its arguments.
+
+        Args:
+            tags: Tables read by the function.
+        Example:
+            @query_cache.cached("clients")
+            @with_db_connection(read_only=True)
+            async def get_client_by_id(client_id, conn=None): ...
+        """
+        def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+            signature = inspect.signature(func)
+            counts = self.counts.setdefault(name, dict.fromkeys(RESULTS, 0))
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self.active or kwargs.get("conn") is not None:
+                    counts["bypass"] += 1
+                    return await func(*args, **kwargs)
+                try:
+                    # Bind with the defaults so f(1) and f(client_id=1) share an entry
+                    bound = signature.bind(*args, **kwargs)
+                    bound.apply_defaults()
+                    key = (name,) + tuple(value for arg, value in bound.arguments.items() if arg != "conn")
+                    hash(key)
+                except TypeError:
+                    counts["bypass"] += 1
+                    return await func(*args, **kwargs)
+                return _copy(await self._get(key, tags, counts, functools.partial(func, *args, **kwargs)))
+            return wrapper
+        return decorator
+
+    def invalidates(self, *tags: str) -> Callable:
+        """
+        Decorator invalidating the given tables once an async write function returns
+        (or fails: a partial write may have been committed).
+
+        Args:
+            tags: Tables written by the function.
+        """
+        def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.invalidate(*tags)
+            return wrapper
+        return decorator
+
+    async def _get(self, key: Hashable, tags: Tuple[str, ...], counts: Dict[str, int],
+                   load: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at is None or entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                counts["hit"] += 1
+                return entry.value
+            self._remove(key)
+            self.expirations += 1
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Tasks belong to one loop: start clean when running in a new one
+            self._loop = loop
+            self._inflight = {}
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            counts["coalesced"] += 1
+            task = inflight[0]
+        else:
+            counts["miss"] += 1
+            # Versions taken before the load is scheduled: a write committed after
+            # this point invalidates the result
+            task = loop.create_task(self._load(key, tags, load, self._versions(tags), self._settled(tags)))
+            self._inflight[key] = (task, tags)
+        # Shield the shared load so one cancelled caller does not cancel the others
+        return await asyncio.shield(task)
+
+    def _versions(self, tags: Tuple[str, ...]) -> Tuple[int, ...]:
+        return (self._epoch,) + tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def _settled(self, tags: Tuple[str, ...]) -> bool:
+        """
+        Whether every replica has had time to replay the last invalidation of the tags.
+        """
+        if self.replica_lag <= 0:
+            return True
+        now = time.monotonic()
+        return all(now - self._invalidated_at.get(tag, -self.replica_lag) >= self.replica_lag for tag in tags)
+
+    async def _load(self, key: Hashable, tags: Tuple[str, ...], load: Callable[[], Awaitable[Any]],
+                    versions: Tuple[int, ...], settled: bool) -> Any:
+        try:
+            value = await load()
+        finally:
+            inflight = self._inflight.get(key)
+            if inflight is not None and inflight[0] is asyncio.current_task():
+                del self._inflight[key]
+        if not _cacheable(value) or not self.active or self._versions(tags) != versions:
+            return value
+        if not settled:
+            self.unsettled += 1
+        elif self.max_rows > 0 and isinstance(value, list) and len(value) > self.max_rows:
+            self.oversized += 1
+        else:
+            self._store(key, tags, value)
+        return value
+
+    def _store(self, key: Hashable, tags: Tuple[str, ...], value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        self._entries[key] = _Entry(value, tags, expires_at)
+        self._entries.move_to_end(key)
+        for tag in tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for tag in entry.tags:
+                keys = self._by_tag.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+
+    def invalidate(self, *tags: str) -> None:
+        """
+        Drops the cached results of the given tables. Loads in flight that read
+        them will not be stored, and later calls do not join them.
+        """
+        now = time.monotonic()
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._invalidated_at[tag] = now
+            self.invalidations[tag] = self.invalidations.get(tag, 0) + 1
+            for key in list(self._by_tag.pop(tag, ())):
+                self._remove(key)
+        changed = set(tags)
+        self._inflight = {
+            key: inflight for key, inflight in self._inflight.items() if changed.isdisjoint(inflight[1])
+        }
+
+    def clear(self) -> None:
+        """
+        Drops every cached result.
+        """
+        self._epoch += 1
+        self._entries.clear()
+        self._by_tag.clear()
+        self._inflight = {}
+
+    def _on_notification(self, conn, pid: int, channel: str, payload: str) -> None:
+        logger.debug(f"Table '{payload}' changed (backend {pid}), invalidating its cached results")
+        self.invalidate(payload)
+
+    def _on_connection_lost(self, conn) -> None:
+        self.listening = False
+
+    def start_listener(self, connect: Callable[[], Awaitable[Any]],
+                       check_interval: float = QUERY_CACHE_LISTEN_CHECK_INTERVAL) -> None:
+        """
+        Starts listening for table changes on a dedicated connection.
+
+        Args:
+            connect: Opens a connection to the primary outside the pool
+                (notifications are neither sent by replicas nor kept by pooled connections).
+            check_interval: Seconds between liveness checks and reconnection attempts.
+        """
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen(connect, check_interval))
+
+    async def _listen(self, connect: Callable[[], Awaitable[Any]], check_interval: float) -> None:
+        while True:
+            conn = None
+            try:
+                conn = await connect()
+                conn.add_termination_listener(self._on_connection_lost)
+                await conn.add_listener(self.channel, self._on_notification)
+                # Notifications sent while nobody was listening are lost
+                self.clear()
+                self.listening = True
+                logger.info(f"Query cache listening for table changes on channel '{self.channel}'")
+                while self.listening:
+                    await asyncio.sleep(check_interval)
+                    await conn.fetchval("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Query cache listener unavailable, bypassing the cache until it reconnects: {e}")
+            finally:
+                self.listening = False
+                if conn is not None:
+                    conn.terminate()
+            await asyncio.sleep(check_interval)
+
+    async def close(self) -> None:
+        """
+        Stops the listener.
+        """
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Reports the cache size and its hits and misses, in total and per function.
+        """
+        totals = {result: sum(counts[result] for counts in self.counts.values()) for result in RESULTS}
+        lookups = totals["hit"] + totals["miss"] + totals["coalesced"]
+        return {
+            "enabled": self.enabled,
+            "active": self.active,
+            "listening": self.listening,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            **totals,
+            "hit_ratio": round((totals["hit"] + totals["coalesced"]) / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "max_rows": self.max_rows,
+            "oversized": self.oversized,
+            "replica_lag_seconds": self.replica_lag,
+            "unsettled": self.unsettled,
+            "invalidations": dict(sorted(self.invalidations.items())),
+            "functions": {name: dict(counts) for name, counts in sorted(self.counts.items())},
+        }
+
+    def reset_stats(self) -> None:
+        """
+        Zeroes the counters (the cached results are kept).
+        """
+        for counts in self.counts.values():
+            counts.update(dict.fromkeys(RESULTS, 0))
+        self.invalidations.clear()
+        self.evictions = 0
+        self.expirations = 0
+        self.oversized = 0
+        self.unsettled = 0
+
+    def render_prometheus(self) -> str:
+        """
+        Renders the cache metrics in the Prometheus text exposition format.
+        """
+        lines: List[str] = [
+            "# HELP mcp_query_cache_requests_total Cached service reads by result (hit, miss, coalesced, bypass).",
+            "# TYPE mcp_query_cache_requests_total counter",
+        ]
+        for name, counts in sorted(self.counts.items()):
+            for result in RESULTS:
+                lines.append(f'mcp_query_cache_requests_total{{function="{name}",result="{result}"}} {counts[result]}')
+        lines += [
+            "# HELP mcp_query_cache_entries Results currently cached.",
+            "# TYPE mcp_query_cache_entries gauge",
+            f"mcp_query_cache_entries {len(self._entries)}",
+            "# HELP mcp_query_cache_evictions_total Results evicted to respect the size bound.",
+            "# TYPE mcp_query_cache_evictions_total counter",
+            f"mcp_query_cache_evictions_total {self.evictions}",
+            "# HELP mcp_query_cache_invalidations_total Invalidations by table.",
+            "# TYPE mcp_query_cache_invalidations_total counter",
+        ]
+        for tag, count in sorted(self.invalidations.items()):
+            lines.append(f'mcp_query_cache_invalidations_total{{table="{tag}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+# Singleton instance shared by the services, the server lifecycle and the metrics endpoint
+query_cache = QueryCache()
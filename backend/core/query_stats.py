@@ -0,0 +1,131 @@
+"""
+Per-statement and per-caller query statistics.
+
+QueryStats is a query observer (see backend.core.instrumentation): for every
+(normalized statement, calling function) pair it keeps a latency histogram, the
+rows returned or affected and the number of errors. It is registered on the
+Database when DB_QUERY_STATS is set, or at runtime through the query_stats admin
+tool; while it is not registered connections are not instrumented at all.
+"""
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+from backend.core.config import DB_QUERY_STATS_MAX_ENTRIES
+from backend.core.histogram import Histogram
+from backend.core.instrumentation import QueryEvent
+from backend.core.queries import registered_queries
+
+# Key used for the statements recorded once max_entries distinct pairs are tracked
+OVERFLOW_KEY = ("(other statements)", "(other callers)")
+
+ORDER_BY_FIELDS = ("total_ms", "calls", "errors", "rows", "p99", "max")
+
+
+class QueryEntry:
+    """
+    Aggregated measurements of one statement run by one caller.
+    """
+    __slots__ = ("latency", "rows", "errors")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = 0
+        self.errors = 0
+
+    def merge(self, other: "QueryEntry") -> None:
+        self.latency.merge(other.latency)
+        self.rows += other.rows
+        self.errors += other.errors
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.latency.count,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.latency.sum * 1000, 3),
+            "latency_ms": self.latency.summary(),
+        }
+
+
+def _sort_key(order_by: str):
+    if order_by in ("p99", "max"):
+        return lambda item: item["latency_ms"][order_by]
+    return lambda item: item[order_by]
+
+
+class QueryStats:
+    """
+    Collects QueryEvents by normalized statement and calling function.
+
+    Args:
+        max_entries: Maximum distinct (statement, caller) pairs tracked; further
+            pairs are aggregated under OVERFLOW_KEY.
+    """
+    def __init__(self, max_entries: int = DB_QUERY_STATS_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._entries: Dict[Tuple[str, str], QueryEntry] = {}
+        self.since = time.time()
+
+    def __call__(self, event: QueryEvent) -> None:
+        key = (event.statement, event.caller)
+        entry = self._entries.get(key)
+        if entry is None:
+            if len(self._entries) >= self.max_entries:
+                key = OVERFLOW_KEY
+                entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = QueryEntry()
+        entry.latency.observe(event.duration)
+        if event.error is not None:
+            entry.errors += 1
+        elif event.rows:
+            entry.rows += event.rows
+
+    def reset(self) -> None:
+        """
+        Discards every measurement.
+        """
+        self._entries = {}
+        self.since = time.time()
+
+    def snapshot(self, top: int = 20, order_by: str = "total_ms") -> dict:
+        """
+        Reports the measurements by statement and caller, and aggregated by caller.
+
+        Args:
+            top: Maximum entries returned in each list.
+            order_by: One of ORDER_BY_FIELDS, sorted descending.
+        Returns:
+            Dictionary with the 'statements' and 'callers' lists.
+        """
+        if order_by not in ORDER_BY_FIELDS:
+            raise ValueError(f"order_by must be one of: {', '.join(ORDER_BY_FIELDS)}")
+        names = {sql: name for name, sql in registered_queries().items()}
+        by_caller: Dict[str, QueryEntry] = {}
+        statements: List[dict] = []
+        for (statement, caller), entry in self._entries.items():
+            item = {"statement": statement, "name": names.get(statement), "caller": caller}
+            item.update(entry.to_dict())
+            statements.append(item)
+            by_caller.setdefault(caller, QueryEntry()).merge(entry)
+        callers = [dict(caller=caller, **entry.to_dict()) for caller, entry in by_caller.items()]
+        key = _sort_key(order_by)
+        statements.sort(key=key, reverse=True)
+        callers.sort(key=key, reverse=True)
+        return {
+            "since": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.since)),
+            "tracked": len(self._entries),
+            "statements": statements[:top],
+            "callers": callers[:top],
+        }
+
+    def entry(self, statement: str, caller: str) -> Optional[QueryEntry]:
+        """
+        Returns the measurements of one statement and caller, if any.
+        """
+        return self._entries.get((statement, caller))
+
+
+# Singleton instance registered on the Database when query statistics are enabled
+query_stats = QueryStats()
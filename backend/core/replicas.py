@@ -0,0 +1,120 @@
+"""
+Read-replica pools and replication lag tracking.
+
+Each replica DSN gets its own asyncpg pool. A background task in the Database
+class measures the replay lag of every replica; read-only calls are routed round
+robin to the replicas whose lag is under DB_REPLICA_MAX_LAG and fall back to the
+primary when none qualifies.
+"""
+
+import itertools
+from typing import List, Optional
+from urllib.parse import urlsplit
+
+import asyncpg
+
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Seconds of replay lag of a standby. A standby that is streaming from the primary
+# and has replayed everything it received reports 0, so an idle primary does not make
+# it look stale. Without a streaming WAL receiver (disconnected, or a role without
+# pg_read_all_stats, which cannot see its status) the lag is the age of the last
+# replayed transaction, and unknown (NULL: unusable) if nothing was replayed yet.
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+             AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+def redact_dsn(dsn: str) -> str:
+    """
+    Returns the host, port and database of a DSN without its credentials.
+    """
+    parts = urlsplit(dsn)
+    host = parts.hostname or "localhost"
+    port = f":{parts.port}" if parts.port else ""
+    return f"{host}{port}{parts.path}"
+
+
+class Replica:
+    """
+    A read replica: its pool and the last measured replication lag.
+    """
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.name = redact_dsn(dsn)
+        self.pool: Optional[asyncpg.Pool] = None
+        self.lag: Optional[float] = None  # None until the first successful check
+        self.last_error: Optional[str] = None
+
+    def is_usable(self, max_lag: float) -> bool:
+        """
+        Whether read-only traffic may be sent to this replica.
+        """
+        return self.pool is not None and self.lag is not None and self.lag <= max_lag
+
+    async def check_lag(self) -> Optional[float]:
+        """
+        Measures the replication lag. On error the replica is marked unusable.
+
+        Returns:
+            Lag in seconds, or None if it could not be measured.
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                lag = await conn.fetchval(REPLICA_LAG_QUERY)
+            if lag is None:
+                raise RuntimeError("replication lag unknown: no WAL receiver and no transaction replayed yet")
+            self.lag = float(lag)
+            self.last_error = None
+        except Exception as e:
+            if self.last_error is None:
+                logger.warning(f"Replica {self.name} is unavailable, reads fall back to the primary: {e}")
+            self.lag = None
+            self.last_error = str(e)
+        return self.lag
+
+    def stats(self) -> dict:
+        """
+        Reports the state of the replica for pool_stats.
+        """
+        size = self.pool.get_size() if self.pool else 0
+        idle = self.pool.get_idle_size() if self.pool else 0
+        return {
+            "name": self.name,
+            "lag_seconds": self.lag,
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "error": self.last_error,
+        }
+
+
+class ReplicaSet:
+    """
+    Round-robin selection among the replicas that are within the lag threshold.
+    """
+    def __init__(self, replicas: List[Replica], max_lag: float):
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self._next = itertools.count()
+        self.fallbacks = 0
+
+    def choose(self) -> Optional[Replica]:
+        """
+        Picks the replica for the next read-only call.
+
+        Returns:
+            A usable replica, or None if reads must go to the primary.
+        """
+        usable = [r for r in self.replicas if r.is_usable(self.max_lag)]
+        if not usable:
+            self.fallbacks += 1
+            return None
+        return usable[next(self._next) % len(usable)]
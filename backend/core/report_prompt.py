@@ -0,0 +1,197 @@
+"""
+Report prompt construction with a token budget.
+
+The prompt starts with a fixed prefix (the system prompt and the report
+instructions, identical for every report) so the provider's prompt caching can
+reuse it; the requested report and its billing data come after it.
+
+The billing data is one line per invoice while those lines fit in
+REPORT_PROMPT_TOKEN_BUDGET. Beyond that (typically global reports) the invoices
+are replaced by a digest whose size does not depend on their number: totals by
+status, aging of the pending amounts, days sales outstanding, a monthly series,
+the largest and the most overdue invoices and the clients with the highest
+amounts, computed on an InvoiceFrame (backend.core.invoice_frame).
+"""
+
+import hashlib
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.core.config import REPORT_PROMPT_TOKEN_BUDGET, REPORT_PROMPT_TOP_N
+
+REPORT_SYSTEM_PROMPT = (
+    "You are an expert assistant in business billing analysis with experience in accounting, finance, and business report writing. "
+    "Your main task is to generate clear, concise, and visually professional reports for company managers, using billing data obtained from a database connected to an MCP system. "
+    "Always validate that the recipient is authorized and adapt the report to the requested type (general, executive, delinquency, etc.)."
+)
+
+# Static part of the user prompt: keep anything that varies per report out of it
+REPORT_INSTRUCTIONS = """You are a professional financial analyst preparing a billing report.
+
+The report must be in professional HTML format, with clear tables and sections. Do not include suggestions for developers or meta comments; the report must be ready to be sent directly to the manager.
+
+Structure the report in the following sections:
+1. Executive summary (maximum 5 lines)
+2. Billing analysis (totals, pending, collections, unpaid)
+3. Detected patterns or trends
+4. Recommendations for the manager
+
+The billing data is either one line per invoice or, for large sets, a digest with the totals, aging, monthly series and notable invoices computed from all of them; base every figure on the data given.
+
+Be clear, professional, and concise. The report must be ready to be sent to a verified manager listed in the managers table."""
+
+# Bump when build_report_prompt or the billing data format changes: it is part of
+# template_version(), so cached report texts of the previous prompt stop matching
+REPORT_TEMPLATE_REVISION = 1
+
+# Months listed one by one in the digest; earlier ones are summarized by year
+DIGEST_MONTHS = 24
+
+
+def template_version() -> str:
+    """
+    Short hash identifying the prompt template: the fixed prefix, the revision and the
+    settings that change how the billing data is rendered.
+    """
+    parts = (REPORT_SYSTEM_PROMPT, REPORT_INSTRUCTIONS, REPORT_TEMPLATE_REVISION,
+             REPORT_PROMPT_TOKEN_BUDGET, REPORT_PROMPT_TOP_N, DIGEST_MONTHS)
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()[:16]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximates the tokens of a text (about 4 characters per token for English and numbers).
+    """
+    return (len(text) + 3) // 4
+
+
+def invoice_line(invoice: Dict[str, Any]) -> str:
+    return f"ID: {invoice['id']}, Amount: {invoice['amount']}, Status: {invoice['status']}, Date: {invoice['issued_at']}"
+
+
+def invoice_lines_within(invoices: Iterable[Dict[str, Any]], max_tokens: int) -> Optional[List[str]]:
+    """
+    Returns the invoice lines if together they fit in max_tokens, otherwise None.
+    Stops at the first line over the budget, so large sets are not rendered in full.
+    """
+    lines = []
+    used = 0
+    for invoice in invoices:
+        line = invoice_line(invoice)
+        used += estimate_tokens(line) + 1
+        if used > max_tokens:
+            return None
+        lines.append(line)
+    return lines
+
+
+def invoice_digest(invoices: List[Dict[str, Any]], today: Optional[date] = None,
+                   top_n: int = REPORT_PROMPT_TOP_N, frame=None) -> str:
+    """
+    Summarizes invoices in a text whose size does not depend on their number.
+    The aggregates are computed on an InvoiceFrame (vectorized).
+
+    Args:
+        invoices: Invoice dictionaries (id, client_id, amount, status, issued_at, due_date).
+        today: Reference date of the aging buckets (defaults to the current date).
+        top_n: Invoices and clients listed in each ranking.
+        frame: The invoices as an InvoiceFrame when already built (e.g. from the
+            database rows); otherwise it is built from the dictionaries.
+    Returns:
+        The digest, one fact per line.
+    """
+    import numpy as np
+    from backend.core.invoice_frame import InvoiceFrame, cents_to_str
+    today = today or date.today()
+    if frame is None:
+        frame = InvoiceFrame.from_dicts(invoices)
+    first, last = frame.issued_range()
+
+    lines = [
+        f"Invoices: {len(frame)}, total amount {cents_to_str(frame.total_cents())}"
+        + (f", issued from {first} to {last}" if first else "")
+        + ". The individual invoices are summarized below.",
+        "By status: " + "; ".join(
+            f"{status}: {count} invoices, {cents_to_str(cents)}"
+            for status, (count, cents) in sorted(frame.status_totals().items(), key=lambda item: str(item[0]))
+        ),
+        f"Pending amounts by age as of {today}: " + "; ".join(
+            f"{label}: {count} invoices, {cents_to_str(cents)}" for label, count, cents in frame.aging(today)
+        ),
+    ]
+    dso = frame.dso(today)
+    if dso is not None:
+        lines.append(f"Days sales outstanding (last 90 days): {dso:.1f}")
+
+    monthly = frame.monthly()
+    earlier = len(monthly["month"]) - DIGEST_MONTHS
+    if earlier > 0:
+        years = monthly["month"][:earlier].astype("datetime64[Y]")
+        lines.append("Yearly totals before the monthly series: " + "; ".join(
+            f"{year}: {int(monthly['count'][:earlier][years == year].sum())} invoices, "
+            f"{cents_to_str(monthly['cents'][:earlier][years == year].sum())}"
+            for year in dict.fromkeys(years)
+        ))
+    if len(monthly["month"]):
+        lines.append("Monthly series (month: invoices, total, paid, pending):")
+        lines.extend(
+            f"{monthly['month'][m]}: {monthly['count'][m]}, {cents_to_str(monthly['cents'][m])}, "
+            f"{cents_to_str(monthly['paid_cents'][m])}, {cents_to_str(monthly['pending_cents'][m])}"
+            for m in range(max(earlier, 0), len(monthly["month"]))
+        )
+
+    largest = frame.largest(top_n)
+    lines.append(f"Largest {len(largest)} invoices:")
+    lines.extend(f"{invoice_line(invoice)}, Client: {invoice['client_id']}" for invoice in map(frame.invoice, largest))
+    overdue, days, overdue_count = frame.most_overdue(today, top_n)
+    if overdue_count:
+        lines.append(f"Most overdue pending invoices ({len(overdue)} of {overdue_count}):")
+        lines.extend(
+            f"{invoice_line(invoice)}, Client: {invoice['client_id']}, {d} days overdue"
+            for invoice, d in zip(map(frame.invoice, overdue), days)
+        )
+    clients = frame.client_rollup()
+    if len(clients["client_id"]) > 1:
+        top = np.argsort(-clients["cents"], kind="stable")[:top_n]
+        lines.append(f"Top {len(top)} of {len(clients['client_id'])} clients by amount (client: invoices, total, pending):")
+        lines.extend(
+            f"Client {clients['client_id'][c] if clients['client_id'][c] >= 0 else None}: {clients['count'][c]}, "
+            f"{cents_to_str(clients['cents'][c])}, {cents_to_str(clients['pending_cents'][c])}"
+            for c in top
+        )
+    return "\n".join(lines)
+
+
+def billing_data(invoices: List[Dict[str, Any]], max_tokens: int = REPORT_PROMPT_TOKEN_BUDGET,
+                 today: Optional[date] = None, frame=None) -> Tuple[str, bool]:
+    """
+    Renders the billing data of a report within the token budget.
+
+    Args:
+        invoices: Invoices of the report.
+        max_tokens: Budget for the invoice lines; over it the digest is used (0: always lines).
+        today: Reference date of the digest's aging buckets.
+        frame: The invoices as an InvoiceFrame, if already built (see invoice_digest).
+    Returns:
+        Tuple with the text and whether it is the digest.
+    """
+    lines = invoice_lines_within(invoices, max_tokens) if max_tokens > 0 else [invoice_line(i) for i in invoices]
+    if lines is not None:
+        return "\n".join(lines), False
+    return invoice_digest(invoices, today=today, frame=frame), True
+
+
+def needs_digest(invoices: List[Dict[str, Any]], max_tokens: int = REPORT_PROMPT_TOKEN_BUDGET) -> bool:
+    """
+    Whether billing_data summarizes these invoices in the digest instead of listing them.
+    """
+    return max_tokens > 0 and invoice_lines_within(invoices, max_tokens) is None
+
+
+def digest_date(invoices: List[Dict[str, Any]], max_tokens: int = REPORT_PROMPT_TOKEN_BUDGET) -> Optional[date]:
+    """
+    The reference date billing_data would render for these invoices: the current date
+    when they are summarized in the digest (aging, DSO and days overdue depend on it),
+    None when they are listed line by line.
+    """
+    return date.today() if needs_digest(invoices, max_tokens) else None
@@ -0,0 +1,183 @@
+"""
+Slow-query log with optional plan capture.
+
+SlowQueryLog is a query observer (see backend.core.instrumentation). Every
+statement slower than DB_SLOW_QUERY_MS is logged with its normalized text, the
+types of its parameters (never their values), its duration, row count and the
+calling function, and kept in a bounded history for the slow_queries admin tool.
+
+With DB_SLOW_QUERY_EXPLAIN set, the plan of the statement is captured in the
+background on a separate connection:
+
+- Pure reads are run again with EXPLAIN (ANALYZE, BUFFERS) inside a transaction
+  that is rolled back, under a statement and lock timeout. A pure read is a
+  SELECT / WITH / VALUES / TABLE statement that calls only known side-effect-free
+  functions (SAFE_FUNCTIONS), takes no row locks (FOR UPDATE / SHARE) and writes
+  nothing: a rollback does not undo nextval(), and re-running a function such as
+  rebuild_billing_summary() would take its locks again.
+- Other statements are only planned (plain EXPLAIN), so nothing runs twice.
+
+A statement is explained at most once per DB_SLOW_QUERY_EXPLAIN_INTERVAL seconds
+and only one plan is captured at a time, so a burst of slow queries does not add
+load to a database that is already struggling.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from backend.core.config import (
+    DB_SLOW_QUERY_MS, DB_SLOW_QUERY_EXPLAIN, DB_SLOW_QUERY_EXPLAIN_INTERVAL,
+    DB_SLOW_QUERY_EXPLAIN_TIMEOUT, DB_SLOW_QUERY_HISTORY
+)
+from backend.core.instrumentation import QueryEvent
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Statements that may be re-executed by EXPLAIN ANALYZE start with one of these (see is_pure_read)
+_ANALYZABLE = ("SELECT", "WITH", "VALUES", "TABLE")
+# Statements that are explained at all; any other statement (DDL, SET, ...) has no plan to capture
+_EXPLAINABLE = _ANALYZABLE + ("INSERT", "UPDATE", "DELETE")
+
+# Functions a statement may call and still be re-executed by EXPLAIN ANALYZE
+SAFE_FUNCTIONS = frozenset((
+    "count", "sum", "avg", "min", "max", "array_agg", "string_agg", "json_agg", "jsonb_agg", "bool_and", "bool_or",
+    "coalesce", "nullif", "greatest", "least", "lower", "upper", "trim", "length", "round", "abs", "floor", "ceil",
+    "date_trunc", "date_part", "extract", "make_interval", "make_date", "to_char", "age", "now", "cast",
+    "generate_series", "row_number", "rank", "dense_rank", "lag", "lead", "json_build_object", "jsonb_build_object",
+))
+# SQL keywords that may be followed by a parenthesis without being a function call
+_PAREN_KEYWORDS = frozenset((
+    "and", "or", "not", "in", "any", "all", "some", "exists", "values", "as", "from", "join", "on", "where",
+    "over", "filter", "within", "select", "using", "case", "when", "then", "else", "array", "row", "lateral",
+    "by", "is", "distinct", "between", "like", "ilike", "with",
+))
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_CASTS = re.compile(r"::\s*\w+(?:\s*\([\d\s,]*\))?")
+_CALLS = re.compile(r"\b([a-z_][\w.]*)\s*\(")
+_WRITES_OR_LOCKS = re.compile(r"\b(insert|update|delete|merge|into|lock|share|nextval|setval)\b")
+
+
+def is_pure_read(sql: str) -> bool:
+    """
+    Whether re-running a statement has no side effects: a read that calls only
+    SAFE_FUNCTIONS and neither writes, locks rows nor advances sequences.
+    """
+    text = _CASTS.sub("", _LITERALS.sub("''", sql)).lower()
+    if not text.lstrip("( ").upper().startswith(_ANALYZABLE):
+        return False
+    if _WRITES_OR_LOCKS.search(text):
+        return False
+    return all(name in SAFE_FUNCTIONS or name in _PAREN_KEYWORDS for name in _CALLS.findall(text))
+
+
+def param_types(args: tuple) -> List[str]:
+    """
+    Returns the Python type names of the parameters of a statement.
+    """
+    return [type(arg).__name__ for arg in args]
+
+
+class SlowQueryLog:
+    """
+    Logs the statements slower than a threshold and captures their plans.
+
+    Args:
+        threshold_ms: Duration above which a statement is logged (0 disables the log).
+        explain: Capture the plan of slow statements.
+        connect: Returns an async context manager yielding a raw (not instrumented)
+            connection, used to run EXPLAIN.
+        history: Slow statements kept for slow_queries().
+    """
+    def __init__(self, threshold_ms: float = DB_SLOW_QUERY_MS, explain: bool = DB_SLOW_QUERY_EXPLAIN,
+                 connect: Optional[Callable[[], Any]] = None, history: int = DB_SLOW_QUERY_HISTORY,
+                 explain_interval: float = DB_SLOW_QUERY_EXPLAIN_INTERVAL,
+                 explain_timeout: float = DB_SLOW_QUERY_EXPLAIN_TIMEOUT):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain and connect is not None
+        self.explain_interval = explain_interval
+        self.explain_timeout = explain_timeout
+        self._connect = connect
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=max(1, history))
+        self._explained_at: Dict[str, float] = {}
+        self._explain_task: Optional[asyncio.Task] = None
+        self.total = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def __call__(self, event: QueryEvent) -> None:
+        if event.duration < self.threshold:
+            return
+        self.total += 1
+        entry = {
+            "at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(event.started_at)),
+            "statement": event.statement,
+            "param_types": param_types(event.args),
+            "duration_ms": round(event.duration * 1000, 3),
+            "rows": event.rows,
+            "caller": event.caller,
+            "error": str(event.error) if event.error is not None else None,
+            "plan": None,
+        }
+        self._entries.append(entry)
+        logger.warning(
+            f"Slow query ({entry['duration_ms']} ms, {event.rows} rows) in {event.caller}: "
+            f"{event.statement} | param types: ({', '.join(entry['param_types'])})"
+        )
+        if self.explain and self._should_explain(event):
+            self._explain_task = asyncio.get_running_loop().create_task(self._capture_plan(event, entry))
+
+    def _should_explain(self, event: QueryEvent) -> bool:
+        if event.error is not None or event.method in ("executemany", "copy"):
+            return False
+        if self._explain_task is not None and not self._explain_task.done():
+            return False
+        if not event.statement.lstrip("( ").upper().startswith(_EXPLAINABLE):
+            return False
+        now = time.monotonic()
+        if now - self._explained_at.get(event.statement, float("-inf")) < self.explain_interval:
+            return False
+        self._explained_at[event.statement] = now
+        return True
+
+    async def _capture_plan(self, event: QueryEvent, entry: Dict[str, Any]) -> None:
+        """
+        Captures the plan of a slow statement on a separate connection.
+        """
+        analyze = is_pure_read(event.statement)
+        options = "ANALYZE, BUFFERS" if analyze else "COSTS"
+        timeout_ms = int(self.explain_timeout * 1000)
+        try:
+            async with self._connect() as conn:
+                transaction = conn.transaction()
+                await transaction.start()
+                try:
+                    await conn.execute(f"SET LOCAL statement_timeout = {timeout_ms}")
+                    await conn.execute(f"SET LOCAL lock_timeout = {timeout_ms}")
+                    rows = await conn.fetch(f"EXPLAIN ({options}) {event.sql}", *event.args)
+                finally:
+                    await transaction.rollback()
+        except Exception as e:
+            logger.warning(f"Could not capture the plan of a slow query from {event.caller}: {e}")
+            return
+        entry["plan"] = "\n".join(row[0] for row in rows)
+        logger.warning(f"Plan of slow query in {event.caller} ({event.statement}):\n{entry['plan']}")
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Returns the most recent slow statements, newest first.
+        """
+        return list(reversed(self._entries))[:limit]
+
+    def clear(self) -> None:
+        """
+        Forgets the recorded slow statements and the explain rate limit.
+        """
+        self._entries.clear()
+        self._explained_at.clear()
+        self.total = 0
@@ -0,0 +1,341 @@
+"""
+In-process replica of small, read-mostly tables (clients and managers).
+
+Report generation resolves the manager by name or email and the client by name,
+and every invoice tool checks that its client exists. ReferenceSnapshot keeps a
+copy of those tables in memory, with hash indexes on id, case-folded name and
+email, so these lookups are dictionary hits instead of round trips.
+
+- The row triggers of database/notify_changes.sql send every inserted, updated
+  or deleted row as JSON on REFERENCE_SNAPSHOT_CHANNEL when the writing
+  transaction commits (only the id if the row does not fit in a notification;
+  the row is then read back).
+- The snapshot LISTENs on a dedicated connection to the primary and loads the
+  tables on that connection afterwards, so no change is missed; notifications
+  received during the load are applied after it. After a reconnection the tables
+  are loaded again.
+- A table is only used while it is loaded and the listener is connected. The
+  services fall back to the database otherwise, and also on a miss: a row
+  committed a moment ago may not have been notified yet.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from backend.core import queries
+from backend.core.config import (
+    REFERENCE_SNAPSHOT, REFERENCE_SNAPSHOT_CHANNEL, REFERENCE_SNAPSHOT_MAX_ROWS,
+    REFERENCE_SNAPSHOT_CHECK_INTERVAL
+)
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+class TableSnapshot:
+    """
+    Rows of one table by id, with case-folded indexes on some text columns.
+
+    Args:
+        table: Table name (as sent in the notifications).
+        columns: Columns kept, in the order of the service queries.
+        indexed: Text columns indexed by their case-folded value.
+        converters: Functions turning JSON values of the notifications into
+            the Python types asyncpg returns (e.g. timestamps).
+        max_rows: Tables larger than this are not replicated.
+    """
+    def __init__(self, table: str, columns: str, indexed: Tuple[str, ...] = ("name", "email"),
+                 converters: Optional[Dict[str, Callable[[Any], Any]]] = None,
+                 max_rows: int = REFERENCE_SNAPSHOT_MAX_ROWS):
+        self.table = table
+        self.columns = columns
+        self.fields = tuple(column.strip() for column in columns.split(","))
+        self.indexed = indexed
+        self.converters = converters or {}
+        self.max_rows = max_rows
+        self.ready = False
+        self.changes = 0
+        self.loads = 0
+        self.rows: Dict[int, Dict[str, Any]] = {}
+        self._indexes: Dict[str, Dict[str, Set[int]]] = {column: {} for column in indexed}
+
+    def replace(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replaces the whole content of the snapshot and marks it ready.
+        """
+        self.rows = {}
+        self._indexes = {column: {} for column in self.indexed}
+        for row in rows:
+            self._add(dict(row))
+        self.loads += 1
+        self.ready = True
+
+    def _add(self, row: Dict[str, Any]) -> None:
+        self.rows[row["id"]] = row
+        for column, index in self._indexes.items():
+            if row.get(column) is not None:
+                index.setdefault(row[column].casefold(), set()).add(row["id"])
+
+    def _discard(self, row_id: int) -> None:
+        row = self.rows.pop(row_id, None)
+        if row is None:
+            return
+        for column, index in self._indexes.items():
+            if row.get(column) is None:
+                continue
+            key = row[column].casefold()
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(row_id)
+                if not ids:
+                    del index[key]
+
+    def upsert(self, row: Dict[str, Any], from_json: bool = True) -> None:
+        """
+        Inserts or replaces a row.
+
+        Args:
+            row: Row data, from a notification or read from the database.
+            from_json: The values come from a notification and are converted.
+        """
+        if from_json:
+            # Notifications carry every column of the table: keep those the services return
+            row = {field: row.get(field) for field in self.fields}
+            for column, convert in self.converters.items():
+                row[column] = convert(row[column])
+        self._discard(row["id"])
+        self._add(row)
+        self.changes += 1
+        if len(self.rows) > self.max_rows:
+            logger.warning(f"Table {self.table} grew over {self.max_rows} rows: no longer replicated")
+            self.clear()
+
+    def delete(self, row_id: int) -> None:
+        """
+        Removes a row deleted in the database.
+        """
+        self._discard(row_id)
+        self.changes += 1
+
+    def clear(self) -> None:
+        """
+        Empties the snapshot and marks it not ready (lookups go to the database).
+        """
+        self.ready = False
+        self.rows = {}
+        self._indexes = {column: {} for column in self.indexed}
+
+    def get(self, row_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the row with this id, or None.
+        """
+        row = self.rows.get(row_id)
+        return dict(row) if row is not None else None
+
+    def find(self, column: str, value: Optional[str], exact: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the row (lowest id first) whose column matches the value.
+
+        Args:
+            column: Indexed column ('name' or 'email').
+            value: Value searched for.
+            exact: Compare exactly (SQL '='); otherwise case-insensitively (SQL LOWER() = LOWER()).
+        """
+        if value is None:
+            return None
+        for row_id in sorted(self._indexes[column].get(value.casefold(), ())):
+            row = self.rows[row_id]
+            if (row[column] == value) if exact else (row[column].lower() == value.lower()):
+                return dict(row)
+        return None
+
+    def all(self) -> List[Dict[str, Any]]:
+        """
+        Returns copies of all rows ordered by id.
+        """
+        return [dict(self.rows[row_id]) for row_id in sorted(self.rows)]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "rows": len(self.rows), "loads": self.loads, "changes": self.changes}
+
+
+class ReferenceSnapshot:
+    """
+    Replicated clients and managers tables, kept current by a LISTEN connection.
+
+    Args:
+        enabled: Replicate the tables (the services check each table's ready flag).
+        channel: NOTIFY channel on which the row triggers send the changed rows.
+    """
+    def __init__(self, enabled: bool = REFERENCE_SNAPSHOT, channel: str = REFERENCE_SNAPSHOT_CHANNEL):
+        self.enabled = enabled
+        self.channel = channel
+        self.clients = TableSnapshot("clients", queries.CLIENT_COLUMNS, converters={"created_at": _timestamp})
+        self.managers = TableSnapshot("managers", queries.MANAGER_COLUMNS, converters={"created_at": _timestamp})
+        self.tables = {table.table: table for table in (self.clients, self.managers)}
+        self.connected = False
+        self._conn = None
+        self._conn_lock = asyncio.Lock()
+        self._pending: Optional[List[str]] = None
+        self._listener_task: Optional[asyncio.Task] = None
+        self._first_attempt: Optional[asyncio.Event] = None
+
+    def start(self, connect: Callable[[], Awaitable[Any]],
+              check_interval: float = REFERENCE_SNAPSHOT_CHECK_INTERVAL) -> None:
+        """
+        Starts listening for row changes and loads the tables.
+
+        Args:
+            connect: Opens a connection to the primary outside the pool.
+            check_interval: Seconds between liveness checks and reconnection attempts.
+        """
+        if self._listener_task is None:
+            self._first_attempt = asyncio.Event()
+            self._listener_task = asyncio.create_task(self._listen(connect, check_interval))
+
+    async def wait_loaded(self, timeout: float) -> bool:
+        """
+        Waits until the first connection and load attempt finished.
+
+        Returns:
+            True if the snapshot is connected (the tables that could be loaded are ready).
+        """
+        if self._first_attempt is None:
+            return False
+        try:
+            await asyncio.wait_for(self._first_attempt.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.connected
+
+    async def _listen(self, connect: Callable[[], Awaitable[Any]], check_interval: float) -> None:
+        while True:
+            try:
+                self._conn = await connect()
+                self._conn.add_termination_listener(self._on_connection_lost)
+                # Listen before loading: changes committed during the load are queued, then applied
+                self._pending = []
+                await self._conn.add_listener(self.channel, self._on_notification)
+                self.connected = True
+                for table in self.tables.values():
+                    await self._load(table)
+                pending, self._pending = self._pending, None
+                for payload in pending:
+                    self._apply(payload)
+                logger.info(
+                    "Reference snapshot loaded: "
+                    + ", ".join(f"{table.table}={len(table.rows)}" for table in self.tables.values() if table.ready)
+                )
+                self._first_attempt.set()
+                while self.connected:
+                    await asyncio.sleep(check_interval)
+                    async with self._conn_lock:
+                        await self._conn.fetchval("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reference snapshot listener unavailable, lookups use the database: {e}")
+                self._first_attempt.set()
+            finally:
+                self._on_connection_lost(self._conn)
+                if self._conn is not None:
+                    self._conn.terminate()
+                    self._conn = None
+            await asyncio.sleep(check_interval)
+
+    async def _load(self, table: TableSnapshot) -> None:
+        try:
+            async with self._conn_lock:
+                count = await self._conn.fetchval(f"SELECT count(*) FROM {table.table}")
+                if count > table.max_rows:
+                    logger.warning(f"Table {table.table} has {count} rows (over {table.max_rows}): not replicated")
+                    table.clear()
+                    return
+                rows = await self._conn.fetch(f"SELECT {table.columns} FROM {table.table}")
+        except Exception as e:
+            if not self.connected:
+                raise
+            logger.warning(f"Could not load table {table.table} into the reference snapshot: {e}")
+            table.clear()
+            return
+        table.replace(rows)
+
+    def _on_connection_lost(self, conn) -> None:
+        self.connected = False
+        for table in self.tables.values():
+            table.ready = False
+
+    def _on_notification(self, conn, pid: int, channel: str, payload: str) -> None:
+        if self._pending is not None:
+            self._pending.append(payload)
+        else:
+            self._apply(payload)
+
+    def _apply(self, payload: str) -> None:
+        """
+        Applies one change notification: {"table", "op", "row" | "id", "old_id"}.
+        """
+        try:
+            change = json.loads(payload)
+            table = self.tables.get(change["table"])
+            if table is None or not table.ready:
+                return
+            op = change["op"]
+            if op == "TRUNCATE":
+                table.replace([])
+            elif op == "DELETE":
+                table.delete(change["id"])
+            elif "row" in change:
+                if change.get("old_id") not in (None, change["row"]["id"]):
+                    table.delete(change["old_id"])
+                table.upsert(change["row"])
+            else:
+                # The row did not fit in the notification: read it back
+                asyncio.get_running_loop().create_task(self._refresh(table, change["id"]))
+        except Exception as e:
+            logger.error(f"Invalid reference snapshot notification {payload[:200]!r}: {e}")
+
+    async def _refresh(self, table: TableSnapshot, row_id: int) -> None:
+        try:
+            async with self._conn_lock:
+                row = await self._conn.fetchrow(f"SELECT {table.columns} FROM {table.table} WHERE id = $1", row_id)
+        except Exception as e:
+            logger.warning(f"Could not read back row {row_id} of {table.table}, dropping the table snapshot: {e}")
+            table.clear()
+            return
+        if row is not None:
+            table.upsert(dict(row), from_json=False)
+        else:
+            table.delete(row_id)
+
+    async def close(self) -> None:
+        """
+        Stops the listener; lookups go to the database afterwards.
+        """
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Reports whether the listener is connected and the state of each table.
+        """
+        return {
+            "enabled": self.enabled,
+            "connected": self.connected,
+            "tables": {name: table.stats() for name, table in self.tables.items()},
+        }
+
+
+# Singleton instance shared by the services and the server lifecycle
+reference_snapshot = ReferenceSnapshot()
@@ -0,0 +1,201 @@
+"""
+Per-tool call metrics in Prometheus text format.
+
+Every tool registered on the shared ``mcp`` instance is wrapped by
+ToolMetrics.instrument(), which records for each call its latency, the size of
+the response sent to the client and its outcome:
+
+- success: the tool returned normally
+- failure: the tool returned ``{"success": False, ...}``
+- exception: the tool raised
+
+Dictionary and model results are serialized by the wrapper itself, with the same
+JSON format FastMCP uses, so the response size is measured without serializing
+the result twice. render_prometheus() exposes the metrics for the /metrics route.
+"""
+
+import functools
+import inspect
+import time
+from typing import Any, Callable, Dict, List
+
+import pydantic_core
+from pydantic import BaseModel
+
+from backend.core.histogram import Histogram
+
+# Upper bounds of the response size histogram, in bytes (256 B to 4 MiB)
+RESPONSE_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+OUTCOMES = ("success", "failure", "exception")
+
+
+def _serialize(result: Any) -> str:
+    # Same output as FastMCP's default tool serializer
+    return pydantic_core.to_json(result, fallback=str, indent=2).decode()
+
+
+def _is_failure(result: Any) -> bool:
+    if isinstance(result, dict):
+        return result.get("success") is False
+    return getattr(result, "success", None) is False
+
+
+class ToolStats:
+    """
+    Call counters and histograms of one tool.
+    """
+    __slots__ = ("latency", "response_bytes", "outcomes")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.response_bytes = Histogram(RESPONSE_SIZE_BUCKETS)
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+
+    def to_dict(self) -> dict:
+        calls = self.latency.count
+        return {
+            "calls": calls,
+            **self.outcomes,
+            "failure_rate": round((self.outcomes["failure"] + self.outcomes["exception"]) / calls, 4) if calls else 0.0,
+            "latency_ms": self.latency.summary(),
+            "response_bytes": self.response_bytes.summary(scale=1, digits=0),
+        }
+
+
+class ToolMetrics:
+    """
+    Registry of the per-tool metrics.
+    """
+    def __init__(self):
+        self.tools: Dict[str, ToolStats] = {}
+
+    def _stats(self, name: str) -> ToolStats:
+        stats = self.tools.get(name)
+        if stats is None:
+            stats = self.tools[name] = ToolStats()
+        return stats
+
+    def record(self, name: str, duration: float, response_bytes: int, outcome: str) -> None:
+        """
+        Records one call of a tool.
+
+        Args:
+            name: Tool name.
+            duration: Seconds spent in the tool.
+            response_bytes: Size of the serialized response.
+            outcome: One of OUTCOMES.
+        """
+        stats = self._stats(name)
+        stats.latency.observe(duration)
+        stats.response_bytes.observe(response_bytes)
+        stats.outcomes[outcome] += 1
+
+    def instrument(self, fn: Callable, name: str) -> Callable:
+        """
+        Wraps a tool function so every call is recorded under the tool name.
+        The wrapper keeps the signature of the function (FastMCP builds the tool
+        schema from it).
+
+        Args:
+            fn: Tool function, sync or async.
+            name: Name the tool is registered under.
+        Returns:
+            The wrapped function.
+        """
+        self._stats(name)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await fn(*args, **kwargs)
+                except BaseException:
+                    self.record(name, time.perf_counter() - start, 0, "exception")
+                    raise
+                return self._finish(name, start, result)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException:
+                    self.record(name, time.perf_counter() - start, 0, "exception")
+                    raise
+                return self._finish(name, start, result)
+        return wrapper
+
+    def _finish(self, name: str, start: float, result: Any) -> Any:
+        """
+        Records a completed call and returns the response to hand to FastMCP
+        (dictionaries and models already serialized).
+        """
+        duration = time.perf_counter() - start
+        outcome = "failure" if _is_failure(result) else "success"
+        if isinstance(result, (dict, BaseModel)):
+            result = _serialize(result)
+            size = len(result.encode())
+        elif isinstance(result, str):
+            size = len(result.encode())
+        elif result is None:
+            size = 0
+        else:
+            size = len(pydantic_core.to_json(result, fallback=str))
+        self.record(name, duration, size, outcome)
+        return result
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        Returns the metrics of every tool as plain dictionaries.
+        """
+        return {name: stats.to_dict() for name, stats in sorted(self.tools.items())}
+
+    def reset(self) -> None:
+        """
+        Discards every measurement (registered tools are kept).
+        """
+        self.tools = {name: ToolStats() for name in self.tools}
+
+    def render_prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        lines: List[str] = [
+            "# HELP mcp_tool_calls_total Tool calls by outcome (success, failure = success false, exception).",
+            "# TYPE mcp_tool_calls_total counter",
+        ]
+        items = sorted(self.tools.items())
+        for name, stats in items:
+            for outcome in OUTCOMES:
+                lines.append(f'mcp_tool_calls_total{{tool="{name}",outcome="{outcome}"}} {stats.outcomes[outcome]}')
+        _render_histogram(
+            lines, "mcp_tool_duration_seconds", "Tool call latency in seconds.",
+            [(name, stats.latency) for name, stats in items]
+        )
+        _render_histogram(
+            lines, "mcp_tool_response_bytes", "Size of the serialized tool responses in bytes.",
+            [(name, stats.response_bytes) for name, stats in items]
+        )
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _render_histogram(lines: List[str], metric: str, help_text: str, histograms) -> None:
+    lines.append(f"# HELP {metric} {help_text}")
+    lines.append(f"# TYPE {metric} histogram")
+    for name, histogram in histograms:
+        cumulative = histogram.cumulative()
+        for bound, count in zip(histogram.buckets, cumulative):
+            lines.append(f'{metric}_bucket{{tool="{name}",le="{_format_bound(bound)}"}} {count}')
+        lines.append(f'{metric}_bucket{{tool="{name}",le="+Inf"}} {cumulative[-1]}')
+        lines.append(f'{metric}_sum{{tool="{name}"}} {histogram.sum!r}')
+        lines.append(f'{metric}_count{{tool="{name}"}} {histogram.count}')
+
+
+# Singleton instance used by the shared mcp instance and the /metrics route
+tool_metrics = ToolMetrics()
@@ -0,0 +1,421 @@
+"""
+Span-based tracing of tool calls.
+
+Every MCP tool call gets a root span (sampled with TRACE_SAMPLE_RATE). Inside a
+sampled call, child spans are recorded for the decorated services
+(with_db_connection / db_transaction), every SQL statement (through a query
+observer on the Database) and the functions marked with @traced (LLM call, chart
+rendering, HTML sanitization, email). The current span lives in a ContextVar, so
+spans nest across awaits and asyncio.to_thread() calls. Long-lived background tasks
+must be started with an empty context (create_task(..., context=contextvars.Context())),
+or they would keep the span of the call that started them; spans ending after their
+root are dropped.
+
+When a root span ends, its whole trace is handed to the exporter, which writes
+batches in the background either as JSON lines (TRACE_EXPORTER=jsonl) or to an
+OTLP/HTTP collector using the OTLP JSON encoding (TRACE_EXPORTER=otlp). Outside a
+sampled call, span() returns a shared no-op context and costs one ContextVar lookup.
+"""
+
+import abc
+import asyncio
+import functools
+import inspect
+import json
+import random
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.core.config import (
+    TRACE_EXPORTER, TRACE_SAMPLE_RATE, TRACE_JSONL_PATH, TRACE_OTLP_ENDPOINT,
+    TRACE_SERVICE_NAME, TRACE_EXPORT_INTERVAL
+)
+from backend.core.instrumentation import QueryEvent
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Span kinds, numbered as in OTLP
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    """
+    A timed operation within a trace.
+    """
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "error", "_trace", "_root")
+
+    def __init__(self, name: str, kind: int, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else _new_id(128)
+        self.span_id = _new_id(64)
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        # Finished spans of the trace, shared by every span in it
+        self._trace: List["Span"] = parent._trace if parent else []
+        self._root: "Span" = parent._root if parent else self
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Sets an attribute of the span.
+        """
+        self.attributes[key] = value
+
+    def set_error(self, error: Any) -> None:
+        """
+        Marks the span as failed.
+        """
+        self.error = str(error) or type(error).__name__
+
+    def finish(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = end_ns or time.time_ns()
+        # The trace was exported when its root ended: a span ending later (in a task
+        # started during the call) would never be written, only kept
+        if self._root is self or self._root.end_ns is None:
+            self._trace.append(self)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the span as a JSON-serializable dictionary (JSON-lines export).
+        """
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_unix_nano": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _SpanScope:
+    """
+    Context manager that makes a span current for its duration.
+    """
+    __slots__ = ("_span", "_token", "_root", "_tracer")
+
+    def __init__(self, tracer: "Tracer", span: Span, root: bool):
+        self._tracer = tracer
+        self._span = span
+        self._root = root
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc is not None and self._span.error is None:
+            self._span.set_error(exc)
+        self._span.finish()
+        if self._root:
+            self._tracer.export(self._span._trace)
+        return False
+
+
+class _NoSpan:
+    """
+    Shared no-op context used outside sampled traces.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def _attribute_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str) -> dict:
+    """
+    Encodes spans as an OTLP/HTTP JSON ExportTraceServiceRequest.
+    """
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": span.kind,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": [
+                        {"key": key, "value": _attribute_value(value)}
+                        for key, value in span.attributes.items() if value is not None
+                    ],
+                    "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+                } for span in spans],
+            }],
+        }]
+    }
+
+
+class BatchExporter(abc.ABC):
+    """
+    Buffers finished spans and writes them in batches from a background task.
+    Subclasses implement _write().
+    """
+    def __init__(self, interval: float = TRACE_EXPORT_INTERVAL, max_pending: int = 10000):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: List[Span] = []
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def export(self, spans: List[Span]) -> None:
+        """
+        Queues the spans of a finished trace.
+        """
+        if len(self._pending) + len(spans) > self.max_pending:
+            self.dropped += len(spans)
+            return
+        self._pending.extend(spans)
+        if self._task is None or self._task.done():
+            try:
+                self._task = asyncio.get_running_loop().create_task(self._flush_later())
+            except RuntimeError:
+                # No event loop (e.g. called from a worker thread): written by the next flush
+                pass
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.interval)
+        await self.flush()
+
+    async def flush(self):
+        """
+        Writes every pending span.
+        """
+        spans, self._pending = self._pending, []
+        if not spans:
+            return
+        try:
+            await self._write(spans)
+        except Exception as e:
+            logger.error(f"Could not export {len(spans)} spans: {e}")
+
+    @abc.abstractmethod
+    async def _write(self, spans: List[Span]):
+        """
+        Writes a batch of spans to the backend.
+        """
+
+    async def close(self):
+        """
+        Writes the pending spans and releases the exporter's resources.
+        """
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        await self.flush()
+
+
+class JsonLinesExporter(BatchExporter):
+    """
+    Appends one JSON object per span to a file.
+    """
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = Path(path)
+
+    def _append(self, lines: List[str]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    async def _write(self, spans: List[Span]):
+        lines = [json.dumps(span.to_dict(), default=str) for span in spans]
+        await asyncio.to_thread(self._append, lines)
+
+
+class OtlpHttpExporter(BatchExporter):
+    """
+    Sends spans to an OTLP/HTTP collector (JSON encoding), e.g. http://localhost:4318/v1/traces.
+    """
+    def __init__(self, endpoint: str, service_name: str, **kwargs):
+        super().__init__(**kwargs)
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._session = None
+
+    async def _write(self, spans: List[Span]):
+        import aiohttp
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        async with self._session.post(self.endpoint, json=to_otlp(spans, self.service_name)) as response:
+            if response.status >= 400:
+                raise RuntimeError(f"collector answered {response.status}: {await response.text()}")
+
+    async def close(self):
+        await super().close()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class Tracer:
+    """
+    Creates spans and hands finished traces to the exporter.
+
+    Args:
+        exporter: Destination of the finished traces; None disables tracing.
+        sample_rate: Fraction of tool calls traced (0 to 1).
+    """
+    def __init__(self, exporter: Optional[BatchExporter] = None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def root_span(self, name: str, **attributes):
+        """
+        Starts a new trace, subject to sampling.
+
+        Returns:
+            A context manager yielding the root span, or None if not sampled.
+        """
+        if self.exporter is None or random.random() >= self.sample_rate:
+            return _NO_SPAN
+        return _SpanScope(self, Span(name, KIND_SERVER, None, attributes), root=True)
+
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes):
+        """
+        Starts a child of the current span.
+
+        Returns:
+            A context manager yielding the span, or None outside a sampled trace.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return _NO_SPAN
+        return _SpanScope(self, Span(name, kind, parent, attributes), root=False)
+
+    def export(self, spans: List[Span]) -> None:
+        if self.exporter is not None:
+            self.exporter.export(spans)
+
+    def observe_query(self, event: QueryEvent) -> None:
+        """
+        Query observer: records a SQL span under the current span.
+        """
+        parent = _current_span.get()
+        if parent is None:
+            return
+        span = Span(f"SQL {event.method}", KIND_CLIENT, parent, {
+            "db.system": "postgresql",
+            "db.statement": event.statement,
+            "db.rows": event.rows,
+            "code.function": event.caller,
+        })
+        span.start_ns = int(event.started_at * 1e9)
+        if event.error is not None:
+            span.set_error(event.error)
+        span.finish(span.start_ns + int(event.duration * 1e9))
+
+    def instrument_tool(self, fn: Callable, name: str) -> Callable:
+        """
+        Wraps a tool function so every sampled call runs in a root span.
+        Responses with success False mark the span as failed.
+        """
+        if not self.enabled:
+            return fn
+
+        def close(span: Optional[Span], result: Any) -> Any:
+            if span is not None and isinstance(result, dict) and result.get("success") is False:
+                span.set_error(result.get("error") or result.get("message") or "success: false")
+            return result
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with self.root_span(f"tool {name}", **{"mcp.tool": name}) as span:
+                    return close(span, await fn(*args, **kwargs))
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.root_span(f"tool {name}", **{"mcp.tool": name}) as span:
+                    return close(span, fn(*args, **kwargs))
+        return wrapper
+
+    async def close(self):
+        """
+        Exports the pending spans (application shutdown).
+        """
+        if self.exporter is not None:
+            await self.exporter.close()
+
+
+def traced(name: str, kind: int = KIND_INTERNAL):
+    """
+    Decorator that records a span for every call made inside a sampled trace.
+
+    Example:
+        @traced("chart.render")
+        def render_chart(data):
+            ...
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with tracer.span(name, kind, **{"code.function": func.__qualname__}):
+                    return await func(*args, **kwargs)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with tracer.span(name, kind, **{"code.function": func.__qualname__}):
+                    return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _build_exporter() -> Optional[BatchExporter]:
+    if TRACE_EXPORTER == "jsonl":
+        return JsonLinesExporter(TRACE_JSONL_PATH)
+    if TRACE_EXPORTER == "otlp":
+        return OtlpHttpExporter(TRACE_OTLP_ENDPOINT, TRACE_SERVICE_NAME)
+    if TRACE_EXPORTER:
+        logger.warning(f"Unknown TRACE_EXPORTER '{TRACE_EXPORTER}' (expected 'jsonl' or 'otlp'); tracing disabled")
+    return None
+
+
+# Singleton tracer configured from the environment
+tracer = Tracer(_build_exporter(), TRACE_SAMPLE_RATE)
@@ -2,6 +2,9 @@
 # Definition of the central Master Control Program (MCP) instance
 
 from backend.core.logging import get_logger
+from backend.core.tool_metrics import tool_metrics
+from backend.core.tracing import tracer
+from backend.core.lifecycle import lifecycle
 
 logger = get_logger(__name__)
 
@@ -18,9 +21,23 @@ except ImportError:
         logger.critical("Make sure one of these packages is correctly installed in your environment")
         raise
 
+class InstrumentedFastMCP(FastMCP):
+    """
+    FastMCP server whose tools are wrapped to record per-tool metrics
+    (calls, latency, response size and success: False rate) in tool_metrics,
+    to run every sampled call in a root tracing span and to be counted (or
+    rejected while draining) by the server lifecycle.
+    """
+    def add_tool(self, fn, name=None, *args, **kwargs):
+        # @mcp.tool registers through add_tool; the decorated function itself is returned unwrapped
+        tool_name = name or getattr(fn, "__name__", None) or fn.__class__.__name__
+        guarded = lifecycle.guard_tool(fn, tool_name)
+        instrumented = tool_metrics.instrument(tracer.instrument_tool(guarded, tool_name), tool_name)
+        return super().add_tool(instrumented, name, *args, **kwargs)
+
 # Create a unique FastMCP instance for the entire application
 # This centralized instance allows registering all tools and handling client requests
-mcp = FastMCP(
+mcp = InstrumentedFastMCP(
     "AI-Client-Agent-MCP",  # Name of the MCP agent
     stateless_http=True,    # Configuration for stateless HTTP handling
 )
@@ -6,6 +6,9 @@ from decimal import Decimal
 # Pydantic models for invoice management
 # These models define the data structure and validation for invoice operations
 
+# Valid invoice statuses
+InvoiceStatus = Literal['pending', 'paid', 'canceled']
+
 class InvoiceBase(BaseModel):
     """
     Base model for invoices with common fields.
@@ -15,7 +18,7 @@ class InvoiceBase(BaseModel):
     amount: Optional[Decimal] = Field(None, max_digits=10, decimal_places=2)  # Invoice amount with 2 decimal places
     issued_at: Optional[date] = None  # Date when the invoice was issued
     due_date: Optional[date] = None  # Due date for payment
-    status: Optional[Literal['pending', 'paid', 'canceled']] = None  # Invoice status (restricted)
+    status: Optional[InvoiceStatus] = None  # Invoice status (restricted)
 
 class InvoiceCreate(InvoiceBase):
     """
@@ -43,7 +46,7 @@ class InvoiceOut(InvoiceBase):
     client_id: int  # Ensures client_id is always present in the output
     amount: Decimal = Field(..., max_digits=10, decimal_places=2)  # Ensures amount is always present
     issued_at: date  # Ensures issued_at is always present (has a default value in the DB)
-    status: Literal['pending', 'paid', 'canceled']  # Ensures status is always present and valid
+    status: InvoiceStatus  # Ensures status is always present and valid
 
     class Config:
         from_attributes = True  # pydantic v2 - allows creating the model from ORM attributes
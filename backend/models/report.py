@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
+from uuid import UUID
 
 class ReportOut(BaseModel):
     """
@@ -15,6 +16,11 @@ class ReportOut(BaseModel):
     report_type: str
     report_text: str
     created_at: datetime
+    delivery_id: Optional[UUID] = None
+    delivery_status: Optional[str] = None
+    delivery_attempts: Optional[int] = None
+    delivery_error: Optional[str] = None
+    delivered_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True 
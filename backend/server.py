@@ -1,12 +1,30 @@
 import sys
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
-from backend.core.config import SERVER_HOST, SERVER_PORT
+import uvicorn
+from backend.core.config import (
+    SERVER_HOST, SERVER_PORT, PAGE_SIZE_MAX,
+    WARMUP_TIMEOUT, WARMUP_RETRY_INTERVAL, WARMUP_PRELOAD, SHUTDOWN_DRAIN_TIMEOUT
+)
+from backend.core.database import database
+from backend.core.lifecycle import lifecycle
+from backend.core.llm_client import llm_client
 from backend.core.logging import get_logger
+from backend.core.query_cache import query_cache
+from backend.core.table_snapshot import reference_snapshot
 from backend.mcp_instance import mcp
+from backend.services.client_service import get_all_clients
+from backend.services.manager_service import list_managers
+from backend.services.report_writer import report_writer
+from backend.services.email_dispatcher import email_dispatcher
+from backend.core.tracing import tracer
 from backend.api.v1.tools import client_tools
 from backend.api.v1.tools import invoice_tools
 from backend.api.v1.tools import report_tools
+from backend.api.v1.tools import admin_tools
+from backend.api.v1 import metrics
+from backend.api.v1 import health
 
 # Main server file for AI Client Agent MCP
 # Configures and starts the FastMCP server with all registered tools
@@ -36,18 +54,97 @@ except IOError as e:
 HOST = SERVER_HOST
 PORT = SERVER_PORT
 
+async def warm_up_database():
+    """
+    Opens the primary (and replica) pools: asyncpg opens DB_POOL_MIN_SIZE connections
+    up front and the pool's init hook prepares the hot statements on each of them.
+    """
+    await database.connect()
+
+async def preload_reference_data():
+    """
+    Reads the small reference tables once, so their pages and plans are warm
+    before the first tool call.
+    """
+    await list_managers()
+    await get_all_clients(limit=PAGE_SIZE_MAX)
+
+async def listen_for_table_changes():
+    """
+    Starts the query cache listener, which invalidates the cached results of the
+    tables changed by other writers.
+    """
+    query_cache.start_listener(database.dedicated_connection)
+
+async def load_reference_snapshot():
+    """
+    Loads the in-memory replica of the clients and managers tables. If it cannot be
+    loaded the server still starts: lookups use the database until it reconnects.
+    """
+    reference_snapshot.start(database.dedicated_connection)
+    if not await reference_snapshot.wait_loaded(WARMUP_TIMEOUT / 2):
+        logger.warning("Reference snapshot not loaded yet, lookups use the database meanwhile")
+
+# Warm-up steps, run before the server reports ready
+lifecycle.on_startup("database pool", warm_up_database)
+if query_cache.enabled:
+    lifecycle.on_startup("query cache listener", listen_for_table_changes)
+if reference_snapshot.enabled:
+    lifecycle.on_startup("reference snapshot", load_reference_snapshot)
+if WARMUP_PRELOAD:
+    lifecycle.on_startup("reference data", preload_reference_data)
+# Shutdown steps, run after the tool calls in flight have finished
+lifecycle.on_shutdown("report queue", report_writer.close)
+lifecycle.on_shutdown("email queue", email_dispatcher.close)
+lifecycle.on_shutdown("trace export", tracer.close)
+lifecycle.on_shutdown("query cache listener", query_cache.close)
+lifecycle.on_shutdown("reference snapshot", reference_snapshot.close)
+lifecycle.on_shutdown("llm client", llm_client.close)
+lifecycle.on_shutdown("database pools", database.disconnect)
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Application lifespan: warms the server up before it accepts connections and,
+    on shutdown, drains the tool calls in flight and runs the shutdown steps
+    (queued reports and emails, pending spans, database pools).
+    """
+    await lifecycle.startup(WARMUP_TIMEOUT, WARMUP_RETRY_INTERVAL)
+    yield
+    logger.info("Server shutting down...")
+    await lifecycle.shutdown(SHUTDOWN_DRAIN_TIMEOUT)
+
+class DrainingServer(uvicorn.Server):
+    """
+    Uvicorn server that drains the tool calls in flight before closing the
+    connections: their results are sent over the still-open SSE streams.
+    """
+    async def shutdown(self, sockets=None):
+        await lifecycle.drain(SHUTDOWN_DRAIN_TIMEOUT)
+        await super().shutdown(sockets=sockets)
+
+def create_app():
+    """
+    Builds the ASGI application of the MCP server (SSE transport) with the lifecycle hooks.
+    """
+    # Tools are automatically registered by FastMCP when imported
+    # if they are decorated with @mcp.tool in the imported modules
+    app = mcp.http_app(path="/sse", transport="sse")  # Server-Sent Events as transport mechanism
+    app.router.lifespan_context = lifespan
+    return app
+
 if __name__ == "__main__":
     # Main entry point when script is executed directly
     logger.info(f"Starting FastMCP on {HOST}:{PORT}...")
-    # Tools are automatically registered by FastMCP when imported
-    # if they are decorated with @mcp.tool in the imported modules
-    mcp.run(
-        transport="sse",  # Server-Sent Events as transport mechanism
+    config = uvicorn.Config(
+        create_app(),
         host=HOST,
         port=PORT,
-        path="/sse",  # Path for SSE connection
         log_level="info",  # Log detail level
+        lifespan="on",
+        timeout_graceful_shutdown=0,  # Same as FastMCP's own runner: open SSE streams do not block shutdown
     )
+    DrainingServer(config).run()
 
 # Example command to run the server:
 #  /home/david/Documents/AI/AI-Client-Agent-MCP/.venv/bin/python -m backend.server 
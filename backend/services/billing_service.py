@@ -0,0 +1,125 @@
+from backend.core.decorators import with_db_connection
+from backend.core import queries
+from backend.core.query_cache import query_cache
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date
+import asyncpg
+from backend.core.logging import get_logger
+
+# Logger for the billing service
+logger = get_logger(__name__)
+
+# Service answering billing aggregates from the billing_summary table, which the invoice
+# triggers keep as invoice count and total amount per (client_id, month, status)
+
+# Dimensions accepted in group_by: columns selected (and grouped by) for each one
+BILLING_DIMENSIONS = {
+    "client": ("s.client_id", "c.name AS client_name"),
+    "city": ("c.city",),
+    "month": ("s.month",),
+    "status": ("s.status",),
+}
+
+
+def _summary_query(
+    group_by: Tuple[str, ...],
+    client_id: Optional[int] = None,
+    city: Optional[str] = None,
+    status: Optional[str] = None,
+    month_from: Optional[date] = None,
+    month_before: Optional[date] = None
+) -> Tuple[str, List[Any]]:
+    """
+    Builds the grouped query over billing_summary.
+
+    Returns:
+        Tuple with the query and its positional arguments.
+    """
+    columns = [column for dimension in group_by for column in BILLING_DIMENSIONS[dimension]]
+    grouped = [column.split(" AS ")[0] for column in columns]
+    conditions: List[str] = []
+    values: List[Any] = []
+    for condition, value in (
+        ("s.client_id = ${}", client_id),
+        ("LOWER(c.city) = LOWER(${})", city),
+        ("s.status = ${}", status),
+        ("s.month >= ${}", month_from),
+        ("s.month < ${}", month_before),
+    ):
+        if value is not None:
+            values.append(value)
+            conditions.append(condition.format(len(values)))
+    # clients is only joined for the dimensions and filters that need it
+    needs_clients = city is not None or any(column.startswith("c.") for column in columns)
+    query = f"""
+        SELECT {", ".join(columns + ["sum(s.invoice_count)::bigint AS invoice_count", "sum(s.total_amount) AS total_amount"])}
+        FROM billing_summary s {"LEFT JOIN clients c ON c.id = s.client_id" if needs_clients else ""}
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        {"GROUP BY " + ", ".join(grouped) + " ORDER BY " + ", ".join(grouped) if grouped else ""}
+    """
+    return query, values
+
+
+@query_cache.cached("invoices", "clients")
+@with_db_connection(read_only=True)
+async def get_billing_summary(
+    group_by: Tuple[str, ...],
+    client_id: Optional[int] = None,
+    city: Optional[str] = None,
+    status: Optional[str] = None,
+    month_from: Optional[date] = None,
+    month_before: Optional[date] = None,
+    conn: Optional[asyncpg.Connection] = None
+) -> List[Dict[str, Any]]:
+    """
+    Retrieves invoice counts and total amounts grouped by client, city, month and/or status.
+    Only the billing_summary table is read, so the cost does not grow with the number of invoices.
+
+    Args:
+        group_by: Dimensions to group by (keys of BILLING_DIMENSIONS), in output order; empty for the grand total.
+        client_id: Only invoices of this client.
+        city: Only invoices of clients in this city (case-insensitive).
+        status: Only invoices in this status.
+        month_from: First month included (first day of the month).
+        month_before: First month excluded (first day of the month).
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        List of groups (dimension values, invoice_count and total_amount), or an error dictionary.
+    """
+    unknown = [dimension for dimension in group_by if dimension not in BILLING_DIMENSIONS]
+    if unknown:
+        return {"success": False, "error": f"Invalid group_by {', '.join(unknown)}. Valid values: {', '.join(BILLING_DIMENSIONS)}"}
+    query, values = _summary_query(tuple(dict.fromkeys(group_by)), client_id, city, status, month_from, month_before)
+    try:
+        rows = await conn.fetch(query, *values)
+        return [dict(row) for row in rows]
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in get_billing_summary: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in get_billing_summary: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@query_cache.invalidates("invoices")
+@with_db_connection
+async def rebuild_billing_summary(conn: Optional[asyncpg.Connection] = None) -> Dict[str, Any]:
+    """
+    Recomputes billing_summary from the invoices table (after backfills or loads with the
+    triggers disabled). Invoice writes wait while it runs; summary reads do not.
+
+    Args:
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with the number of groups written, or an error.
+    """
+    try:
+        groups = await conn.fetchval(queries.BILLING_SUMMARY_REBUILD)
+        logger.info(f"Billing summary rebuilt: {groups} groups")
+        return {"groups": groups}
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in rebuild_billing_summary: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in rebuild_billing_summary: {e}")
+        return {"success": False, "error": str(e)}
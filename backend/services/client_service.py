@@ -1,7 +1,12 @@
 # backend/services/client_service.py
 from backend.core.database import database
 from backend.core.decorators import with_db_connection, db_transaction
+from backend.core import queries
+from backend.core.batch_loader import BatchLoader
+from backend.core.query_cache import query_cache
+from backend.core.table_snapshot import reference_snapshot
 from typing import List, Dict, Any, Optional
+import asyncpg
 from backend.core.logging import get_logger
 
 # Client management services
@@ -9,26 +14,31 @@ from backend.core.logging import get_logger
 
 logger = get_logger(__name__)
 
-@with_db_connection
-async def get_all_clients(conn=None) -> List[Dict[str, Any]]:
+# Columns that update_client may set
+UPDATABLE_CLIENT_FIELDS = ("name", "city", "email")
+
+@query_cache.cached("clients")
+@with_db_connection(read_only=True)
+async def get_all_clients(limit: Optional[int] = None, after_id: int = 0, conn=None) -> List[Dict[str, Any]]:
     """
-    Retrieves all clients ordered by ID.
+    Retrieves clients ordered by ID using keyset pagination.
 
     Args:
+        limit: Maximum number of clients to return (None returns all remaining clients).
+        after_id: Only clients with an ID greater than this one are returned.
         conn: Optional database connection. If not provided, a new one is created.
     Returns:
         List of dictionaries with client data.
     """
     try:
-        rows = await conn.fetch(
-            "SELECT id, name, city, email, created_at FROM clients ORDER BY id"
-        )
+        rows = await conn.fetch(queries.CLIENTS_LIST, after_id or 0, limit)
         return [dict(row) for row in rows]
     except Exception as e:
         logger.error(f"Error in get_all_clients: {e}")
         return []
 
-@with_db_connection
+@query_cache.cached("clients")
+@with_db_connection(read_only=True)
 async def get_client_by_id(client_id: int, conn=None) -> Optional[Dict[str, Any]]:
     """
     Retrieves a specific client by their ID.
@@ -40,15 +50,52 @@ async def get_client_by_id(client_id: int, conn=None) -> Optional[Dict[str, Any]
         Dictionary with client data or None if not found.
     """
     try:
-        row = await conn.fetchrow(
-            "SELECT id, name, city, email, created_at FROM clients WHERE id = $1",
-            client_id
-        )
+        row = await conn.fetchrow(queries.CLIENT_GET_BY_ID, client_id)
         return dict(row) if row else None
     except Exception as e:
         logger.error(f"Error in get_client_by_id: {e}")
         return None
 
+@with_db_connection(read_only=True)
+async def get_clients_by_ids(client_ids: List[int], conn=None) -> Dict[int, Dict[str, Any]]:
+    """
+    Retrieves several clients by their IDs with a single query.
+
+    Args:
+        client_ids: IDs of the clients to search for.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with the data of the clients found, by ID.
+    """
+    try:
+        rows = await conn.fetch(queries.CLIENTS_GET_BY_IDS, client_ids)
+        return {row['id']: dict(row) for row in rows}
+    except Exception as e:
+        logger.error(f"Error in get_clients_by_ids: {e}")
+        return {}
+
+# Coalesces the by-ID client lookups of concurrent tool calls into one query
+client_loader = BatchLoader(get_clients_by_ids)
+
+@query_cache.cached("clients")
+async def load_client_by_id(client_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Retrieves a client by ID from the reference snapshot when it is loaded, otherwise
+    through the batch loader. Lookups made by concurrent tool calls in the same
+    event-loop tick share a single query and connection.
+
+    Args:
+        client_id: ID of the client to search for.
+    Returns:
+        Dictionary with client data or None if not found.
+    """
+    if reference_snapshot.clients.ready:
+        client = reference_snapshot.clients.get(client_id)
+        if client is not None:
+            return client
+    return await client_loader.load(client_id)
+
+@query_cache.invalidates("clients")
 @with_db_connection
 async def create_client(name: str, city: str = "", email: str = "", conn=None) -> Dict[str, Any]:
     """
@@ -63,21 +110,53 @@ async def create_client(name: str, city: str = "", email: str = "", conn=None) -
         Dictionary with the created client data.
     """
     try:
-        query = """
-            INSERT INTO clients (name, city, email) 
-            VALUES ($1, $2, $3) 
-            RETURNING id, name, city, email, created_at
-        """
-        row = await conn.fetchrow(query, name, city, email)
+        row = await conn.fetchrow(queries.CLIENT_INSERT, name, city, email)
         return dict(row)
     except Exception as e:
         logger.error(f"Error in create_client: {e}")
         return {"success": False, "error": str(e)}
 
+@query_cache.invalidates("clients")
+@db_transaction
+async def bulk_create_clients(clients: List['ClientCreate'], conn=None) -> List[Dict[str, Any]]:
+    """
+    Creates many clients in a single transaction with a binary COPY.
+    The ids are reserved from the table sequence first, so the created rows are
+    returned without reading them back.
+
+    Args:
+        clients: Validated ClientCreate models.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        List with the created clients' data, in input order.
+    """
+    if not clients:
+        return []
+    try:
+        reserved = await conn.fetch(queries.CLIENTS_RESERVE_IDS, len(clients))
+        records = [
+            (slot['id'], client.name, client.city, client.email, slot['created_at'])
+            for slot, client in zip(reserved, clients)
+        ]
+        await conn.copy_records_to_table(
+            "clients", records=records, columns=("id", "name", "city", "email", "created_at")
+        )
+        logger.info(f"Bulk created {len(records)} clients")
+        return [dict(zip(("id", "name", "city", "email", "created_at"), record)) for record in records]
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in bulk_create_clients: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in bulk_create_clients: {e}")
+        return {"success": False, "error": str(e)}
+
+@query_cache.invalidates("clients")
 @with_db_connection
 async def update_client(client_id: int, client_data: 'ClientUpdate', conn=None) -> Optional[Dict[str, Any]]:
     """
     Updates the data of an existing client using a dynamic query and exclude_unset.
+    The UPDATE text is canonicalized by the sorted set of fields to reuse cached plans.
+    A single UPDATE ... RETURNING both applies the change and detects a missing client.
 
     Args:
         client_id: ID of the client to update.
@@ -87,34 +166,23 @@ async def update_client(client_id: int, client_data: 'ClientUpdate', conn=None)
         Dictionary with the updated client data or None if not found.
     """
     try:
-        current_client = await get_client_by_id(client_id, conn=conn)
-        if not current_client:
-            logger.info(f"Client with ID {client_id} not found for update")
-            return None
         update_fields = client_data.model_dump(exclude_unset=True)
         if not update_fields:
             logger.info(f"No fields to update for client ID {client_id}")
-            return current_client
-        set_clauses = []
-        values = []
-        for idx, (key, value) in enumerate(update_fields.items(), start=1):
-            set_clauses.append(f"{key} = ${idx}")
-            values.append(value)
-        values.append(client_id)
-        set_clause_str = ', '.join(set_clauses)
-        id_placeholder = f"${len(values)}"
-        query = f"""
-            UPDATE clients 
-            SET {set_clause_str} 
-            WHERE id = {id_placeholder}
-            RETURNING id, name, city, email, created_at
-        """
+            return await get_client_by_id(client_id, conn=conn)
+        query, values = queries.build_update(
+            "clients", update_fields, client_id, queries.CLIENT_COLUMNS, UPDATABLE_CLIENT_FIELDS
+        )
         row = await conn.fetchrow(query, *values)
-        return dict(row) if row else None
+        if not row:
+            logger.info(f"Client with ID {client_id} not found for update")
+            return None
+        return dict(row)
     except Exception as e:
         logger.error(f"Error in update_client: {e}")
         return None
 
+@query_cache.invalidates("clients", "invoices")
 @with_db_connection
 async def delete_client(client_id: int, conn=None) -> bool:
     """
@@ -127,18 +195,39 @@ async def delete_client(client_id: int, conn=None) -> bool:
         Boolean indicating if the deletion was successful.
     """
     try:
-        client = await get_client_by_id(client_id, conn=conn)
-        if not client:
+        result = await conn.execute(queries.CLIENT_DELETE, client_id)
+        if result == "DELETE 0":
             logger.info(f"Client with ID {client_id} not found for deletion")
             return False
-        query = "DELETE FROM clients WHERE id = $1"
-        result = await conn.execute(query, client_id)
-        return "DELETE" in result
+        return True
     except Exception as e:
         logger.error(f"Error in delete_client: {e}")
         return False
 
+@query_cache.invalidates("clients", "invoices")
+@with_db_connection
+async def delete_client_returning(client_id: int, conn=None) -> Optional[Dict[str, Any]]:
+    """
+    Deletes a client with a single DELETE ... RETURNING (its invoices are removed by cascade).
+
+    Args:
+        client_id: ID of the client to delete.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with the deleted client data, None if not found, or an error.
+    """
+    try:
+        row = await conn.fetchrow(queries.CLIENT_DELETE_RETURNING, client_id)
+        if not row:
+            logger.info(f"Client with ID {client_id} not found for deletion")
+            return None
+        return dict(row)
+    except Exception as e:
+        logger.error(f"Error in delete_client_returning: {e}")
+        return {"success": False, "error": str(e)}
+
 # Example of a function that uses a transaction
+@query_cache.invalidates("clients", "invoices")
 @db_transaction
 async def transfer_client_data(source_client_id: int, target_client_id: int, conn=None) -> bool:
     """
@@ -160,10 +249,7 @@ async def transfer_client_data(source_client_id: int, target_client_id: int, con
         if not source_client:
             logger.warning(f"Source client with ID {source_client_id} not found")
             return False
-        target_client = await conn.fetchrow(
-            "SELECT id FROM clients WHERE id = $1",
-            target_client_id
-        )
+        target_client = await conn.fetchrow(queries.CLIENT_EXISTS, target_client_id)
         if not target_client:
             logger.warning(f"Target client with ID {target_client_id} not found")
             return False
@@ -171,10 +257,7 @@ async def transfer_client_data(source_client_id: int, target_client_id: int, con
             "UPDATE invoices SET client_id = $1 WHERE client_id = $2",
             target_client_id, source_client_id
         )
-        await conn.execute(
-            "DELETE FROM clients WHERE id = $1",
-            source_client_id
-        )
+        await conn.execute(queries.CLIENT_DELETE, source_client_id)
         logger.info(f"Data transfer from client {source_client_id} to {target_client_id} completed successfully")
         return True
     except Exception as e:
@@ -0,0 +1,406 @@
+"""
+Asynchronous email delivery for generated reports.
+
+Emails are queued in a bounded asyncio queue and sent by EMAIL_WORKERS
+background tasks. Each worker keeps its SMTP session (TLS handshake and login
+included) open across messages and closes it after EMAIL_SESSION_IDLE_TIMEOUT
+seconds without work; the blocking smtplib calls run in a thread, so the event
+loop keeps serving the other sessions while a message is transferred.
+
+- Connection errors, timeouts and 4xx answers are retried up to EMAIL_MAX_RETRIES
+  times with exponential backoff and full jitter; 5xx answers fail at once.
+- A session the server closed while idle is reopened and the message resent
+  without counting as a retry.
+- Emails given a delivery_id record their status (queued, sent, failed), attempts
+  and last error in report_deliveries; reports reference it by delivery_id.
+"""
+
+import asyncio
+import contextvars
+import random
+import smtplib
+import ssl
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import asyncpg
+
+from backend.core import queries
+from backend.core.config import (
+    SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, SMTP_SECURITY, SMTP_TIMEOUT,
+    EMAIL_QUEUE_MAX_SIZE, EMAIL_WORKERS, EMAIL_MAX_RETRIES, EMAIL_RETRY_BASE_DELAY,
+    EMAIL_RETRY_MAX_DELAY, EMAIL_SESSION_IDLE_TIMEOUT, EMAIL_FLUSH_TIMEOUT
+)
+from backend.core.decorators import with_db_connection
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Delivery states recorded in report_deliveries
+QUEUED, SENT, FAILED = "queued", "sent", "failed"
+# Outcomes counted per email
+OUTCOMES = (SENT, FAILED)
+SECURITY_MODES = ("ssl", "starttls", "none")
+
+
+class SmtpSession:
+    """
+    One SMTP connection reused across messages. Its methods block: call them from a thread.
+    """
+    def __init__(self, host: Optional[str], port: int, security: str = "ssl", user: Optional[str] = None,
+                 password: Optional[str] = None, timeout: float = SMTP_TIMEOUT):
+        if security not in SECURITY_MODES:
+            raise ValueError(f"Invalid SMTP security '{security}'. Valid values: {', '.join(SECURITY_MODES)}")
+        self.host = host
+        self.port = port
+        self.security = security
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.connections = 0
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    @property
+    def connected(self) -> bool:
+        return self._smtp is not None and self._smtp.sock is not None
+
+    def _connect(self) -> None:
+        if self.security == "ssl":
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout, context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.security == "starttls":
+                smtp.starttls(context=ssl.create_default_context())
+        try:
+            if self.user:
+                smtp.login(self.user, self.password or "")
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.connections += 1
+
+    def send(self, message: EmailMessage) -> None:
+        """
+        Sends a message, opening the connection if there is none.
+        """
+        reused = self.connected
+        if not reused:
+            self._connect()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            if not reused:
+                raise
+            # The server closed the connection while it was idle: reopen it once
+            self._connect()
+            self._smtp.send_message(message)
+        except smtplib.SMTPResponseException:
+            # smtplib already reset the transaction (or closed the socket after a 421)
+            if not self.connected:
+                self.close()
+            raise
+        except Exception:
+            # The state of the connection is unknown after a network error
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """
+        Ends the session (QUIT when possible).
+        """
+        smtp, self._smtp = self._smtp, None
+        if smtp is None:
+            return
+        try:
+            if smtp.sock is not None:
+                smtp.quit()
+        except Exception:
+            pass
+        finally:
+            smtp.close()
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Whether a delivery error is worth retrying: connection problems and 4xx answers.
+    Other SMTP errors (e.g. no STARTTLS or AUTH support) and TLS errors (e.g. a
+    certificate that does not verify) fail the same way every time, although both
+    are OSError subclasses.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # SSLEOFError is the connection closed in the middle of the TLS stream
+    if isinstance(error, smtplib.SMTPException) or (isinstance(error, ssl.SSLError)
+                                                    and not isinstance(error, ssl.SSLEOFError)):
+        return False
+    return isinstance(error, (OSError, asyncio.TimeoutError))
+
+
+class _Delivery:
+    __slots__ = ("message", "delivery_id", "future", "attempts")
+
+    def __init__(self, message: EmailMessage, delivery_id: Optional[UUID], future: Optional[asyncio.Future]):
+        self.message = message
+        self.delivery_id = delivery_id
+        self.future = future
+        self.attempts = 0
+
+
+class EmailDispatcher:
+    """
+    Bounded email queue served by a pool of workers with persistent SMTP sessions.
+
+    Args:
+        host, port, security, user, password, timeout: SMTP server settings (see SmtpSession).
+        workers: Concurrent SMTP sessions.
+        max_queue_size: Emails waiting to be sent before send() blocks.
+        max_retries: Retries after a transient error.
+        retry_base_delay: Backoff of the first retry in seconds, doubled on each further retry.
+        retry_max_delay: Upper bound of a retry delay in seconds.
+        idle_timeout: Seconds a session is kept open without messages.
+    """
+    def __init__(self, host: Optional[str] = SMTP_HOST, port: int = SMTP_PORT, security: str = SMTP_SECURITY,
+                 user: Optional[str] = SMTP_USER, password: Optional[str] = SMTP_PASS, timeout: float = SMTP_TIMEOUT,
+                 workers: int = EMAIL_WORKERS, max_queue_size: int = EMAIL_QUEUE_MAX_SIZE,
+                 max_retries: int = EMAIL_MAX_RETRIES, retry_base_delay: float = EMAIL_RETRY_BASE_DELAY,
+                 retry_max_delay: float = EMAIL_RETRY_MAX_DELAY, idle_timeout: float = EMAIL_SESSION_IDLE_TIMEOUT):
+        self.sessions = [SmtpSession(host, port, security, user, password, timeout) for _ in range(max(1, workers))]
+        self.max_queue_size = max_queue_size
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.idle_timeout = idle_timeout
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+        self.retries = 0
+        self.sending = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[Optional[asyncio.Task]] = [None] * len(self.sessions)
+        self._closed = False
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        # Empty context: the workers outlive the traced call that starts them
+        self._workers = [
+            worker if worker is not None and not worker.done()
+            else asyncio.create_task(self._run(session), context=contextvars.Context())
+            for worker, session in zip(self._workers, self.sessions)
+        ]
+        return self._queue
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of emails queued and not yet taken by a worker.
+        """
+        return self._queue.qsize() if self._queue else 0
+
+    async def send(self, message: EmailMessage, delivery_id: Optional[UUID] = None, wait: bool = True) -> None:
+        """
+        Queues an email. Blocks while the queue is full.
+
+        Args:
+            message: Email to send (From and To headers set).
+            delivery_id: Records the delivery status in report_deliveries under this id.
+            wait: Wait until the email is sent (after the retries).
+        Raises:
+            RuntimeError: If the dispatcher has been closed.
+            Exception: With wait=True, the error that prevented the delivery.
+        """
+        if self._closed:
+            raise RuntimeError("Email dispatcher is closed")
+        queue = self._ensure_workers()
+        if delivery_id is not None:
+            await self._record(delivery_id, message, QUEUED, 0)
+        future = asyncio.get_running_loop().create_future() if wait else None
+        await queue.put(_Delivery(message, delivery_id, future))
+        if future is not None:
+            await future
+
+    async def _run(self, session: SmtpSession):
+        """
+        Background worker: sends queued emails over its session, closing it when idle.
+        """
+        queue = self._queue
+        while True:
+            if session.connected:
+                try:
+                    delivery = await asyncio.wait_for(queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await asyncio.to_thread(session.close)
+                    continue
+            else:
+                delivery = await queue.get()
+            try:
+                await self._deliver(session, delivery)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Fail this delivery only: the worker keeps serving the queue
+                logger.error(f"Unexpected error delivering email to {delivery.message['To']}: {e!r}")
+                if delivery.future is not None and not delivery.future.done():
+                    delivery.future.set_exception(e)
+            finally:
+                queue.task_done()
+
+    def _retry_delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+
+    async def _deliver(self, session: SmtpSession, delivery: _Delivery):
+        while True:
+            delivery.attempts += 1
+            self.sending += 1
+            try:
+                await asyncio.to_thread(session.send, delivery.message)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                self.sending -= 1
+            if error is None:
+                self.counts[SENT] += 1
+                await self._finish(delivery, SENT)
+                return
+            if delivery.attempts > self.max_retries or not is_transient(error):
+                self.counts[FAILED] += 1
+                logger.error(f"Email to {delivery.message['To']} failed after {delivery.attempts} attempts: {error!r}")
+                await self._finish(delivery, FAILED, error)
+                return
+            delay = self._retry_delay(delivery.attempts - 1)
+            logger.warning(f"Email to {delivery.message['To']} attempt {delivery.attempts} failed ({error!r}); retrying in {delay:.2f}s")
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _finish(self, delivery: _Delivery, status: str, error: Optional[Exception] = None):
+        try:
+            if delivery.delivery_id is not None:
+                await self._record(delivery.delivery_id, delivery.message, status, delivery.attempts, error)
+        finally:
+            # The caller learns the outcome of the delivery even if recording it failed
+            if delivery.future is not None and not delivery.future.done():
+                if error is None:
+                    delivery.future.set_result(None)
+                else:
+                    delivery.future.set_exception(error)
+
+    async def _record(self, delivery_id: UUID, message: EmailMessage, status: str, attempts: int,
+                      error: Optional[Exception] = None):
+        """
+        Records the status of a delivery. Best effort: errors are logged, not raised.
+        """
+        try:
+            result = await record_delivery(
+                delivery_id, str(message["To"]), str(message["Subject"] or ""), status, attempts,
+                repr(error) if error is not None else None
+            )
+        except Exception as e:
+            logger.warning(f"Could not record delivery {delivery_id} as {status}: {e!r}")
+            return
+        if not result.get("success", True):
+            logger.warning(f"Could not record delivery {delivery_id} as {status}: {result.get('error')}")
+
+    async def flush(self):
+        """
+        Waits until every queued email has been sent or has failed.
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self, timeout: float = EMAIL_FLUSH_TIMEOUT):
+        """
+        Stops accepting emails, sends the pending ones, stops the workers and closes the sessions.
+
+        Args:
+            timeout: Seconds to wait for the pending emails.
+        """
+        self._closed = True
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out sending emails on shutdown; {self.pending} emails were not sent")
+        workers = [worker for worker in self._workers if worker is not None]
+        for worker in workers:
+            worker.cancel()
+        for worker in workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self._workers = [None] * len(self.sessions)
+        # QUIT waits for the server: not on the event loop
+        await asyncio.gather(*(asyncio.to_thread(session.close) for session in self.sessions))
+        logger.info("Email dispatcher closed")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "emails": dict(self.counts),
+            "retries": self.retries,
+            "queued": self.pending,
+            "sending": self.sending,
+            "workers": len(self.sessions),
+            "open_sessions": sum(session.connected for session in self.sessions),
+            "connections_opened": sum(session.connections for session in self.sessions),
+        }
+
+    def render_prometheus(self) -> str:
+        """
+        Renders the email dispatcher metrics in the Prometheus text exposition format.
+        """
+        stats = self.stats()
+        lines = [
+            "# HELP mcp_emails_total Emails by outcome (after retries).",
+            "# TYPE mcp_emails_total counter",
+        ]
+        lines += [f'mcp_emails_total{{outcome="{outcome}"}} {count}' for outcome, count in self.counts.items()]
+        lines += [
+            "# HELP mcp_email_retries_total Email delivery attempts retried.",
+            "# TYPE mcp_email_retries_total counter",
+            f"mcp_email_retries_total {self.retries}",
+            "# HELP mcp_email_queued Emails waiting for a worker.",
+            "# TYPE mcp_email_queued gauge",
+            f"mcp_email_queued {stats['queued']}",
+            "# HELP mcp_email_smtp_connections_total SMTP connections opened.",
+            "# TYPE mcp_email_smtp_connections_total counter",
+            f"mcp_email_smtp_connections_total {stats['connections_opened']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+@with_db_connection
+async def record_delivery(delivery_id: UUID, recipient: str, subject: str, status: str, attempts: int,
+                          last_error: Optional[str] = None, conn: Optional[asyncpg.Connection] = None) -> Dict[str, Any]:
+    """
+    Records the delivery status of a report email.
+
+    Args:
+        delivery_id: Id of the delivery (reports.delivery_id).
+        recipient: Recipient address.
+        subject: Email subject.
+        status: 'queued', 'sent' or 'failed'.
+        attempts: Delivery attempts made so far.
+        last_error: Error of the last failed attempt, if any.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with success True/False and error if applicable.
+    """
+    try:
+        await conn.execute(queries.REPORT_DELIVERY_UPSERT, delivery_id, recipient, subject, status, attempts, last_error)
+        return {"success": True}
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in record_delivery: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in record_delivery: {e}")
+        return {"success": False, "error": str(e)}
+
+
+# Singleton instance used by the report tools and the server lifecycle
+email_dispatcher = EmailDispatcher()
@@ -1,12 +1,15 @@
 from backend.core.database import database
 from backend.core.decorators import with_db_connection, db_transaction
+from backend.core import queries
+from backend.core.batch_loader import BatchLoader
+from backend.core.query_cache import query_cache
 from backend.models.invoice import InvoiceCreate, InvoiceUpdate
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from decimal import Decimal
 from datetime import date
 import asyncpg
+from backend.core.config import STREAM_CHUNK_SIZE
 from backend.core.logging import get_logger
-from backend.services.client_service import get_client_by_id
 
 # Invoice management services
 # These functions implement business logic and database access for invoices
@@ -14,23 +17,27 @@ from backend.services.client_service import get_client_by_id
 
 logger = get_logger(__name__)
 
-@with_db_connection
-async def get_all_invoices(conn: Optional[asyncpg.Connection] = None) -> List[Dict[str, Any]]:
+# Columns of an invoice row, in table order
+INVOICE_FIELDS = ("id", "client_id", "amount", "issued_at", "due_date", "status")
+
+# Columns that update_invoice may set
+UPDATABLE_INVOICE_FIELDS = ("client_id", "amount", "issued_at", "due_date", "status")
+
+@query_cache.cached("invoices")
+@with_db_connection(read_only=True)
+async def get_all_invoices(limit: Optional[int] = None, after_id: int = 0, conn: Optional[asyncpg.Connection] = None) -> List[Dict[str, Any]]:
     """
-    Retrieves all invoices ordered by ID.
+    Retrieves invoices ordered by ID using keyset pagination.
 
     Args:
+        limit: Maximum number of invoices to return (None returns all remaining invoices).
+        after_id: Only invoices with an ID greater than this one are returned.
         conn: Optional database connection. If not provided, a new one is created.
     Returns:
         List of dictionaries with invoice data.
     """
     try:
-        query = """
-            SELECT id, client_id, amount, issued_at, due_date, status
-            FROM invoices
-            ORDER BY id
-        """
-        rows = await conn.fetch(query)
+        rows = await conn.fetch(queries.INVOICES_LIST, after_id or 0, limit)
         return [dict(row) for row in rows]
     except asyncpg.PostgresError as e:
         logger.error(f"Database error in get_all_invoices: {e}")
@@ -39,7 +46,43 @@ async def get_all_invoices(conn: Optional[asyncpg.Connection] = None) -> List[Di
         logger.error(f"Unexpected error in get_all_invoices: {e}")
         return []
 
-@with_db_connection
+async def iter_all_invoices(chunk_size: int = STREAM_CHUNK_SIZE, conn: Optional[asyncpg.Connection] = None) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Streams all invoices ordered by ID in fixed-size chunks.
+
+    Rows are read through a server-side cursor inside a transaction, so only one
+    chunk is held in memory at a time regardless of the size of the table.
+    Consumers that may stop early should wrap the iterator in contextlib.aclosing.
+
+    Args:
+        chunk_size: Number of invoices per chunk.
+        conn: Optional database connection. If not provided, a new one is acquired
+            for the whole iteration.
+    Yields:
+        Lists of dictionaries with invoice data.
+    """
+    if conn is None:
+        # Async generators cannot use with_db_connection, so hold the connection here
+        async with database.connection(read_only=True) as new_conn:
+            async for chunk in iter_all_invoices(chunk_size, conn=new_conn):
+                yield chunk
+        return
+    try:
+        # Server-side cursors only live inside a transaction
+        async with conn.transaction():
+            cursor = await conn.cursor(queries.INVOICES_STREAM)
+            while True:
+                rows = await cursor.fetch(chunk_size)
+                if not rows:
+                    break
+                yield [dict(row) for row in rows]
+    except asyncpg.PostgresError as e:
+        # Re-raise: swallowing the error would look like a complete but truncated stream
+        logger.error(f"Database error in iter_all_invoices: {e}")
+        raise
+
+@query_cache.cached("invoices")
+@with_db_connection(read_only=True)
 async def get_invoice_by_id(invoice_id: int, conn: Optional[asyncpg.Connection] = None) -> Optional[Dict[str, Any]]:
     """
     Retrieves a specific invoice by its ID.
@@ -51,12 +94,7 @@ async def get_invoice_by_id(invoice_id: int, conn: Optional[asyncpg.Connection]
         Dictionary with invoice data or None if not found.
     """
     try:
-        query = """
-            SELECT id, client_id, amount, issued_at, due_date, status
-            FROM invoices
-            WHERE id = $1
-        """
-        row = await conn.fetchrow(query, invoice_id)
+        row = await conn.fetchrow(queries.INVOICE_GET_BY_ID, invoice_id)
         return dict(row) if row else None
     except asyncpg.PostgresError as e:
         logger.error(f"Database error in get_invoice_by_id: {e}")
@@ -65,25 +103,59 @@ async def get_invoice_by_id(invoice_id: int, conn: Optional[asyncpg.Connection]
         logger.error(f"Unexpected error in get_invoice_by_id: {e}")
         return None
 
-@with_db_connection
-async def get_invoices_by_client_id(client_id: int, conn: Optional[asyncpg.Connection] = None) -> List[Dict[str, Any]]:
+@with_db_connection(read_only=True)
+async def get_invoices_by_ids(invoice_ids: List[int], conn: Optional[asyncpg.Connection] = None) -> Dict[int, Dict[str, Any]]:
     """
-    Retrieves all invoices for a specific client.
+    Retrieves several invoices by their IDs with a single query.
+
+    Args:
+        invoice_ids: IDs of the invoices to search for.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with the data of the invoices found, by ID.
+    """
+    try:
+        rows = await conn.fetch(queries.INVOICES_GET_BY_IDS, invoice_ids)
+        return {row['id']: dict(row) for row in rows}
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in get_invoices_by_ids: {e}")
+        return {}
+    except Exception as e:
+        logger.error(f"Unexpected error in get_invoices_by_ids: {e}")
+        return {}
+
+# Coalesces the by-ID invoice lookups of concurrent tool calls into one query
+invoice_loader = BatchLoader(get_invoices_by_ids)
+
+@query_cache.cached("invoices")
+async def load_invoice_by_id(invoice_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Retrieves an invoice by ID through the batch loader. Lookups made by concurrent
+    tool calls in the same event-loop tick share a single query and connection.
+
+    Args:
+        invoice_id: ID of the invoice to search for.
+    Returns:
+        Dictionary with invoice data or None if not found.
+    """
+    return await invoice_loader.load(invoice_id)
+
+@query_cache.cached("invoices")
+@with_db_connection(read_only=True)
+async def get_invoices_by_client_id(client_id: int, limit: Optional[int] = None, after_id: int = 0, conn: Optional[asyncpg.Connection] = None) -> List[Dict[str, Any]]:
+    """
+    Retrieves the invoices of a specific client ordered by ID using keyset pagination.
 
     Args:
         client_id: ID of the client whose invoices are to be retrieved.
+        limit: Maximum number of invoices to return (None returns all remaining invoices).
+        after_id: Only invoices with an ID greater than this one are returned.
         conn: Optional database connection. If not provided, a new one is created.
     Returns:
         List of dictionaries with the client's invoice data.
     """
     try:
-        query = """
-            SELECT id, client_id, amount, issued_at, due_date, status
-            FROM invoices
-            WHERE client_id = $1
-            ORDER BY id
-        """
-        rows = await conn.fetch(query, client_id)
+        rows = await conn.fetch(queries.INVOICES_BY_CLIENT, client_id, after_id or 0, limit)
         return [dict(row) for row in rows]
     except asyncpg.PostgresError as e:
         logger.error(f"Database error in get_invoices_by_client_id: {e}")
@@ -92,6 +164,72 @@ async def get_invoices_by_client_id(client_id: int, conn: Optional[asyncpg.Conne
         logger.error(f"Unexpected error in get_invoices_by_client_id: {e}")
         return []
 
+@query_cache.cached("invoices")
+@with_db_connection(read_only=True)
+async def get_invoices_by_period(issued_from: date, issued_before: date, client_id: Optional[int] = None, conn: Optional[asyncpg.Connection] = None) -> List[Dict[str, Any]]:
+    """
+    Retrieves the invoices issued in a date range, optionally of one client, ordered by ID.
+    The range is filtered in SQL on the issued_at indexes, so only matching rows are transferred.
+
+    Args:
+        issued_from: First issue date included.
+        issued_before: First issue date excluded (half-open range, see backend.core.periods).
+        client_id: Only invoices of this client.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        List of dictionaries with invoice data.
+    """
+    try:
+        if client_id is None:
+            rows = await conn.fetch(queries.INVOICES_BY_PERIOD, issued_from, issued_before)
+        else:
+            rows = await conn.fetch(queries.INVOICES_BY_CLIENT_PERIOD, client_id, issued_from, issued_before)
+        return [dict(row) for row in rows]
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in get_invoices_by_period: {e}")
+        return []
+    except Exception as e:
+        logger.error(f"Unexpected error in get_invoices_by_period: {e}")
+        return []
+
+@with_db_connection(read_only=True)
+async def get_invoice_frame(issued_from: Optional[date] = None, issued_before: Optional[date] = None, client_id: Optional[int] = None, conn: Optional[asyncpg.Connection] = None):
+    """
+    Retrieves invoices as a columnar InvoiceFrame for vectorized analytics, ordered by ID.
+    The database converts amounts to cents, dates to ordinals and statuses to codes, so
+    no Decimal or date object is created per row.
+
+    Args:
+        issued_from: First issue date included.
+        issued_before: First issue date excluded.
+        client_id: Only invoices of this client.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        The InvoiceFrame, or None on error.
+    """
+    from backend.core.invoice_frame import InvoiceFrame
+    conditions: List[str] = []
+    values: List[Any] = []
+    for condition, value in (
+        ("client_id = ${}", client_id),
+        ("issued_at >= ${}", issued_from),
+        ("issued_at < ${}", issued_before),
+    ):
+        if value is not None:
+            values.append(value)
+            conditions.append(condition.format(len(values)))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    try:
+        rows = await conn.fetch(f"SELECT {queries.INVOICE_FRAME_COLUMNS} FROM invoices {where} ORDER BY id", *values)
+        return InvoiceFrame.from_records(rows)
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in get_invoice_frame: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Unexpected error in get_invoice_frame: {e}")
+        return None
+
+@query_cache.invalidates("invoices")
 @with_db_connection
 async def create_invoice(invoice_data: InvoiceCreate, conn: Optional[asyncpg.Connection] = None) -> Dict[str, Any]:
     """
@@ -104,15 +242,10 @@ async def create_invoice(invoice_data: InvoiceCreate, conn: Optional[asyncpg.Con
         Dictionary with the created invoice data.
     """
     try:
-        query = """
-            INSERT INTO invoices (client_id, amount, issued_at, due_date, status) 
-            VALUES ($1, $2, $3, $4, $5) 
-            RETURNING id, client_id, amount, issued_at, due_date, status
-        """
         issued_at = invoice_data.issued_at if invoice_data.issued_at is not None else date.today()
         status = invoice_data.status if invoice_data.status is not None else 'pending'
         row = await conn.fetchrow(
-            query,
+            queries.INVOICE_INSERT,
             invoice_data.client_id, 
             invoice_data.amount,
             issued_at,
@@ -123,6 +256,10 @@ async def create_invoice(invoice_data: InvoiceCreate, conn: Optional[asyncpg.Con
             logger.error("Could not create invoice")
             return {"success": False, "error": "Could not create invoice"}
         return dict(row)
+    except asyncpg.ForeignKeyViolationError:
+        # The foreign key replaces a separate client existence check
+        logger.warning(f"Client with ID {invoice_data.client_id} not found when creating invoice")
+        return {"success": False, "error": f"Client with ID {invoice_data.client_id} not found"}
     except asyncpg.PostgresError as e:
         logger.error(f"Database error in create_invoice: {e}")
         return {"success": False, "error": str(e)}
@@ -130,10 +267,68 @@ async def create_invoice(invoice_data: InvoiceCreate, conn: Optional[asyncpg.Con
         logger.error(f"Unexpected error in create_invoice: {e}")
         return {"success": False, "error": str(e)}
 
+@query_cache.invalidates("invoices")
+@db_transaction
+async def bulk_create_invoices(invoices: List[InvoiceCreate], all_or_nothing: bool = False, conn: Optional[asyncpg.Connection] = None) -> Dict[str, Any]:
+    """
+    Creates many invoices in a single transaction with a binary COPY.
+    Every referenced client is checked (and locked against deletion) with one query;
+    invoices of unknown clients are reported instead of inserted.
+
+    Args:
+        invoices: Validated InvoiceCreate models.
+        all_or_nothing: Insert nothing if any invoice references an unknown client.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with 'created' (invoice data by position in the input list) and
+        'errors' (error message by position).
+    """
+    if not invoices:
+        return {"created": {}, "errors": {}}
+    try:
+        client_ids = sorted({invoice.client_id for invoice in invoices})
+        existing = {row['id'] for row in await conn.fetch(queries.CLIENTS_EXISTING, client_ids)}
+        errors = {
+            position: f"Client with ID {invoice.client_id} not found"
+            for position, invoice in enumerate(invoices) if invoice.client_id not in existing
+        }
+        if errors and all_or_nothing:
+            return {"created": {}, "errors": errors}
+        to_insert = [(position, invoice) for position, invoice in enumerate(invoices) if position not in errors]
+        if not to_insert:
+            return {"created": {}, "errors": errors}
+        reserved = await conn.fetch(queries.INVOICES_RESERVE_IDS, len(to_insert))
+        today = date.today()
+        records = [
+            (
+                slot['id'],
+                invoice.client_id,
+                invoice.amount,
+                invoice.issued_at if invoice.issued_at is not None else today,
+                invoice.due_date,
+                invoice.status if invoice.status is not None else 'pending'
+            )
+            for slot, (_, invoice) in zip(reserved, to_insert)
+        ]
+        await conn.copy_records_to_table("invoices", records=records, columns=INVOICE_FIELDS)
+        logger.info(f"Bulk created {len(records)} invoices ({len(errors)} rejected)")
+        created = {position: dict(zip(INVOICE_FIELDS, record)) for (position, _), record in zip(to_insert, records)}
+        return {"created": created, "errors": errors}
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in bulk_create_invoices: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in bulk_create_invoices: {e}")
+        return {"success": False, "error": str(e)}
+
+@query_cache.invalidates("invoices")
 @with_db_connection
 async def update_invoice(invoice_id: int, invoice_data: InvoiceUpdate, conn: Optional[asyncpg.Connection] = None) -> Optional[Dict[str, Any]]:
     """
     Updates the data of an existing invoice.
+    The UPDATE text is canonicalized by the sorted set of fields to reuse cached plans.
+    A single UPDATE ... RETURNING applies the change; a missing invoice is detected from
+    the empty result and an unknown client_id from the foreign key violation.
 
     Args:
         invoice_id: ID of the invoice to update.
@@ -143,37 +338,22 @@ async def update_invoice(invoice_id: int, invoice_data: InvoiceUpdate, conn: Opt
         Dictionary with the updated invoice data or None if not found.
         If the provided client_id does not exist, returns a clear error.
     """
+    update_fields = invoice_data.model_dump(exclude_unset=True)
     try:
-        current_invoice = await get_invoice_by_id(invoice_id, conn=conn)
-        if not current_invoice:
-            logger.info(f"Invoice with ID {invoice_id} not found for update")
-            return None
-        update_fields = invoice_data.model_dump(exclude_unset=True)
         if not update_fields:
             logger.info(f"No fields to update for invoice ID {invoice_id}")
-            return current_invoice
-        # Validate that the client_id exists if provided
-        if 'client_id' in update_fields:
-            client_exists = await get_client_by_id(update_fields['client_id'], conn=conn)
-            if not client_exists:
-                logger.error(f"The client_id {update_fields['client_id']} does not exist. Cannot update invoice.")
-                return {"success": False, "error": f"The client_id {update_fields['client_id']} does not exist."}
-        set_clauses = []
-        values = []
-        for idx, (key, value) in enumerate(update_fields.items(), start=1):
-            set_clauses.append(f"{key} = ${idx}")
-            values.append(value)
-        values.append(invoice_id)
-        set_clause_str = ', '.join(set_clauses)
-        id_placeholder = f"${len(values)}"
-        query = f"""
-            UPDATE invoices 
-            SET {set_clause_str} 
-            WHERE id = {id_placeholder}
-            RETURNING id, client_id, amount, issued_at, due_date, status
-        """
+            return await get_invoice_by_id(invoice_id, conn=conn)
+        query, values = queries.build_update(
+            "invoices", update_fields, invoice_id, queries.INVOICE_COLUMNS, UPDATABLE_INVOICE_FIELDS
+        )
         row = await conn.fetchrow(query, *values)
-        return dict(row) if row else None
+        if not row:
+            logger.info(f"Invoice with ID {invoice_id} not found for update")
+            return None
+        return dict(row)
+    except asyncpg.ForeignKeyViolationError:
+        logger.error(f"The client_id {update_fields.get('client_id')} does not exist. Cannot update invoice.")
+        return {"success": False, "error": f"Client with ID {update_fields.get('client_id')} not found"}
     except asyncpg.PostgresError as e:
         logger.error(f"Database error in update_invoice: {e}")
         return None
@@ -181,6 +361,104 @@ async def update_invoice(invoice_id: int, invoice_data: InvoiceUpdate, conn: Opt
         logger.error(f"Unexpected error in update_invoice: {e}")
         return None
 
+def _status_transition_filter(
+    new_status: str,
+    invoice_ids: Optional[List[int]] = None,
+    client_id: Optional[int] = None,
+    status: Optional[str] = None,
+    issued_from: Optional[date] = None,
+    issued_to: Optional[date] = None
+) -> Tuple[str, List[Any]]:
+    """
+    Builds the WHERE clause selecting the invoices of a status transition.
+    Invoices already in the target status are never selected. $1 is the new status.
+
+    Returns:
+        Tuple with the WHERE clause and its positional arguments (starting with new_status).
+    """
+    conditions = ["status IS DISTINCT FROM $1"]
+    values: List[Any] = [new_status]
+    for condition, value in (
+        ("id = ANY(${}::int[])", invoice_ids),
+        ("client_id = ${}", client_id),
+        ("status = ${}", status),
+        ("issued_at >= ${}", issued_from),
+        ("issued_at <= ${}", issued_to),
+    ):
+        if value is not None:
+            values.append(value)
+            conditions.append(condition.format(len(values)))
+    return " AND ".join(conditions), values
+
+
+class _TooManyRows(Exception):
+    """Raised to roll back a status transition that exceeds its row cap."""
+
+
+@query_cache.invalidates("invoices")
+@with_db_connection
+async def bulk_update_invoice_status(
+    new_status: str,
+    invoice_ids: Optional[List[int]] = None,
+    client_id: Optional[int] = None,
+    status: Optional[str] = None,
+    issued_from: Optional[date] = None,
+    issued_to: Optional[date] = None,
+    dry_run: bool = False,
+    max_rows: Optional[int] = None,
+    conn: Optional[asyncpg.Connection] = None
+) -> Dict[str, Any]:
+    """
+    Moves every matching invoice to a new status with a single UPDATE ... RETURNING.
+    At least one selector (invoice_ids or a filter) is required.
+
+    Args:
+        new_status: Target status ('pending', 'paid' or 'canceled').
+        invoice_ids: Only these invoices.
+        client_id: Only invoices of this client.
+        status: Only invoices currently in this status.
+        issued_from: Only invoices issued on or after this date.
+        issued_to: Only invoices issued on or before this date.
+        dry_run: Only count the invoices that would change.
+        max_rows: Maximum invoices that may change; if more match, nothing is updated.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with 'matched' (dry run) or 'invoices' (updated invoice data), or an error.
+    """
+    if invoice_ids is None and all(value is None for value in (client_id, status, issued_from, issued_to)):
+        return {"success": False, "error": "Provide invoice_ids or at least one filter"}
+    where, values = _status_transition_filter(new_status, invoice_ids, client_id, status, issued_from, issued_to)
+    try:
+        if dry_run:
+            matched = await conn.fetchval(f"SELECT count(*) FROM invoices WHERE {where}", *values)
+            return {"matched": matched}
+        # Lock at most max_rows + 1 candidates: enough to detect an exceeded cap
+        # without touching the rest of the table
+        values.append(max_rows + 1 if max_rows is not None else None)
+        query = f"""
+            UPDATE invoices SET status = $1
+            WHERE id IN (
+                SELECT id FROM invoices WHERE {where} ORDER BY id LIMIT ${len(values)} FOR UPDATE
+            )
+            RETURNING {queries.INVOICE_COLUMNS}
+        """
+        async with conn.transaction():
+            rows = await conn.fetch(query, *values)
+            if max_rows is not None and len(rows) > max_rows:
+                raise _TooManyRows()
+        logger.info(f"Bulk status transition to '{new_status}' updated {len(rows)} invoices")
+        return {"invoices": sorted((dict(row) for row in rows), key=lambda row: row["id"])}
+    except _TooManyRows:
+        logger.warning(f"Bulk status transition to '{new_status}' rolled back: more than {max_rows} invoices match")
+        return {"success": False, "error": f"More than {max_rows} invoices match; nothing was updated"}
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in bulk_update_invoice_status: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in bulk_update_invoice_status: {e}")
+        return {"success": False, "error": str(e)}
+
+@query_cache.invalidates("invoices")
 @with_db_connection
 async def delete_invoice(invoice_id: int, conn: Optional[asyncpg.Connection] = None) -> bool:
     """
@@ -193,13 +471,11 @@ async def delete_invoice(invoice_id: int, conn: Optional[asyncpg.Connection] = N
         Boolean indicating if the deletion was successful.
     """
     try:
-        invoice = await get_invoice_by_id(invoice_id, conn=conn)
-        if not invoice:
+        result = await conn.execute(queries.INVOICE_DELETE, invoice_id)
+        if result == "DELETE 0":
             logger.info(f"Invoice with ID {invoice_id} not found for deletion")
             return False
-        query = "DELETE FROM invoices WHERE id = $1"
-        result = await conn.execute(query, invoice_id)
-        return "DELETE" in result
+        return True
     except asyncpg.PostgresError as e:
         logger.error(f"Database error in delete_invoice: {e}")
         return False
@@ -207,6 +483,32 @@ async def delete_invoice(invoice_id: int, conn: Optional[asyncpg.Connection] = N
         logger.error(f"Unexpected error in delete_invoice: {e}")
         return False
 
+@query_cache.invalidates("invoices")
+@with_db_connection
+async def delete_invoice_returning(invoice_id: int, conn: Optional[asyncpg.Connection] = None) -> Optional[Dict[str, Any]]:
+    """
+    Deletes an invoice with a single DELETE ... RETURNING.
+
+    Args:
+        invoice_id: ID of the invoice to delete.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with the deleted invoice data, None if not found, or an error.
+    """
+    try:
+        row = await conn.fetchrow(queries.INVOICE_DELETE_RETURNING, invoice_id)
+        if not row:
+            logger.info(f"Invoice with ID {invoice_id} not found for deletion")
+            return None
+        return dict(row)
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in delete_invoice_returning: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in delete_invoice_returning: {e}")
+        return {"success": False, "error": str(e)}
+
+@query_cache.invalidates("invoices")
 @db_transaction
 async def create_invoice_with_verification(invoice_data: InvoiceCreate, conn: Optional[asyncpg.Connection] = None) -> Dict[str, Any]:
     """
@@ -219,10 +521,7 @@ async def create_invoice_with_verification(invoice_data: InvoiceCreate, conn: Op
         Dictionary with the created invoice data or an error if the client does not exist.
     """
     try:
-        client = await conn.fetchrow(
-            "SELECT id FROM clients WHERE id = $1",
-            invoice_data.client_id
-        )
+        client = await conn.fetchrow(queries.CLIENT_EXISTS, invoice_data.client_id)
         if not client:
             error_msg = f"Cannot create invoice: client with ID {invoice_data.client_id} does not exist"
             logger.error(error_msg)
@@ -1,4 +1,7 @@
 from backend.core.database import database
+from backend.core import queries
+from backend.core.query_cache import query_cache
+from backend.core.table_snapshot import reference_snapshot
 from backend.models.manager import ManagerOut
 from typing import List, Optional, Dict, Any
 from backend.core.logging import get_logger
@@ -8,6 +11,7 @@ logger = get_logger(__name__)
 
 # Service to query authorized managers
 
+@query_cache.cached("managers")
 async def get_manager_by_name(name: str) -> Optional[Dict[str, Any]]:
     """
     Retrieves an authorized manager by their name.
@@ -18,13 +22,17 @@ async def get_manager_by_name(name: str) -> Optional[Dict[str, Any]]:
         Dictionary with manager data or None if not found.
     """
     try:
-        query = "SELECT id, name, email, role, created_at FROM managers WHERE name = $1"
-        row = await database.fetchrow(query, name)
+        if reference_snapshot.managers.ready:
+            manager = reference_snapshot.managers.find("name", name, exact=True)
+            if manager is not None:
+                return manager
+        row = await database.fetchrow(queries.MANAGER_GET_BY_NAME, name, read_only=True)
         return dict(row) if row else None
     except Exception as e:
         logger.error(f"Error in get_manager_by_name: {e}")
         return None
 
+@query_cache.cached("managers")
 async def get_manager_by_email(email: str) -> Optional[Dict[str, Any]]:
     """
     Retrieves an authorized manager by their email.
@@ -35,13 +43,17 @@ async def get_manager_by_email(email: str) -> Optional[Dict[str, Any]]:
         Dictionary with manager data or None if not found.
     """
     try:
-        query = "SELECT id, name, email, role, created_at FROM managers WHERE email = $1"
-        row = await database.fetchrow(query, email)
+        if reference_snapshot.managers.ready:
+            manager = reference_snapshot.managers.find("email", email, exact=True)
+            if manager is not None:
+                return manager
+        row = await database.fetchrow(queries.MANAGER_GET_BY_EMAIL, email, read_only=True)
         return dict(row) if row else None
     except Exception as e:
         logger.error(f"Error in get_manager_by_email: {e}")
         return None
 
+@query_cache.cached("managers")
 async def list_managers() -> List[Dict[str, Any]]:
     """
     Lists all authorized managers.
@@ -50,8 +62,9 @@ async def list_managers() -> List[Dict[str, Any]]:
         List of dictionaries with manager data.
     """
     try:
-        query = "SELECT id, name, email, role, created_at FROM managers ORDER BY id"
-        rows = await database.fetch(query)
+        if reference_snapshot.managers.ready:
+            return reference_snapshot.managers.all()
+        rows = await database.fetch(queries.MANAGERS_LIST, read_only=True)
         return [dict(row) for row in rows]
     except Exception as e:
         logger.error(f"Error in list_managers: {e}")
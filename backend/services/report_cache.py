@@ -0,0 +1,296 @@
+"""
+Cache of the report texts generated by the LLM.
+
+Managers often ask again for the same report while its invoices have not
+changed. ReportTextCache answers those requests with the text generated the
+first time instead of another completion:
+
+- The key is a hash of the report type, client, normalized period, recipient,
+  model and prompt template version (report_prompt.template_version()), plus a
+  fingerprint of the invoices (count, highest id, total amount and a hash of
+  every row), so any change in the invoices gives a new key. Reports whose
+  invoices are summarized in the digest also key on its reference date
+  (report_prompt.digest_date()), since the aging, DSO and days overdue change
+  every day.
+- Entries are stored in the llm_report_cache table (database/llm_report_cache.sql):
+  they survive restarts and are shared by every worker. They are reused for
+  LLM_REPORT_CACHE_TTL seconds.
+- Concurrent requests for the same key in a worker share one generation
+  (single flight). Failed generations are not stored.
+
+Disabled unless LLM_REPORT_CACHE is set; then every request generates its text.
+"""
+
+import asyncio
+import hashlib
+from datetime import date
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+
+from backend.core import queries
+from backend.core.config import LLM_REPORT_CACHE, LLM_REPORT_CACHE_TTL
+from backend.core.decorators import with_db_connection
+from backend.core.logging import get_logger
+from backend.core.periods import parse_period
+
+logger = get_logger(__name__)
+
+# How a request for a report text was answered
+RESULTS = ("hit", "miss", "coalesced", "bypass")
+
+
+def invoices_fingerprint(invoices: List[Dict[str, Any]]) -> str:
+    """
+    Fingerprint of the invoices of a report: their count, highest id and total amount,
+    and a hash of the fields of every invoice (so status or date changes also count).
+    """
+    digest = hashlib.sha256()
+    total = Decimal(0)
+    max_id = None
+    for invoice in sorted(invoices, key=lambda i: i["id"]):
+        total += Decimal(str(invoice["amount"]))
+        max_id = invoice["id"]
+        digest.update(repr((invoice["id"], invoice.get("client_id"), str(invoice["amount"]), invoice.get("status"),
+                            str(invoice.get("issued_at")), str(invoice.get("due_date")))).encode())
+    return f"{len(invoices)}:{max_id}:{total}:{digest.hexdigest()[:32]}"
+
+
+def normalize_period(period: Optional[str]) -> Optional[str]:
+    """
+    The period as its date range, so '2024-Q1' and '2024-01..2024-03' share entries.
+    Periods that do not parse are kept as given (lowercase, spaces collapsed).
+    """
+    if not period or not period.strip():
+        return None
+    try:
+        return str(parse_period(period))
+    except ValueError:
+        return " ".join(period.lower().split())
+
+
+class ReportTextCache:
+    """
+    Postgres-backed report text cache with in-process single flight.
+
+    Args:
+        enabled: Whether texts are cached at all.
+        ttl: Seconds an entry is reused (0: no expiry).
+    """
+    def __init__(self, enabled: bool = LLM_REPORT_CACHE, ttl: int = LLM_REPORT_CACHE_TTL):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.counts = dict.fromkeys(RESULTS, 0)
+        self.errors = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def key(report_type: str, client_id: Optional[int], period: Optional[str], recipient: Optional[str],
+            model: str, template_version: str, fingerprint: str, as_of: Optional[date] = None) -> str:
+        """
+        Cache key of a report: sha256 of all its fields.
+        """
+        parts = (
+            " ".join((report_type or "").lower().split()), client_id, normalize_period(period),
+            (recipient or "").strip().lower(), model, template_version, fingerprint,
+        ) + ((as_of,) if as_of is not None else ())
+        return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()
+
+    async def get_or_generate(self, generate: Callable[[], Awaitable[str]], report_type: str,
+                              client_id: Optional[int], period: Optional[str], recipient: Optional[str],
+                              model: str, template_version: str, invoices: List[Dict[str, Any]],
+                              as_of: Optional[date] = None) -> str:
+        """
+        Returns the cached text of the report, or generates and stores it.
+
+        Args:
+            generate: Coroutine function producing the text (the LLM call).
+            report_type, client_id, period, recipient, model, template_version: Key fields.
+            invoices: Invoices of the report, fingerprinted into the key.
+            as_of: Reference date the report's data depends on (the digest date), if any.
+        Raises:
+            Exception: The error of the generation (it is not cached).
+        """
+        if not self.enabled:
+            self.counts["bypass"] += 1
+            return await generate()
+        fingerprint = invoices_fingerprint(invoices)
+        key = self.key(report_type, client_id, period, recipient, model, template_version, fingerprint, as_of)
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Tasks belong to one loop: start clean when running in a new one
+            self._loop = loop
+            self._inflight = {}
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counts["coalesced"] += 1
+        else:
+            entry = {
+                "cache_key": key, "report_type": report_type, "client_id": client_id,
+                "period": normalize_period(period), "model": model,
+                "template_version": template_version, "data_fingerprint": fingerprint,
+            }
+            task = loop.create_task(self._load(entry, generate))
+            self._inflight[key] = task
+        # Shield the shared generation so one cancelled caller does not cancel the others
+        return await asyncio.shield(task)
+
+    async def _load(self, entry: Dict[str, Any], generate: Callable[[], Awaitable[str]]) -> str:
+        key = entry["cache_key"]
+        try:
+            try:
+                text = await lookup_report_text(key, self.ttl)
+            except Exception as e:
+                # Raised by with_db_connection (e.g. the pool cannot connect)
+                logger.warning(f"Report text cache lookup failed: {e!r}")
+                text = {"success": False, "error": str(e)}
+            if isinstance(text, str):
+                self.counts["hit"] += 1
+                return text
+            if text is not None:
+                # Lookup failed: generate anyway, the cache is only an optimization
+                self.errors += 1
+            self.counts["miss"] += 1
+            text = await generate()
+            if text:
+                try:
+                    result = await store_report_text(entry, text)
+                except Exception as e:
+                    logger.warning(f"Storing a report text in the cache failed: {e!r}")
+                    result = {"success": False, "error": str(e)}
+                if not result.get("success", True):
+                    self.errors += 1
+            return text
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.counts["hit"] + self.counts["miss"] + self.counts["coalesced"]
+        return {
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            **self.counts,
+            "hit_ratio": round((self.counts["hit"] + self.counts["coalesced"]) / lookups, 4) if lookups else None,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+        }
+
+
+@with_db_connection
+async def lookup_report_text(cache_key: str, ttl: int, conn: Optional[asyncpg.Connection] = None):
+    """
+    Retrieves a cached report text and counts the hit.
+
+    Args:
+        cache_key: Key of the report.
+        ttl: Seconds an entry is valid (0: no expiry).
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        The report text, None if it is not cached or expired, or an error dictionary.
+    """
+    try:
+        return await conn.fetchval(queries.LLM_REPORT_CACHE_GET, cache_key, float(ttl))
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in lookup_report_text: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in lookup_report_text: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@with_db_connection
+async def store_report_text(entry: Dict[str, Any], report_text: str,
+                            conn: Optional[asyncpg.Connection] = None) -> Dict[str, Any]:
+    """
+    Stores (or replaces) a generated report text.
+
+    Args:
+        entry: Key fields (cache_key, report_type, client_id, period, model, template_version, data_fingerprint).
+        report_text: Generated report text.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with success True/False and error if applicable.
+    """
+    try:
+        await conn.execute(
+            queries.LLM_REPORT_CACHE_PUT,
+            entry["cache_key"], entry["report_type"], entry["client_id"], entry["period"],
+            entry["model"], entry["template_version"], entry["data_fingerprint"], report_text
+        )
+        return {"success": True}
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in store_report_text: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in store_report_text: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@with_db_connection
+async def prune_report_texts(ttl: int = LLM_REPORT_CACHE_TTL, conn: Optional[asyncpg.Connection] = None) -> Dict[str, Any]:
+    """
+    Deletes the report texts older than ttl seconds (none when ttl is 0).
+
+    Args:
+        ttl: Seconds an entry is valid.
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with the number of entries deleted, or an error.
+    """
+    try:
+        status = await conn.execute(queries.LLM_REPORT_CACHE_PRUNE, float(ttl))
+        return {"deleted": int(status.split()[-1])}
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in prune_report_texts: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in prune_report_texts: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@with_db_connection
+async def clear_report_texts(conn: Optional[asyncpg.Connection] = None) -> Dict[str, Any]:
+    """
+    Deletes every cached report text.
+
+    Args:
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with the number of entries deleted, or an error.
+    """
+    try:
+        status = await conn.execute(queries.LLM_REPORT_CACHE_CLEAR)
+        return {"deleted": int(status.split()[-1])}
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in clear_report_texts: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in clear_report_texts: {e}")
+        return {"success": False, "error": str(e)}
+
+
+@with_db_connection(read_only=True)
+async def report_cache_table_stats(conn: Optional[asyncpg.Connection] = None) -> Dict[str, Any]:
+    """
+    Retrieves the number of stored report texts and their total hits (all workers).
+
+    Args:
+        conn: Optional database connection. If not provided, a new one is created.
+    Returns:
+        Dictionary with entries and hits, or an error.
+    """
+    try:
+        return dict(await conn.fetchrow(queries.LLM_REPORT_CACHE_STATS))
+    except asyncpg.PostgresError as e:
+        logger.error(f"Database error in report_cache_table_stats: {e}")
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected error in report_cache_table_stats: {e}")
+        return {"success": False, "error": str(e)}
+
+
+# Singleton instance used by generate_report and the report_cache admin tool
+report_cache = ReportTextCache()
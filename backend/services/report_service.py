@@ -1,6 +1,10 @@
 import asyncpg
+from backend.core import queries
+from backend.core.periods import parse_period
+from backend.core.table_snapshot import reference_snapshot
+from backend.services.report_writer import report_writer
 
-async def save_report(conn, client_id, client_name, period, manager_email, manager_name, report_type, report_text):
+async def save_report(conn, client_id, client_name, period, manager_email, manager_name, report_type, report_text, delivery_id=None):
     """
     Saves a report in the database.
 
@@ -13,16 +17,43 @@ async def save_report(conn, client_id, client_name, period, manager_email, manag
         manager_name: Recipient manager's name.
         report_type: Report type.
         report_text: Generated HTML report text.
+        delivery_id: Email delivery of the report (report_deliveries), if any.
     Returns:
         Dictionary with success True/False and error if applicable.
     """
     try:
         await conn.execute(
-            """
-            INSERT INTO reports (client_id, client_name, period, manager_email, manager_name, report_type, report_text)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-            """,
-            client_id, client_name, period, manager_email, manager_name, report_type, report_text
+            queries.REPORT_INSERT,
+            client_id, client_name, period, manager_email, manager_name, report_type, report_text, delivery_id
+        )
+        return {"success": True}
+    except asyncpg.PostgresError as e:
+        return {"success": False, "error": str(e)}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+async def queue_report(client_id, client_name, period, manager_email, manager_name, report_type, report_text,
+                       delivery_id=None, durable=False):
+    """
+    Saves a report through the write-behind queue on the shared connection pool.
+
+    Args:
+        client_id: Associated client ID (can be None).
+        client_name: Client name (can be None).
+        period: Report period (can be None).
+        manager_email: Recipient manager's email.
+        manager_name: Recipient manager's name.
+        report_type: Report type.
+        report_text: Generated HTML report text.
+        delivery_id: Email delivery of the report (report_deliveries), if any.
+        durable: Wait until the report is committed instead of returning once it is queued.
+    Returns:
+        Dictionary with success True/False and error if applicable.
+    """
+    try:
+        await report_writer.submit(
+            (client_id, client_name, period, manager_email, manager_name, report_type, report_text, delivery_id),
+            durable=durable
         )
         return {"success": True}
     except asyncpg.PostgresError as e:
@@ -40,27 +71,28 @@ async def get_client_by_name(name: str, conn=None):
         Dictionary with client data or None if not found.
     """
     if conn is not None:
-        row = await conn.fetchrow(
-            "SELECT id, name, city, email, created_at FROM clients WHERE LOWER(name) = LOWER($1)",
-            name
-        )
+        row = await conn.fetchrow(queries.CLIENT_GET_BY_NAME, name)
+        return dict(row) if row else None
+    # The in-memory replica answers hits; a miss is checked in the database
+    client = reference_snapshot.clients.find("name", name) if reference_snapshot.clients.ready else None
+    if client is not None:
+        return client
+    from backend.core.database import database
+    async with database.connection(read_only=True) as conn:
+        row = await conn.fetchrow(queries.CLIENT_GET_BY_NAME, name)
         return dict(row) if row else None
-    else:
-        from backend.core.database import database
-        async with database.connection() as conn:
-            row = await conn.fetchrow(
-                "SELECT id, name, city, email, created_at FROM clients WHERE LOWER(name) = LOWER($1)",
-                name
-            )
-            return dict(row) if row else None
 
 def filter_invoices_by_period(invoices, period):
     """
-    Filters a list of invoices by period (year, month, etc.) in the issued_at field.
+    Filters a list of invoices already in memory by period on the issued_at field.
+    Reports filter in SQL instead (invoice_service.get_invoices_by_period).
     Args:
         invoices: List of invoice dictionaries.
-        period: String to search for in issued_at (e.g., '2024').
+        period: Period in any form accepted by backend.core.periods (e.g., '2024', '2024-01', '2024-Q1').
     Returns:
         Filtered list of invoices.
+    Raises:
+        ValueError: If the period is not valid.
     """
-    return [i for i in invoices if period in str(i.get('issued_at', ''))] 
\ No newline at end of file
+    issued = parse_period(period)
+    return [i for i in invoices if i.get('issued_at') is not None and issued.contains(i['issued_at'])] 
\ No newline at end of file
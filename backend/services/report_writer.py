@@ -0,0 +1,183 @@
+"""
+Write-behind persistence for generated reports.
+
+Reports are queued in a bounded asyncio queue and written by a background task
+on the shared Database pool. Every write takes all the reports queued at that
+moment (up to REPORT_BATCH_SIZE) and stores them with a single binary COPY, so
+under load many reports cost one round trip. Callers that need the report to be
+stored before answering pass durable=True and wait for their batch to commit.
+
+A batch that fails because the database or the pool are unavailable (connection
+errors, acquire timeouts, server shutdown, serialization failures) is written
+again with exponential backoff, up to REPORT_WRITE_MAX_RETRIES times; only other
+errors, caused by the values of some report, split the batch one report at a time.
+"""
+
+import asyncio
+import contextvars
+import random
+from typing import List, Optional, Tuple
+
+import asyncpg
+
+from backend.core.config import (
+    REPORT_QUEUE_MAX_SIZE, REPORT_BATCH_SIZE, REPORT_FLUSH_TIMEOUT,
+    REPORT_WRITE_MAX_RETRIES, REPORT_WRITE_RETRY_BASE_DELAY, REPORT_WRITE_RETRY_MAX_DELAY
+)
+from backend.core.database import database
+from backend.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Column order of the records passed to submit()
+REPORT_COLUMNS = (
+    "client_id", "client_name", "period", "manager_email", "manager_name", "report_type", "report_text", "delivery_id"
+)
+
+# Errors after which the same batch is written again later: nothing is wrong with the reports
+TRANSIENT_ERRORS = (
+    OSError, asyncio.TimeoutError, asyncpg.InterfaceError, asyncpg.PostgresConnectionError,
+    asyncpg.OperatorInterventionError, asyncpg.InsufficientResourcesError, asyncpg.TransactionRollbackError,
+)
+
+_QueueItem = Tuple[tuple, Optional[asyncio.Future]]
+
+
+class ReportWriter:
+    """
+    Bounded write-behind queue that batches report INSERTs.
+    """
+    def __init__(self, max_queue_size: int = REPORT_QUEUE_MAX_SIZE, batch_size: int = REPORT_BATCH_SIZE,
+                 max_retries: int = REPORT_WRITE_MAX_RETRIES, retry_base_delay: float = REPORT_WRITE_RETRY_BASE_DELAY,
+                 retry_max_delay: float = REPORT_WRITE_RETRY_MAX_DELAY):
+        self.max_queue_size = max_queue_size
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max(0, max_retries)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        if self._worker is None or self._worker.done():
+            # Empty context: the worker outlives the traced call that starts it
+            self._worker = asyncio.create_task(self._run(), context=contextvars.Context())
+        return self._queue
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of reports queued and not yet written.
+        """
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, record: tuple, durable: bool = False) -> None:
+        """
+        Queues a report to be written. Blocks while the queue is full.
+
+        Args:
+            record: Report values in REPORT_COLUMNS order.
+            durable: Wait until the report is committed to the database.
+        Raises:
+            RuntimeError: If the writer has been closed.
+            Exception: With durable=True, the error that prevented the write.
+        """
+        if self._closed:
+            raise RuntimeError("Report writer is closed")
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future() if durable else None
+        await queue.put((record, future))
+        if future is not None:
+            await future
+
+    async def _run(self):
+        """
+        Background task: writes the queued reports in batches.
+        """
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    async def _write(self, batch: List[_QueueItem], attempt: int = 0):
+        """
+        Writes a batch with COPY. Transient failures are retried with backoff (the
+        queue fills up meanwhile, so callers block instead of reports being lost).
+        If the batch fails otherwise, its reports are written one by one so a single
+        bad report does not take the others down.
+        """
+        try:
+            async with database.connection() as conn:
+                await conn.copy_records_to_table(
+                    "reports", records=[record for record, _ in batch], columns=REPORT_COLUMNS
+                )
+        except asyncio.CancelledError:
+            raise
+        except TRANSIENT_ERRORS as e:
+            if attempt < self.max_retries:
+                delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+                logger.warning(f"Writing {len(batch)} reports failed ({e!r}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                await self._write(batch, attempt + 1)
+                return
+            logger.error(f"Could not store {len(batch)} reports after {attempt + 1} attempts: {e!r}")
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+        except Exception as e:
+            if len(batch) > 1:
+                logger.warning(f"Writing a batch of {len(batch)} reports failed, retrying one by one: {e}")
+                for item in batch:
+                    await self._write([item])
+                return
+            logger.error(f"Could not store report: {e}")
+            future = batch[0][1]
+            if future is not None and not future.done():
+                future.set_exception(e)
+            return
+        logger.debug(f"Stored {len(batch)} reports")
+        for _, future in batch:
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    async def flush(self):
+        """
+        Waits until every queued report has been written.
+        """
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self, timeout: float = REPORT_FLUSH_TIMEOUT):
+        """
+        Stops accepting reports, flushes the queue and stops the background task.
+
+        Args:
+            timeout: Seconds to wait for the pending reports to be written.
+        """
+        self._closed = True
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out flushing reports on shutdown; {self.pending} reports were not stored")
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        logger.info("Report writer closed")
+
+
+# Singleton instance used by the report tools
+report_writer = ReportWriter()
@@ -30,12 +30,34 @@ CREATE TABLE IF NOT EXISTS reports (
     manager_name TEXT NOT NULL,
     report_type TEXT NOT NULL,
     report_text TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    delivery_id UUID                  -- Envío del informe por email (report_deliveries)
+);
+-- Para bases de datos creadas antes de la columna delivery_id
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS delivery_id UUID;
+
+-- Estado del envío por email de cada informe, escrito por el despachador de emails.
+-- Es una tabla aparte porque el informe se guarda en segundo plano y puede llegar después del estado.
+CREATE TABLE IF NOT EXISTS report_deliveries (
+    delivery_id UUID PRIMARY KEY,
+    recipient TEXT NOT NULL,
+    subject TEXT,
+    status TEXT NOT NULL,             -- 'queued', 'sent', 'failed'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
 );
 
 -- Para invoices
 -- Índice para búsquedas rápidas de facturas por cliente (recomendado para escalabilidad)
 CREATE INDEX IF NOT EXISTS idx_invoices_client_id ON invoices(client_id);
+-- Índice compuesto para la paginación por cursor (keyset) de las facturas de un cliente
+CREATE INDEX IF NOT EXISTS idx_invoices_client_id_id ON invoices(client_id, id);
+-- Índices para filtrar los informes por periodo (rango de issued_at), de todos los clientes o de uno
+CREATE INDEX IF NOT EXISTS idx_invoices_issued_at ON invoices(issued_at);
+CREATE INDEX IF NOT EXISTS idx_invoices_client_id_issued_at ON invoices(client_id, issued_at);
 
 
 -- Inserción de Clientes y sus Facturas Intercaladas
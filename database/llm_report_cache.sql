@@ -0,0 +1,21 @@
+-- Caché de los textos de informe generados por el LLM (LLM_REPORT_CACHE).
+-- La clave es un hash del tipo de informe, el cliente, el periodo, el modelo, la versión de la
+-- plantilla del prompt y la huella de las facturas: si las facturas cambian, la clave cambia.
+-- Compartida por todos los workers y persistente entre reinicios. Es idempotente.
+
+CREATE TABLE IF NOT EXISTS llm_report_cache (
+    cache_key TEXT PRIMARY KEY,       -- sha256 de todos los campos de la clave
+    report_type TEXT NOT NULL,
+    client_id INTEGER,                -- NULL para informes globales
+    period TEXT,                      -- Periodo normalizado (p. ej. '2024-01-01 to 2024-12-31'); NULL sin periodo
+    model TEXT NOT NULL,
+    template_version TEXT NOT NULL,
+    data_fingerprint TEXT NOT NULL,
+    report_text TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_hit_at TIMESTAMP
+);
+
+-- Índice para purgar las entradas caducadas (LLM_REPORT_CACHE_TTL)
+CREATE INDEX IF NOT EXISTS idx_llm_report_cache_created_at ON llm_report_cache(created_at);
@@ -0,0 +1,79 @@
+-- Notificación de cambios en las tablas para la caché de consultas del servidor (QUERY_CACHE).
+-- Cada sentencia que modifica clients, invoices o managers envía el nombre de la tabla por el
+-- canal 'table_changes' (QUERY_CACHE_CHANNEL). PostgreSQL entrega la notificación al confirmar
+-- la transacción y agrupa las repetidas, así que una carga masiva genera una sola notificación.
+-- Se ejecuta después de create_tables.sql y managers.sql; es idempotente.
+
+CREATE OR REPLACE FUNCTION notify_table_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('table_changes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    table_name TEXT;
+BEGIN
+    FOREACH table_name IN ARRAY ARRAY['clients', 'invoices', 'managers'] LOOP
+        -- managers se crea en managers.sql: se omite si todavía no existe
+        IF to_regclass(table_name) IS NOT NULL THEN
+            EXECUTE format(
+                'CREATE OR REPLACE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+                'FOR EACH STATEMENT EXECUTE FUNCTION notify_table_change()',
+                table_name || '_notify_change', table_name
+            );
+        END IF;
+    END LOOP;
+END;
+$$;
+
+-- Réplica en memoria de clients y managers (REFERENCE_SNAPSHOT): cada fila insertada, modificada
+-- o borrada se envía como JSON por el canal 'row_changes' (REFERENCE_SNAPSHOT_CHANNEL).
+-- Si la fila no cabe en una notificación (8000 bytes) solo se envía su id y el servidor la relee.
+
+CREATE OR REPLACE FUNCTION notify_row_change() RETURNS trigger AS $$
+DECLARE
+    payload TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        payload := json_build_object('table', TG_TABLE_NAME, 'op', TG_OP)::text;
+    ELSIF TG_OP = 'DELETE' THEN
+        payload := json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'id', OLD.id)::text;
+    ELSE
+        payload := json_build_object(
+            'table', TG_TABLE_NAME, 'op', TG_OP, 'row', row_to_json(NEW),
+            'old_id', CASE WHEN TG_OP = 'UPDATE' THEN OLD.id END
+        )::text;
+        IF octet_length(payload) > 7900 THEN
+            payload := json_build_object(
+                'table', TG_TABLE_NAME, 'op', TG_OP, 'id', NEW.id,
+                'old_id', CASE WHEN TG_OP = 'UPDATE' THEN OLD.id END
+            )::text;
+        END IF;
+    END IF;
+    PERFORM pg_notify('row_changes', payload);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    table_name TEXT;
+BEGIN
+    FOREACH table_name IN ARRAY ARRAY['clients', 'managers'] LOOP
+        IF to_regclass(table_name) IS NOT NULL THEN
+            EXECUTE format(
+                'CREATE OR REPLACE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE ON %I '
+                'FOR EACH ROW EXECUTE FUNCTION notify_row_change()',
+                table_name || '_notify_row_change', table_name
+            );
+            EXECUTE format(
+                'CREATE OR REPLACE TRIGGER %I AFTER TRUNCATE ON %I '
+                'FOR EACH STATEMENT EXECUTE FUNCTION notify_row_change()',
+                table_name || '_notify_truncate', table_name
+            );
+        END IF;
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,7 @@
+#!/bin/sh
+# allow_replication.sh
+# Allows streaming replication connections from the Docker network, so the
+# optional db_replica service (profile "replica") can clone and follow the primary.
+# Runs once, when the primary's data volume is initialized.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,111 @@
+-- Cubo de facturación: número de facturas e importe total por cliente, mes de emisión y estado.
+-- La herramienta billing_summary responde a partir de esta tabla (agrupando por cliente, ciudad,
+-- mes y estado) sin recorrer invoices, así que su coste no depende del volumen de facturas.
+-- Los triggers de invoices la mantienen al día en la misma transacción que la escritura.
+-- Se ejecuta después de create_tables.sql; es idempotente y reconstruye el cubo al final,
+-- así que también sirve para instalarlo en una base de datos existente.
+
+CREATE TABLE IF NOT EXISTS billing_summary (
+    client_id INTEGER,                -- Sin clave foránea: al borrar un cliente sus facturas se borran en cascada y restan aquí
+    month DATE,                       -- Primer día del mes de issued_at
+    status TEXT,
+    invoice_count BIGINT NOT NULL,
+    total_amount NUMERIC NOT NULL,
+    -- Las columnas de invoices admiten NULL: se agrupan como un valor más
+    CONSTRAINT billing_summary_key UNIQUE NULLS NOT DISTINCT (client_id, month, status)
+);
+
+-- Índice parcial con las filas que se han quedado a cero, para borrarlas sin recorrer el cubo
+CREATE INDEX IF NOT EXISTS idx_billing_summary_empty ON billing_summary(client_id) WHERE invoice_count = 0;
+-- Índice para consultar el cubo por rango de meses
+CREATE INDEX IF NOT EXISTS idx_billing_summary_month ON billing_summary(month);
+
+-- Suma al cubo las filas nuevas y resta las antiguas de cada sentencia (tablas de transición),
+-- de modo que una carga masiva hace una sola actualización por grupo. Los grupos se actualizan
+-- ordenados por clave para que dos transacciones concurrentes no se bloqueen mutuamente.
+CREATE OR REPLACE FUNCTION maintain_billing_summary() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM billing_summary;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO billing_summary AS s (client_id, month, status, invoice_count, total_amount)
+        SELECT client_id, date_trunc('month', issued_at)::date, status, count(*), sum(amount)
+        FROM new_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT ON CONSTRAINT billing_summary_key DO UPDATE
+        SET invoice_count = s.invoice_count + EXCLUDED.invoice_count,
+            total_amount = s.total_amount + EXCLUDED.total_amount;
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'UPDATE' THEN
+        INSERT INTO billing_summary AS s (client_id, month, status, invoice_count, total_amount)
+        SELECT client_id, month, status, sum(invoice_count), sum(total_amount)
+        FROM (
+            SELECT client_id, date_trunc('month', issued_at)::date AS month, status, 1 AS invoice_count, amount AS total_amount
+            FROM new_rows
+            UNION ALL
+            SELECT client_id, date_trunc('month', issued_at)::date, status, -1, -amount
+            FROM old_rows
+        ) changes
+        GROUP BY 1, 2, 3
+        -- Las modificaciones que no cambian ningún grupo (p. ej. due_date) no tocan el cubo
+        HAVING sum(invoice_count) <> 0 OR sum(total_amount) <> 0
+        ORDER BY 1, 2, 3
+        ON CONFLICT ON CONSTRAINT billing_summary_key DO UPDATE
+        SET invoice_count = s.invoice_count + EXCLUDED.invoice_count,
+            total_amount = s.total_amount + EXCLUDED.total_amount;
+    ELSE
+        INSERT INTO billing_summary AS s (client_id, month, status, invoice_count, total_amount)
+        SELECT client_id, date_trunc('month', issued_at)::date, status, -count(*), -sum(amount)
+        FROM old_rows GROUP BY 1, 2, 3 ORDER BY 1, 2, 3
+        ON CONFLICT ON CONSTRAINT billing_summary_key DO UPDATE
+        SET invoice_count = s.invoice_count + EXCLUDED.invoice_count,
+            total_amount = s.total_amount + EXCLUDED.total_amount;
+    END IF;
+
+    -- Solo se pueden vaciar los grupos de los que se han restado filas
+    DELETE FROM billing_summary s
+    USING (SELECT DISTINCT client_id, date_trunc('month', issued_at)::date AS month, status FROM old_rows) o
+    WHERE s.invoice_count = 0
+      AND s.client_id IS NOT DISTINCT FROM o.client_id
+      AND s.month IS NOT DISTINCT FROM o.month
+      AND s.status IS NOT DISTINCT FROM o.status;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Las tablas de transición solo se admiten en triggers de un único evento: uno por operación
+CREATE OR REPLACE TRIGGER invoices_billing_summary_insert AFTER INSERT ON invoices
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_billing_summary();
+CREATE OR REPLACE TRIGGER invoices_billing_summary_update AFTER UPDATE ON invoices
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_billing_summary();
+CREATE OR REPLACE TRIGGER invoices_billing_summary_delete AFTER DELETE ON invoices
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_billing_summary();
+CREATE OR REPLACE TRIGGER invoices_billing_summary_truncate AFTER TRUNCATE ON invoices
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_billing_summary();
+
+-- Reconstrucción completa del cubo desde invoices (cargas con los triggers desactivados,
+-- restauraciones, o si se sospecha que no cuadra). Bloquea las escrituras en invoices mientras
+-- dura, pero no las lecturas del cubo. Devuelve el número de grupos.
+-- Uso: SELECT rebuild_billing_summary();  (o la herramienta rebuild_billing_summary)
+CREATE OR REPLACE FUNCTION rebuild_billing_summary() RETURNS BIGINT AS $$
+DECLARE
+    group_count BIGINT;
+BEGIN
+    LOCK TABLE invoices IN SHARE MODE;
+    DELETE FROM billing_summary;
+    INSERT INTO billing_summary (client_id, month, status, invoice_count, total_amount)
+    SELECT client_id, date_trunc('month', issued_at)::date, status, count(*), sum(amount)
+    FROM invoices GROUP BY 1, 2, 3;
+    GET DIAGNOSTICS group_count = ROW_COUNT;
+    RETURN group_count;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_billing_summary();
@@ -45,6 +45,8 @@ TEST_DB_NAME = os.getenv("DB_NAME_TEST", "ai_client_mcp_db_test") # IMPORTANT: U
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SQL_CREATE_TABLES_PATH = os.path.join(BASE_DIR, "database", "create_tables.sql")
+SQL_BILLING_SUMMARY_PATH = os.path.join(BASE_DIR, "database", "summary_billing.sql")
+SQL_LLM_REPORT_CACHE_PATH = os.path.join(BASE_DIR, "database", "llm_report_cache.sql")
 
 async def create_test_db_if_not_exists():
     """
@@ -102,8 +104,9 @@ async def db_engine_pool():
         # Applies the SQL schema to the test DB
         async with pool.acquire() as connection:
             logger.info(f"Applying schema from {SQL_CREATE_TABLES_PATH} to test database {TEST_DB_NAME}...")
-            with open(SQL_CREATE_TABLES_PATH, "r") as f:
-                await connection.execute(f.read())
+            for path in (SQL_CREATE_TABLES_PATH, SQL_BILLING_SUMMARY_PATH, SQL_LLM_REPORT_CACHE_PATH):
+                with open(path, "r") as f:
+                    await connection.execute(f.read())
             logger.info("Schema applied.")
         
         yield pool # Provide the pool to dependent fixtures/tests
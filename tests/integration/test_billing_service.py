@@ -0,0 +1,52 @@
+# tests/integration/test_billing_service.py
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from backend.services.client_service import create_client
+from backend.services.invoice_service import create_invoice, bulk_create_invoices, bulk_update_invoice_status, delete_invoice
+from backend.services.billing_service import get_billing_summary, rebuild_billing_summary
+from backend.models.invoice import InvoiceCreate
+
+# Integration tests for the billing summary maintained by the invoice triggers
+# (database/summary_billing.sql, applied by the db_engine_pool fixture)
+
+async def summary(conn, client_id):
+    groups = await get_billing_summary(("month", "status"), client_id=client_id, conn=conn)
+    return {(g["month"], g["status"]): (g["invoice_count"], g["total_amount"]) for g in groups}
+
+@pytest.mark.asyncio
+async def test_summary_follows_invoice_writes(db_conn):
+    """
+    Test that inserts (single and COPY), status changes and deletes are reflected
+    in the summary, and that emptied groups disappear.
+    """
+    client = await create_client("Billing Client", "Billing City", "billing@example.com", conn=db_conn)
+    jan, feb = date(2024, 1, 10), date(2024, 2, 5)
+    first = await create_invoice(InvoiceCreate(client_id=client["id"], amount=Decimal("10.00"), issued_at=jan), conn=db_conn)
+    await bulk_create_invoices([
+        InvoiceCreate(client_id=client["id"], amount=Decimal("20.00"), issued_at=jan),
+        InvoiceCreate(client_id=client["id"], amount=Decimal("5.50"), issued_at=feb, status="paid"),
+    ], conn=db_conn)
+    assert await summary(db_conn, client["id"]) == {
+        (date(2024, 1, 1), "pending"): (2, Decimal("30.00")),
+        (date(2024, 2, 1), "paid"): (1, Decimal("5.50")),
+    }
+
+    await bulk_update_invoice_status("paid", client_id=client["id"], status="pending", conn=db_conn)
+    await delete_invoice(first["id"], conn=db_conn)
+    assert await summary(db_conn, client["id"]) == {
+        (date(2024, 1, 1), "paid"): (1, Decimal("20.00")),
+        (date(2024, 2, 1), "paid"): (1, Decimal("5.50")),
+    }
+
+    # Grouping by city across months, and a rebuild gives the same totals
+    groups = await get_billing_summary(("city",), city="billing city", conn=db_conn)
+    assert groups == [{"city": "Billing City", "invoice_count": 2, "total_amount": Decimal("25.50")}]
+    assert (await rebuild_billing_summary(conn=db_conn))["groups"] > 0
+    assert await get_billing_summary(("city",), city="billing city", conn=db_conn) == groups
+
+@pytest.mark.asyncio
+async def test_invalid_group_by(db_conn):
+    result = await get_billing_summary(("client", "country"), conn=db_conn)
+    assert result["success"] is False
@@ -1,6 +1,7 @@
 # tests/integration/test_client_services.py
 import pytest
-from backend.services.client_service import create_client, get_client_by_id, delete_client, update_client
+from backend.services.client_service import create_client, get_client_by_id, delete_client, update_client, bulk_create_clients
+from backend.models.client import ClientCreate
 from backend.models.client import ClientUpdate
 # Pydantic models like ClientCreate are not strictly necessary here
 # since the refactored service functions take direct arguments.
@@ -72,4 +73,40 @@ async def test_update_client_no_changes(db_conn):
     assert updated["id"] == client_id
     assert updated["name"] == client["name"]
     assert updated["city"] == client["city"]
-    assert updated["email"] == client["email"] 
\ No newline at end of file
+    assert updated["email"] == client["email"] 
+@pytest.mark.asyncio
+async def test_prepare_statements_on_test_db(db_conn):
+    """
+    Tests that the registered statements prepare against the real schema.
+    The managers table is created by init_managers, not by the test schema.
+    """
+    from backend.core.queries import prepare_statements, registered_queries
+    prepared = await prepare_statements(db_conn)
+    expected = [name for name in registered_queries() if not name.startswith("managers.")]
+    assert prepared == len(expected)
+    # The connection is still usable after the failed prepares
+    assert await db_conn.fetchval("SELECT 1") == 1
+
+@pytest.mark.asyncio
+async def test_bulk_create_clients(db_conn):
+    """
+    Tests that bulk-created clients are stored and returned in input order.
+    """
+    rows = [ClientCreate(name=f"Bulk Client {n}", city="Bulk City") for n in range(3)]
+    created = await bulk_create_clients(rows, conn=db_conn)
+    assert [c["name"] for c in created] == ["Bulk Client 0", "Bulk Client 1", "Bulk Client 2"]
+    stored = await get_client_by_id(created[1]["id"], conn=db_conn)
+    assert stored["name"] == "Bulk Client 1"
+    assert stored["created_at"] == created[1]["created_at"]
+
+@pytest.mark.asyncio
+async def test_get_clients_by_ids(db_conn):
+    """
+    Tests the batch lookup used by the client loader.
+    """
+    from backend.services.client_service import get_clients_by_ids
+    first = await create_client("Batch Lookup One", "City", None, conn=db_conn)
+    second = await create_client("Batch Lookup Two", "City", None, conn=db_conn)
+    found = await get_clients_by_ids([first["id"], second["id"], second["id"] + 100000], conn=db_conn)
+    assert set(found) == {first["id"], second["id"]}
+    assert found[second["id"]]["name"] == "Batch Lookup Two"
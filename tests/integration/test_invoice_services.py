@@ -10,8 +10,16 @@ from backend.services.invoice_service import (
     get_invoice_by_id,
     update_invoice,
     get_invoices_by_client_id,
-    delete_invoice
+    delete_invoice,
+    iter_all_invoices,
+    bulk_create_invoices,
+    bulk_update_invoice_status,
+    delete_invoice_returning,
+    get_invoices_by_period,
+    get_invoice_frame
 )
+from backend.core.invoice_frame import InvoiceFrame
+from backend.core.report_prompt import billing_data
 from backend.models.invoice import InvoiceCreate, InvoiceUpdate
 
 # Integration tests for the invoice service
@@ -194,4 +202,136 @@ async def test_update_invoice_no_changes(db_conn):
     # Should return the original invoice
     assert updated["id"] == invoice_id
     assert updated["client_id"] == client_id
-    assert updated["amount"] == invoice["amount"] 
\ No newline at end of file
+    assert updated["amount"] == invoice["amount"] 
+@pytest.mark.asyncio
+async def test_get_invoices_by_client_id_keyset_pages(db_conn):
+    # Create client and three invoices
+    client = await create_client("Paged Invoices Client", "Paged City", "paged.invoices@example.com", conn=db_conn)
+    client_id = client["id"]
+    created_ids = []
+    for amount in ("10.00", "20.00", "30.00"):
+        invoice = await create_invoice(InvoiceCreate(client_id=client_id, amount=Decimal(amount)), conn=db_conn)
+        created_ids.append(invoice["id"])
+    # First page
+    first_page = await get_invoices_by_client_id(client_id, limit=2, conn=db_conn)
+    assert [i["id"] for i in first_page] == created_ids[:2]
+    # Next page starts after the last id of the previous one
+    second_page = await get_invoices_by_client_id(client_id, limit=2, after_id=first_page[-1]["id"], conn=db_conn)
+    assert [i["id"] for i in second_page] == created_ids[2:]
+
+@pytest.mark.asyncio
+async def test_iter_all_invoices_streams_in_chunks(db_conn):
+    # Create client and three invoices
+    client = await create_client("Streamed Invoices Client", "Stream City", "stream.invoices@example.com", conn=db_conn)
+    created_ids = []
+    for amount in ("1.00", "2.00", "3.00"):
+        invoice = await create_invoice(InvoiceCreate(client_id=client["id"], amount=Decimal(amount)), conn=db_conn)
+        created_ids.append(invoice["id"])
+    # Stream everything in chunks of two rows
+    chunks = [chunk async for chunk in iter_all_invoices(chunk_size=2, conn=db_conn)]
+    assert all(0 < len(chunk) <= 2 for chunk in chunks)
+    streamed_ids = [invoice["id"] for chunk in chunks for invoice in chunk]
+    assert streamed_ids == sorted(streamed_ids)
+    assert set(created_ids) <= set(streamed_ids)
+
+@pytest.mark.asyncio
+async def test_bulk_create_invoices_reports_unknown_clients(db_conn):
+    # Create a client; the second row references a client that does not exist
+    client = await create_client("Bulk Invoices Client", "Bulk City", "bulk.invoices@example.com", conn=db_conn)
+    missing_client_id = client["id"] + 100000
+    rows = [
+        InvoiceCreate(client_id=client["id"], amount=Decimal("10.00"), status="paid"),
+        InvoiceCreate(client_id=missing_client_id, amount=Decimal("20.00")),
+        InvoiceCreate(client_id=client["id"], amount=Decimal("30.00"), issued_at=date(2024, 1, 31)),
+    ]
+    # all_or_nothing inserts nothing when a client is unknown
+    result = await bulk_create_invoices(rows, all_or_nothing=True, conn=db_conn)
+    assert result["created"] == {}
+    assert list(result["errors"]) == [1]
+    assert await get_invoices_by_client_id(client["id"], conn=db_conn) == []
+    # Otherwise the valid rows are inserted and the bad one is reported
+    result = await bulk_create_invoices(rows, conn=db_conn)
+    assert set(result["created"]) == {0, 2}
+    assert str(missing_client_id) in result["errors"][1]
+    assert result["created"][0]["status"] == "paid"
+    assert result["created"][2]["issued_at"] == date(2024, 1, 31)
+    stored = await get_invoices_by_client_id(client["id"], conn=db_conn)
+    assert [i["id"] for i in stored] == [result["created"][0]["id"], result["created"][2]["id"]]
+    assert stored[1]["amount"] == Decimal("30.00")
+
+@pytest.mark.asyncio
+async def test_bulk_update_invoice_status(db_conn):
+    # Create client with two pending invoices and one already paid
+    client = await create_client("Bulk Status Client", "Status City", "bulk.status@example.com", conn=db_conn)
+    pending = [
+        await create_invoice(InvoiceCreate(client_id=client["id"], amount=Decimal(amount)), conn=db_conn)
+        for amount in ("10.00", "20.00")
+    ]
+    await create_invoice(InvoiceCreate(client_id=client["id"], amount=Decimal("30.00"), status="paid"), conn=db_conn)
+    # Dry run counts only the invoices that would change
+    result = await bulk_update_invoice_status("paid", client_id=client["id"], dry_run=True, conn=db_conn)
+    assert result == {"matched": 2}
+    # A cap below the number of matches updates nothing
+    result = await bulk_update_invoice_status("paid", client_id=client["id"], max_rows=1, conn=db_conn)
+    assert result["success"] is False
+    assert (await get_invoice_by_id(pending[0]["id"], conn=db_conn))["status"] == "pending"
+    # The real transition updates both pending invoices in one statement
+    result = await bulk_update_invoice_status("paid", client_id=client["id"], max_rows=2, conn=db_conn)
+    assert [i["id"] for i in result["invoices"]] == [i["id"] for i in pending]
+    assert all(i["status"] == "paid" for i in result["invoices"])
+    # Selecting by ids combined with a filter
+    result = await bulk_update_invoice_status("canceled", invoice_ids=[pending[1]["id"]], status="paid", conn=db_conn)
+    assert [i["id"] for i in result["invoices"]] == [pending[1]["id"]]
+    # Without any selector nothing is touched
+    result = await bulk_update_invoice_status("paid", conn=db_conn)
+    assert result["success"] is False
+
+@pytest.mark.asyncio
+async def test_single_statement_mutations(db_conn):
+    # Create client and invoice
+    client = await create_client("Single Statement Client", "Mutation City", "single.statement@example.com", conn=db_conn)
+    invoice = await create_invoice(InvoiceCreate(client_id=client["id"], amount=Decimal("40.00")), conn=db_conn)
+    missing_id = invoice["id"] + 100000
+    # Updating or deleting a missing invoice is detected from the empty RETURNING
+    assert await update_invoice(missing_id, InvoiceUpdate(status="paid"), conn=db_conn) is None
+    assert await delete_invoice_returning(missing_id, conn=db_conn) is None
+    # DELETE ... RETURNING hands back the deleted row
+    deleted = await delete_invoice_returning(invoice["id"], conn=db_conn)
+    assert deleted["id"] == invoice["id"]
+    assert deleted["amount"] == Decimal("40.00")
+    assert await get_invoice_by_id(invoice["id"], conn=db_conn) is None
+    # An unknown client is reported from the foreign key violation
+    # (last statement: the violation aborts the test transaction)
+    result = await create_invoice(InvoiceCreate(client_id=client["id"] + 100000, amount=Decimal("1.00")), conn=db_conn)
+    assert result == {"success": False, "error": f"Client with ID {client['id'] + 100000} not found"}
+
+@pytest.mark.asyncio
+async def test_invoice_frame_from_rows_matches_dicts(db_conn):
+    """
+    Test that the frame read from the database rows (cents, ordinals and status codes
+    converted by PostgreSQL) equals the one built from the invoice dictionaries, and
+    that the report digest is the same with either.
+    """
+    client = await create_client("Frame Client", "Frame City", "frame.client@example.com", conn=db_conn)
+    rows = [
+        InvoiceCreate(client_id=client["id"], amount=Decimal("100.10"), status="paid",
+                      issued_at=date(2024, 1, 5), due_date=date(2024, 2, 4)),
+        InvoiceCreate(client_id=client["id"], amount=Decimal("0.20"), status="pending", issued_at=date(2024, 1, 20)),
+        InvoiceCreate(client_id=client["id"], amount=Decimal("50.00"), status="canceled", issued_at=date(2024, 3, 10)),
+        InvoiceCreate(client_id=client["id"], amount=Decimal("75.25"), status="pending",
+                      issued_at=date(2024, 4, 1), due_date=date(2024, 5, 1)),
+    ]
+    assert len((await bulk_create_invoices(rows, conn=db_conn))["created"]) == 4
+
+    invoices = await get_invoices_by_period(date(2024, 1, 1), date(2024, 4, 1), client_id=client["id"], conn=db_conn)
+    from_rows = await get_invoice_frame(date(2024, 1, 1), date(2024, 4, 1), client_id=client["id"], conn=db_conn)
+    from_dicts = InvoiceFrame.from_dicts(invoices)
+    assert len(from_rows) == 3
+    for column in InvoiceFrame.__slots__:
+        assert getattr(from_rows, column).tolist() == getattr(from_dicts, column).tolist()
+        assert getattr(from_rows, column).dtype == getattr(from_dicts, column).dtype
+    assert [from_rows.invoice(p)["due_date"] for p in range(3)] == [date(2024, 2, 4), None, None]
+
+    today = date(2024, 6, 30)
+    assert billing_data(invoices, max_tokens=1, today=today, frame=from_rows) == billing_data(invoices, max_tokens=1, today=today)
+
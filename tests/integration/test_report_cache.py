@@ -0,0 +1,31 @@
+# tests/integration/test_report_cache.py
+import pytest
+
+from backend.services.report_cache import lookup_report_text, store_report_text, prune_report_texts
+
+# Integration tests for the LLM report text cache table (database/llm_report_cache.sql,
+# applied by the db_engine_pool fixture)
+
+ENTRY = {
+    "cache_key": "test-key", "report_type": "executive", "client_id": None, "period": "2024-01-01 to 2024-03-31",
+    "model": "test-model", "template_version": "v1", "data_fingerprint": "2:2:15.50:abc",
+}
+
+@pytest.mark.asyncio
+async def test_store_lookup_and_expiry(db_conn):
+    """
+    Test that a stored text is found and counted, that storing again replaces it,
+    and that expired entries are neither returned nor kept by prune.
+    """
+    assert await lookup_report_text("test-key", 0, conn=db_conn) is None
+    assert (await store_report_text(ENTRY, "<p>first</p>", conn=db_conn))["success"]
+    assert await lookup_report_text("test-key", 3600, conn=db_conn) == "<p>first</p>"
+    assert await db_conn.fetchval("SELECT hits FROM llm_report_cache WHERE cache_key = 'test-key'") == 1
+
+    assert (await store_report_text(ENTRY, "<p>second</p>", conn=db_conn))["success"]
+    assert await lookup_report_text("test-key", 0, conn=db_conn) == "<p>second</p>"
+
+    await db_conn.execute("UPDATE llm_report_cache SET created_at = created_at - interval '2 hours'")
+    assert await lookup_report_text("test-key", 3600, conn=db_conn) is None
+    assert await prune_report_texts(0, conn=db_conn) == {"deleted": 0}
+    assert await prune_report_texts(3600, conn=db_conn) == {"deleted": 1}
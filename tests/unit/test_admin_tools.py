@@ -0,0 +1,17 @@
+import pytest
+from unittest.mock import patch
+from backend.api.v1.tools import admin_tools
+
+@pytest.mark.asyncio
+async def test_admin_tools_disabled_without_admin_token():
+    """
+    Test that the administrative tools refuse every token while ADMIN_API_TOKEN is unset,
+    and only accept the configured token once it is set.
+    """
+    with patch.object(admin_tools, "ADMIN_API_TOKEN", None):
+        for token in ("", "changeme-token-dev"):
+            result = await admin_tools.pool_stats(token)
+            assert result["success"] is False and "disabled" in result["error"]
+    with patch.object(admin_tools, "ADMIN_API_TOKEN", "admin-secret"):
+        assert (await admin_tools.email_queue_tool("wrong"))["success"] is False
+        assert (await admin_tools.email_queue_tool("admin-secret"))["success"] is True
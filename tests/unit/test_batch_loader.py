@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from backend.core.batch_loader import BatchLoader
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_are_coalesced_and_deduplicated():
+    """
+    Test that loads made in the same tick share one batch call with unique keys.
+    """
+    calls = []
+    async def batch_fn(keys):
+        calls.append(sorted(keys))
+        return {key: {"id": key} for key in keys if key != 404}
+    loader = BatchLoader(batch_fn)
+    results = await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(404))
+    assert results == [{"id": 1}, {"id": 2}, {"id": 1}, None]
+    assert calls == [[1, 2, 404]]
+    # A later tick starts a new batch: nothing is cached
+    assert await loader.load(1) == {"id": 1}
+    assert len(calls) == 2
+    assert loader.stats() == {"batches": 2, "keys_requested": 5, "keys_loaded": 4}
+
+@pytest.mark.asyncio
+async def test_batch_errors_and_max_batch_size():
+    """
+    Test that batches are split by size and that a failing batch fails its callers.
+    """
+    calls = []
+    async def batch_fn(keys):
+        calls.append(list(keys))
+        if 13 in keys:
+            raise RuntimeError("boom")
+        return {key: key * 10 for key in keys}
+    loader = BatchLoader(batch_fn, max_batch_size=2)
+    assert await loader.load_many([1, 2, 3]) == [10, 20, 30]
+    assert calls == [[1, 2], [3]]
+    with pytest.raises(RuntimeError):
+        await loader.load(13)
@@ -0,0 +1,29 @@
+from backend.core.bulk import validate_rows, row_results
+from backend.models.invoice import InvoiceCreate
+
+def test_validate_rows_reports_errors_per_row():
+    """
+    Test that batch validation keeps the valid rows and reports the others by index.
+    """
+    rows = [
+        {"client_id": 1, "amount": "10.50", "issued_at": "2024-01-01"},
+        {"client_id": 1, "amount": "abc"},
+        {"client_id": 2, "amount": 5, "status": "unknown", "due_date": ""},
+    ]
+    valid, errors = validate_rows(InvoiceCreate, rows)
+    assert [index for index, _ in valid] == [0]
+    assert str(valid[0][1].amount) == "10.50"
+    assert set(errors) == {1, 2}
+    assert "amount" in errors[1]
+    assert "status" in errors[2] and "due_date" not in errors[2]
+
+def test_row_results_in_input_order():
+    """
+    Test that per-row results follow the input order.
+    """
+    results = row_results(3, {0: {"id": 7}, 2: {"id": 8}}, {1: "bad row"}, "invoice")
+    assert results == [
+        {"index": 0, "success": True, "invoice": {"id": 7}},
+        {"index": 1, "success": False, "error": "bad row"},
+        {"index": 2, "success": True, "invoice": {"id": 8}},
+    ]
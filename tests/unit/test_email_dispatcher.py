@@ -0,0 +1,108 @@
+import asyncio
+import smtplib
+import ssl
+import uuid
+import pytest
+from email.message import EmailMessage
+from unittest.mock import AsyncMock, patch
+from backend.benchmarks.smtp_sink import SmtpSink
+from backend.services.email_dispatcher import EmailDispatcher, is_transient
+
+def make_message(n: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg['Subject'] = f"Report {n}"
+    msg['From'] = "reports@example.com"
+    msg['To'] = "manager@example.com"
+    msg.set_content(f"Report {n}")
+    return msg
+
+@pytest.mark.asyncio
+async def test_workers_reuse_their_smtp_sessions():
+    """
+    Test that queued emails are sent over at most one connection per worker, and
+    that a session the server closed is reopened without a retry.
+    """
+    sink = SmtpSink()
+    host, port = await sink.start()
+    dispatcher = EmailDispatcher(host, port, security="none", user="user", password="secret", workers=2)
+    try:
+        await asyncio.gather(*(dispatcher.send(make_message(n), wait=False) for n in range(20)))
+        await dispatcher.flush()
+        assert len(sink.messages) == 20 and sink.connections <= 2
+        sink.drop_connections()
+        await asyncio.sleep(0.05)
+        await dispatcher.send(make_message(20))
+        assert len(sink.messages) == 21
+        stats = dispatcher.stats()
+        assert stats["emails"] == {"sent": 21, "failed": 0} and stats["retries"] == 0
+    finally:
+        await dispatcher.close()
+        await sink.close()
+    assert dispatcher.stats()["open_sessions"] == 0
+    with pytest.raises(RuntimeError):
+        await dispatcher.send(make_message(21))
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried_and_status_recorded():
+    """
+    Test that 4xx answers are retried with backoff, that 5xx answers fail at once,
+    and that each delivery records queued and then sent or failed.
+    """
+    sink = SmtpSink()
+    host, port = await sink.start()
+    dispatcher = EmailDispatcher(host, port, security="none", workers=1, max_retries=3, retry_base_delay=0.01)
+    record = AsyncMock(return_value={"success": True})
+    try:
+        with patch("backend.services.email_dispatcher.record_delivery", new=record):
+            sink.mail_replies.extend([421, 451])
+            sent_id = uuid.uuid4()
+            await dispatcher.send(make_message(1), delivery_id=sent_id)
+            assert len(sink.messages) == 1 and dispatcher.retries == 2
+
+            sink.mail_replies.append(550)
+            failed_id = uuid.uuid4()
+            with pytest.raises(smtplib.SMTPSenderRefused):
+                await dispatcher.send(make_message(2), delivery_id=failed_id)
+            assert dispatcher.retries == 2 and dispatcher.counts["failed"] == 1
+    finally:
+        await dispatcher.close()
+        await sink.close()
+    statuses = [(call.args[0], call.args[3], call.args[4]) for call in record.await_args_list]
+    assert statuses == [(sent_id, "queued", 0), (sent_id, "sent", 3), (failed_id, "queued", 0), (failed_id, "failed", 1)]
+    assert "550" in record.await_args_list[-1].args[5]
+
+@pytest.mark.asyncio
+async def test_failing_status_record_does_not_block_the_sender():
+    """
+    Test that when recording the delivery status raises (e.g. the pool cannot
+    connect), the email is still sent, the caller is answered and the worker survives.
+    """
+    sink = SmtpSink()
+    host, port = await sink.start()
+    dispatcher = EmailDispatcher(host, port, security="none", workers=1)
+    record = AsyncMock(side_effect=ConnectionRefusedError("pool unavailable"))
+    try:
+        with patch("backend.services.email_dispatcher.record_delivery", new=record):
+            for n in range(2):
+                await asyncio.wait_for(dispatcher.send(make_message(n), delivery_id=uuid.uuid4()), 5)
+        assert len(sink.messages) == 2 and record.await_count == 4
+        assert dispatcher.stats()["emails"] == {"sent": 2, "failed": 0}
+    finally:
+        await dispatcher.close()
+        await sink.close()
+
+def test_transient_errors():
+    """
+    Test that connection problems and 4xx answers are retried, while SMTP errors
+    without a reply code and TLS errors, both OSError subclasses, are not.
+    """
+    assert is_transient(smtplib.SMTPServerDisconnected("Connection unexpectedly closed"))
+    assert is_transient(smtplib.SMTPDataError(451, b"Try again later"))
+    assert is_transient(ConnectionResetError()) and is_transient(asyncio.TimeoutError())
+    assert is_transient(ssl.SSLEOFError())
+    assert not is_transient(smtplib.SMTPDataError(554, b"Rejected"))
+    assert not is_transient(smtplib.SMTPNotSupportedError("STARTTLS extension not supported by server."))
+    assert not is_transient(smtplib.SMTPException("No suitable authentication method found."))
+    assert not is_transient(ssl.SSLCertVerificationError("certificate verify failed"))
+    assert not is_transient(ValueError())
+
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import AsyncMock, patch
 from backend.api.v1.tools import report_tools
+from backend.core.config import REPORT_API_TOKEN
 
 @pytest.mark.asyncio
 async def test_generate_report_success():
@@ -18,18 +19,21 @@ async def test_generate_report_success():
     # Mocks for sub-functions
     with patch('backend.api.v1.tools.report_tools.obtener_manager_autorizado', new=AsyncMock(return_value=fake_manager)), \
          patch('backend.api.v1.tools.report_tools.obtener_invoices_cliente_periodo', new=AsyncMock(return_value=(fake_client, fake_invoices))), \
-         patch('backend.api.v1.tools.report_tools.generar_texto_informe_llm', return_value='<b>Report</b>'), \
+         patch('backend.api.v1.tools.report_tools.generar_texto_informe_llm', new=AsyncMock(return_value='<b>Report</b>')), \
          patch('backend.api.v1.tools.report_tools.send_email_with_report', new=AsyncMock(return_value=True)), \
-         patch('backend.api.v1.tools.report_tools.guardar_informe_db', new=AsyncMock(return_value={"success": True})):
+         patch('backend.api.v1.tools.report_tools.guardar_informe_db', new=AsyncMock(return_value={"success": True})) as guardar:
         result = await report_tools.generate_report(
             client_name='Test Client',
             period='2024',
             manager_name='David Salas',
             manager_email='dsf@protonmail.com',
-            report_type='general'
+            report_type='general',
+            api_token=REPORT_API_TOKEN
         )
         assert result['success'] is True
         assert 'Report sent' in result['message']
+        # Reports are stored write-behind unless the caller asks for durability
+        assert guardar.await_args.kwargs['durable'] is False
 
 @pytest.mark.asyncio
 async def test_generate_report_manager_not_authorized():
@@ -42,7 +46,8 @@ async def test_generate_report_manager_not_authorized():
             period='2024',
             manager_name='No Manager',
             manager_email='no@no.com',
-            report_type='general'
+            report_type='general',
+            api_token=REPORT_API_TOKEN
         )
         assert result['success'] is False
         assert 'not authorized' in result['error'].lower() 
\ No newline at end of file
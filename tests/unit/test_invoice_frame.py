@@ -0,0 +1,52 @@
+from datetime import date
+from decimal import Decimal
+import numpy as np
+from backend.benchmarks.invoice_frame import run
+from backend.core.invoice_frame import InvoiceFrame
+
+TODAY = date(2024, 3, 31)
+INVOICES = [
+    {"id": 1, "client_id": 7, "amount": Decimal("100.10"), "status": "paid", "issued_at": date(2024, 1, 5), "due_date": date(2024, 2, 4)},
+    {"id": 2, "client_id": 7, "amount": Decimal("50.00"), "status": "pending", "issued_at": date(2024, 1, 20), "due_date": date(2024, 2, 19)},
+    {"id": 3, "client_id": 2, "amount": Decimal("0.20"), "status": "pending", "issued_at": date(2024, 3, 10), "due_date": None},
+    {"id": 4, "client_id": None, "amount": Decimal("30.00"), "status": "canceled", "issued_at": "2023-11-30", "due_date": None},
+]
+
+def test_aggregates_on_small_frame():
+    """
+    Test totals, aging, DSO, client rollup and monthly series against hand-computed values.
+    """
+    frame = InvoiceFrame.from_dicts(INVOICES)
+    assert frame.status_totals() == {"paid": (1, 10010), "pending": (2, 5020), "canceled": (1, 3000)}
+    # Invoice 2 is 41 days past due; invoice 3 has no due date and counts from its issue date
+    assert [(count, cents) for _, count, cents in frame.aging(TODAY)] == [(0, 0), (1, 20), (1, 5000), (0, 0), (0, 0)]
+    # Billed in the last 90 days (not canceled): 150.30; pending: 50.20
+    assert round(frame.dso(TODAY), 4) == round(5020 / 15030 * 90, 4)
+    clients = frame.client_rollup()
+    assert clients["client_id"].tolist() == [-1, 2, 7]
+    assert clients["cents"].tolist() == [3000, 20, 15010] and clients["pending_cents"].tolist() == [0, 20, 5000]
+    monthly = frame.monthly()
+    assert monthly["month"].astype(str).tolist() == ["2023-11", "2024-01", "2024-03"]
+    assert monthly["paid_cents"].tolist() == [0, 10010, 0] and monthly["pending_cents"].tolist() == [0, 5000, 20]
+    assert frame.largest(2).tolist() == [0, 1]
+    positions, days, overdue = frame.most_overdue(TODAY, 1)
+    assert positions.tolist() == [1] and days.tolist() == [41] and overdue == 2
+
+def test_frame_from_database_rows_matches_dicts():
+    """
+    Test that rows shaped like queries.INVOICE_FRAME_COLUMNS give the same frame.
+    """
+    rows = [(1, 7, 10010, date(2024, 1, 5).toordinal(), date(2024, 2, 4).toordinal(), 0),
+            (2, 7, 5000, date(2024, 1, 20).toordinal(), date(2024, 2, 19).toordinal(), 1),
+            (3, 2, 20, date(2024, 3, 10).toordinal(), 0, 1),
+            (4, -1, 3000, date(2023, 11, 30).toordinal(), 0, 2)]
+    from_rows, from_dicts = InvoiceFrame.from_records(rows), InvoiceFrame.from_dicts(INVOICES)
+    for column in InvoiceFrame.__slots__:
+        assert np.array_equal(getattr(from_rows, column), getattr(from_dicts, column))
+        assert getattr(from_rows, column).dtype == getattr(from_dicts, column).dtype
+
+def test_benchmark_paths_agree():
+    """
+    Test that the benchmark's dictionary loops and the frame give the same aggregates.
+    """
+    assert run(3000)["results_match"]
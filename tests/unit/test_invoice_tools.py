@@ -0,0 +1,53 @@
+import json
+import pytest
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+from backend.api.v1.tools import invoice_tools
+
+def _fake_invoice(invoice_id):
+    return {
+        'id': invoice_id, 'client_id': 1, 'amount': Decimal('10.00'),
+        'issued_at': date(2024, 1, 1), 'due_date': None, 'status': 'pending'
+    }
+
+def _fake_ctx(progress_token=None):
+    meta = SimpleNamespace(progressToken=progress_token)
+    return SimpleNamespace(
+        request_context=SimpleNamespace(meta=meta),
+        report_progress=AsyncMock(),
+        log=AsyncMock()
+    )
+
+@pytest.mark.asyncio
+async def test_stream_invoices_sends_chunks_as_progress():
+    """
+    Test that each streamed chunk is sent as a progress notification.
+    """
+    async def fake_iter(chunk_size):
+        yield [_fake_invoice(1), _fake_invoice(2)]
+        yield [_fake_invoice(3)]
+    ctx = _fake_ctx(progress_token='token-1')
+    with patch('backend.api.v1.tools.invoice_tools.service_iter_all_invoices', new=fake_iter):
+        result = await invoice_tools.stream_invoices(ctx, chunk_size=2)
+    assert result == {"success": True, "invoices_sent": 3, "chunks": 2}
+    assert ctx.report_progress.await_count == 2
+    last_call = ctx.report_progress.await_args_list[-1].kwargs
+    assert last_call['progress'] == 3
+    assert [i['id'] for i in json.loads(last_call['message'])['invoices']] == [3]
+    ctx.log.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_stream_invoices_falls_back_to_log_messages():
+    """
+    Test that chunks are sent as log notifications when there is no progress token.
+    """
+    async def fake_iter(chunk_size):
+        yield [_fake_invoice(1)]
+    ctx = _fake_ctx()
+    with patch('backend.api.v1.tools.invoice_tools.service_iter_all_invoices', new=fake_iter):
+        result = await invoice_tools.stream_invoices(ctx)
+    assert result['success'] is True
+    ctx.log.assert_awaited_once()
+    ctx.report_progress.assert_not_awaited()
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from backend.core.lifecycle import Lifecycle, READY, DRAINING, STOPPED, STARTING
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_inflight_calls_and_rejects_new_ones():
+    """
+    Test that shutdown lets the calls in flight finish before running the hooks,
+    and that calls made while draining are rejected.
+    """
+    lifecycle = Lifecycle()
+    await lifecycle.startup(timeout=1)
+    assert lifecycle.state == READY
+    release = asyncio.Event()
+    order = []
+
+    async def slow_tool():
+        await release.wait()
+        order.append("tool finished")
+        return {"success": True}
+
+    async def close_pool():
+        order.append("pool closed")
+
+    lifecycle.on_shutdown("pool", close_pool)
+    tool = lifecycle.guard_tool(slow_tool, "slow_tool")
+    call = asyncio.create_task(tool())
+    await asyncio.sleep(0)
+    assert lifecycle.inflight == 1
+
+    shutdown = asyncio.create_task(lifecycle.shutdown(drain_timeout=5))
+    await asyncio.sleep(0)
+    assert lifecycle.state == DRAINING
+    assert (await tool())["success"] is False
+    release.set()
+    await shutdown
+    assert await call == {"success": True}
+    assert order == ["tool finished", "pool closed"]
+    assert lifecycle.state == STOPPED
+
+@pytest.mark.asyncio
+async def test_drain_deadline_and_failed_warm_up():
+    """
+    Test that the drain gives up at its deadline and that a failed warm-up keeps
+    the server not ready while it is retried.
+    """
+    lifecycle = Lifecycle()
+    lifecycle.on_startup("database pool", AsyncMock(side_effect=[OSError("connection refused"), None]))
+    assert await lifecycle.startup(timeout=1, retry_interval=0.01) is False
+    assert lifecycle.state == STARTING and lifecycle.status()["error"] == "connection refused"
+    await asyncio.sleep(0.05)
+    assert lifecycle.ready
+
+    hang = lifecycle.guard_tool(asyncio.Event().wait, "hang")
+    call = asyncio.create_task(hang())
+    await asyncio.sleep(0)
+    assert await lifecycle.drain(timeout=0.01) is False
+    assert await lifecycle.drain(timeout=10) is False  # Does not wait a second time
+    call.cancel()
@@ -0,0 +1,79 @@
+import asyncio
+import openai
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from backend.core.llm_client import LLMClient
+
+def completion(text):
+    return {
+        "id": "chatcmpl-stub", "object": "chat.completion", "created": 0, "model": "stub",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": text}}],
+    }
+
+@pytest_asyncio.fixture
+async def stub_server():
+    """
+    Local OpenAI-compatible server: answers the queued statuses first, then completions.
+    Records the concurrent requests and the client ports (one per connection).
+    """
+    state = {"statuses": [], "requests": 0, "active": 0, "max_active": 0, "ports": set(), "delay": 0}
+
+    async def chat_completions(request):
+        state["requests"] += 1
+        state["active"] += 1
+        state["max_active"] = max(state["max_active"], state["active"])
+        state["ports"].add(request.transport.get_extra_info("peername")[1])
+        try:
+            await asyncio.sleep(state["delay"])
+            body = await request.json()
+            if state["statuses"]:
+                return web.json_response({"error": {"message": "stub error"}}, status=state["statuses"].pop(0),
+                                         headers={"Retry-After": "0"})
+            return web.json_response(completion(body["messages"][-1]["content"].upper()))
+        finally:
+            state["active"] -= 1
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/v1", state
+    await runner.cleanup()
+
+def make_client(base_url, **options):
+    return LLMClient(api_key="test", base_url=base_url, model="stub", timeout=5,
+                     retry_base_delay=0.01, retry_max_delay=0.05, **options)
+
+@pytest.mark.asyncio
+async def test_retries_server_errors_then_succeeds(stub_server):
+    """
+    Test that 5xx and 429 answers are retried and a 4xx error is raised at once.
+    """
+    base_url, state = stub_server
+    client = make_client(base_url, max_retries=3)
+    state["statuses"] = [503, 429]
+    assert await client.complete([{"role": "user", "content": "hello"}]) == "HELLO"
+    assert state["requests"] == 3 and client.retries == 2
+
+    state["statuses"] = [400]
+    with pytest.raises(openai.BadRequestError):
+        await client.complete([{"role": "user", "content": "bad"}])
+    assert state["requests"] == 4 and client.retries == 2 and client.stats()["requests"] == {"success": 1, "failure": 1}
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_and_connection_reuse(stub_server):
+    """
+    Test that concurrent completions never exceed the limit and reuse pooled connections.
+    """
+    base_url, state = stub_server
+    state["delay"] = 0.05
+    client = make_client(base_url, max_concurrency=2)
+    results = await asyncio.gather(*(client.complete([{"role": "user", "content": f"r{i}"}]) for i in range(8)))
+    assert results == [f"R{i}" for i in range(8)]
+    assert state["max_active"] == 2 and len(state["ports"]) <= 2
+    await client.close()
@@ -0,0 +1,33 @@
+import pytest
+from backend.core.pagination import encode_cursor, decode_cursor, resolve_after_id, split_page, clamp_limit
+from backend.core.config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+def test_cursor_round_trip():
+    """
+    Test that a cursor decodes back to the id it was built from.
+    """
+    cursor = encode_cursor(1234)
+    assert '1234' not in cursor  # Opaque for the agent
+    assert decode_cursor(cursor) == 1234
+    assert resolve_after_id(after_id=5, cursor=cursor) == 1234
+    assert resolve_after_id(after_id=5) == 5
+
+def test_decode_cursor_invalid():
+    """
+    Test that a malformed cursor is rejected.
+    """
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_split_page_and_clamp_limit():
+    """
+    Test page splitting with the extra look-ahead row and page size limits.
+    """
+    rows = [{'id': 1}, {'id': 2}, {'id': 3}]
+    page, next_cursor = split_page(rows, 2)
+    assert page == [{'id': 1}, {'id': 2}]
+    assert decode_cursor(next_cursor) == 2
+    page, next_cursor = split_page(rows, 3)
+    assert len(page) == 3 and next_cursor is None
+    assert clamp_limit(0) == PAGE_SIZE_DEFAULT
+    assert clamp_limit(PAGE_SIZE_MAX + 1) == PAGE_SIZE_MAX
@@ -0,0 +1,42 @@
+import pytest
+from datetime import date
+from backend.core.periods import parse_period
+from backend.services.report_service import filter_invoices_by_period
+
+TODAY = date(2024, 3, 15)
+
+@pytest.mark.parametrize("text, start, end", [
+    ("2024", date(2024, 1, 1), date(2025, 1, 1)),
+    ("2024-2", date(2024, 2, 1), date(2024, 3, 1)),
+    ("12/2023", date(2023, 12, 1), date(2024, 1, 1)),
+    ("Q4 2023", date(2023, 10, 1), date(2024, 1, 1)),
+    ("2024-W01", date(2024, 1, 1), date(2024, 1, 8)),
+    ("2024-02-29", date(2024, 2, 29), date(2024, 3, 1)),
+    ("2023-11 .. 2024-Q1", date(2023, 11, 1), date(2024, 4, 1)),
+    ("last 7 days", date(2024, 3, 9), date(2024, 3, 16)),
+])
+def test_parse_period(text, start, end):
+    """
+    Test that each accepted form becomes the expected half-open range of issue dates.
+    """
+    period = parse_period(text, today=TODAY)
+    assert (period.start, period.end) == (start, end)
+
+@pytest.mark.parametrize("text", ["2024-13", "2024-Q5", "2024-03..2024-01", "march", "last 0 days"])
+def test_invalid_period_is_rejected(text):
+    """
+    Test that an invalid period raises ValueError explaining the accepted forms.
+    """
+    with pytest.raises(ValueError, match="Use a year"):
+        parse_period(text, today=TODAY)
+
+def test_filter_invoices_by_period_compares_dates():
+    """
+    Test that in-memory filtering uses the date range rather than a substring match.
+    """
+    invoices = [
+        {"id": 1, "issued_at": date(2024, 1, 31)},
+        {"id": 2, "issued_at": date(2024, 4, 1)},
+        {"id": 3, "issued_at": None},
+    ]
+    assert [i["id"] for i in filter_invoices_by_period(invoices, "2024-Q1")] == [1]
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from backend.core.pool_stats import AdaptivePoolLimiter, PoolStats, percentile
+
+def test_percentile_nearest_rank():
+    """
+    Test percentile computation on a small sample.
+    """
+    values = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+    assert percentile(values, 50) == 0.5
+    assert percentile(values, 90) == 0.9
+    assert percentile(values, 99) == 1.0
+    assert percentile([], 90) == 0.0
+
+def test_pool_stats_wait_percentiles_in_ms():
+    """
+    Test that acquire waits are reported in milliseconds.
+    """
+    stats = PoolStats()
+    for wait in (0.001, 0.002, 0.010):
+        stats.record_wait(wait)
+    result = stats.wait_percentiles()
+    assert result['max'] == 10.0
+    assert result['samples'] == 3
+    assert stats.acquired_total == 3
+    assert stats.drain_interval() == [0.001, 0.002, 0.010]
+    assert stats.drain_interval() == []
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_grows_and_shrinks():
+    """
+    Test that the adaptive limit grows on slow acquires and shrinks when idle.
+    """
+    limiter = AdaptivePoolLimiter(min_limit=1, max_limit=8, target_wait=0.05)
+    assert limiter.limit == 1
+    # Slow acquires: the limit doubles up to the maximum
+    assert await limiter.adjust([0.2] * 10) == 2
+    assert await limiter.adjust([0.2] * 10) == 4
+    assert await limiter.adjust([0.2] * 10) == 8
+    assert await limiter.adjust([0.2] * 10) == 8
+    # Fast acquires with low usage: the limit shrinks one step at a time
+    assert await limiter.adjust([0.0] * 10) == 7
+    assert await limiter.adjust([]) == 6
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_blocks_above_limit():
+    """
+    Test that acquirers wait while the limit is reached and resume when a slot is freed.
+    """
+    limiter = AdaptivePoolLimiter(min_limit=1, max_limit=2, target_wait=0.05)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+    await limiter.release()
+    await asyncio.wait_for(waiter, 1)
+    assert limiter.in_use == 1
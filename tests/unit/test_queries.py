@@ -0,0 +1,46 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from backend.core import queries
+
+def test_build_update_is_canonical_regardless_of_field_order():
+    """
+    Test that the same set of fields always produces the same UPDATE text.
+    """
+    sql_a, values_a = queries.build_update(
+        "clients", {"email": "a@b.c", "name": "Ann"}, 7, queries.CLIENT_COLUMNS, ("name", "city", "email")
+    )
+    sql_b, values_b = queries.build_update(
+        "clients", {"name": "Ann", "email": "a@b.c"}, 7, queries.CLIENT_COLUMNS, ("name", "city", "email")
+    )
+    assert sql_a == sql_b
+    assert sql_a == f"UPDATE clients SET email = $1, name = $2 WHERE id = $3 RETURNING {queries.CLIENT_COLUMNS}"
+    assert values_a == values_b == ["a@b.c", "Ann", 7]
+
+def test_build_update_rejects_unknown_columns():
+    """
+    Test that column names outside the whitelist are refused.
+    """
+    with pytest.raises(ValueError):
+        queries.build_update("clients", {"id": 1}, 7, queries.CLIENT_COLUMNS, ("name", "city", "email"))
+
+def test_register_normalizes_whitespace_and_rejects_conflicts():
+    """
+    Test that registered text is whitespace-normalized and names are unique.
+    """
+    assert queries.CLIENT_GET_BY_ID == f"SELECT {queries.CLIENT_COLUMNS} FROM clients WHERE id = $1"
+    assert queries.register("clients.get_by_id", f"SELECT {queries.CLIENT_COLUMNS}\n FROM clients WHERE id = $1") == queries.CLIENT_GET_BY_ID
+    with pytest.raises(ValueError):
+        queries.register("clients.get_by_id", "SELECT 1")
+
+@pytest.mark.asyncio
+async def test_prepare_statements_uses_statement_cache():
+    """
+    Test that every registered statement is prepared into the connection's cache.
+    """
+    conn = MagicMock()
+    conn.is_in_transaction.return_value = False
+    conn._prepare = AsyncMock()
+    prepared = await queries.prepare_statements(conn)
+    assert prepared == len(queries.registered_queries())
+    for call in conn._prepare.await_args_list:
+        assert call.kwargs == {"use_cache": True}
@@ -0,0 +1,156 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, Mock
+from backend.core.query_cache import QueryCache
+
+@pytest.mark.asyncio
+async def test_repeated_and_concurrent_reads_share_one_query():
+    """
+    Test that repeated calls are answered from the cache with copies of the rows,
+    that concurrent misses run the query once, and that calls given a connection
+    or returning nothing are not cached.
+    """
+    cache = QueryCache(enabled=True)
+    calls = []
+
+    @cache.cached("clients")
+    async def get_client_by_id(client_id, conn=None):
+        calls.append(client_id)
+        await asyncio.sleep(0.01)
+        return {"id": client_id, "name": "Ana"} if client_id != 404 else None
+
+    results = await asyncio.gather(*(get_client_by_id(1) for _ in range(5)))
+    assert calls == [1] and all(result == {"id": 1, "name": "Ana"} for result in results)
+    results[0]["name"] = "changed"
+    assert (await get_client_by_id(client_id=1))["name"] == "Ana"
+    await get_client_by_id(1, conn=object())
+    await get_client_by_id(404)
+    await get_client_by_id(404)
+    assert calls == [1, 1, 404, 404]
+    stats = cache.stats()
+    assert (stats["hit"], stats["miss"], stats["coalesced"], stats["bypass"]) == (1, 3, 4, 1)
+
+@pytest.mark.asyncio
+async def test_error_results_are_not_cached():
+    """
+    Test that an error dictionary returned on a database error (truthy, unlike an
+    empty result) is not stored, so the next call queries again.
+    """
+    cache = QueryCache(enabled=True)
+    results = [{"success": False, "error": "connection reset"}, {"total_amount": 100}]
+
+    @cache.cached("invoices", "billing_summary")
+    async def get_billing_summary(period=None, conn=None):
+        return results.pop(0)
+
+    assert (await get_billing_summary())["success"] is False
+    assert await get_billing_summary() == {"total_amount": 100}
+    assert await get_billing_summary() == {"total_amount": 100}
+    assert results == [] and cache.stats()["entries"] == 1
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_tags_and_discard_loads_in_flight():
+    """
+    Test that a write drops the results of the tables it touches, that a read
+    started before the write does not store its result, and that the LRU is bounded.
+    """
+    cache = QueryCache(enabled=True, max_entries=2)
+    rows = {1: "Ana", 2: "Luis", 3: "Eva"}
+    release = asyncio.Event()
+
+    @cache.cached("clients")
+    async def get_name(client_id):
+        name = rows[client_id]
+        if client_id == 2:
+            await release.wait()
+        return name
+
+    @cache.invalidates("clients")
+    async def rename(client_id, name):
+        rows[client_id] = name
+
+    assert await get_name(1) == "Ana"
+    await rename(1, "Ana María")
+    assert await get_name(1) == "Ana María"
+
+    slow_read = asyncio.create_task(get_name(2))
+    for _ in range(2):
+        await asyncio.sleep(0)
+    await rename(2, "Luis Miguel")
+    release.set()
+    assert await slow_read == "Luis"  # Started before the write, not stored
+    assert await get_name(2) == "Luis Miguel"
+
+    await get_name(1)
+    await get_name(3)
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert stats["invalidations"] == {"clients": 2}
+
+@pytest.mark.asyncio
+async def test_reads_soon_after_invalidation_and_long_lists_not_stored():
+    """
+    Test that with replicas a read started within replica_lag of an invalidation is
+    not stored (the replica may predate the write), and that lists over max_rows are
+    returned but not stored.
+    """
+    cache = QueryCache(enabled=True, max_rows=3, replica_lag=0.05)
+    calls = []
+
+    @cache.cached("invoices")
+    async def get_all_invoices(limit=None):
+        calls.append(limit)
+        return [{"id": n} for n in range(1, 6)][:limit]
+
+    @cache.invalidates("invoices")
+    async def delete_invoice(invoice_id):
+        pass
+
+    assert len(await get_all_invoices()) == 5
+    assert len(await get_all_invoices()) == 5
+    await get_all_invoices(2)
+    await get_all_invoices(2)
+    assert calls == [None, None, 2]
+
+    await delete_invoice(1)
+    await get_all_invoices(2)
+    await get_all_invoices(2)
+    await asyncio.sleep(0.06)
+    await get_all_invoices(2)
+    await get_all_invoices(2)
+    assert calls == [None, None, 2, 2, 2, 2]
+    stats = cache.stats()
+    assert (stats["oversized"], stats["unsettled"], stats["entries"]) == (2, 2, 1)
+
+@pytest.mark.asyncio
+async def test_notifications_invalidate_and_lost_listener_bypasses_cache():
+    """
+    Test that a NOTIFY for a table invalidates its results and that the cache is
+    bypassed while the listening connection is down.
+    """
+    cache = QueryCache(enabled=True)
+    conn = AsyncMock()
+    conn.add_termination_listener = lambda listener: None
+    # asyncpg's terminate() is synchronous
+    conn.terminate = Mock()
+    cache.start_listener(AsyncMock(return_value=conn), check_interval=60)
+    await asyncio.sleep(0)
+    assert cache.listening
+    on_notification = conn.add_listener.await_args.args[1]
+    load = AsyncMock(return_value=[{"id": 1}])
+
+    @cache.cached("managers")
+    async def list_managers():
+        return await load()
+
+    await list_managers()
+    await list_managers()
+    on_notification(conn, 1234, "table_changes", "managers")
+    await list_managers()
+    assert load.await_count == 2
+
+    cache._on_connection_lost(conn)
+    await list_managers()
+    assert load.await_count == 3 and cache.stats()["bypass"] == 1
+    await cache.close()
+    conn.terminate.assert_called_once_with()
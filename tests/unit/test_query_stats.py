@@ -0,0 +1,104 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from backend.core.database import Database
+from backend.core.histogram import Histogram
+from backend.core.instrumentation import InstrumentedConnection, normalize_sql
+from backend.core.query_stats import QueryStats, OVERFLOW_KEY
+from backend.core import queries
+
+def make_conn():
+    """
+    Builds a mocked asyncpg connection.
+    """
+    conn = MagicMock()
+    conn.fetch = AsyncMock(return_value=[{"id": 1}, {"id": 2}, {"id": 3}])
+    conn.fetchrow = AsyncMock(return_value=None)
+    conn.execute = AsyncMock(return_value="UPDATE 4")
+    return conn
+
+def test_normalize_sql_replaces_literals():
+    """
+    Test that literals are normalized and positional parameters are kept.
+    """
+    assert normalize_sql("SELECT *\n  FROM t WHERE a = 'x''y' AND b IN (1, 2.5, -3) AND c = $1") == \
+        "SELECT * FROM t WHERE a = ? AND b IN (?) AND c = $1"
+    assert normalize_sql(queries.CLIENT_GET_BY_ID) == queries.CLIENT_GET_BY_ID
+
+def test_histogram_percentiles():
+    """
+    Test that percentiles are estimated from the bucket bounds.
+    """
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for value in [0.005] * 90 + [0.05] * 9 + [3.0]:
+        histogram.observe(value)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 0.01
+    assert histogram.percentile(99) == 0.1
+    assert histogram.percentile(100) == 3.0
+    assert histogram.cumulative() == [90, 99, 99, 100]
+
+@pytest.mark.asyncio
+async def test_instrumented_connection_records_statement_caller_rows_and_errors():
+    """
+    Test that statements run on the proxy are recorded per statement and caller.
+    """
+    stats = QueryStats()
+    raw = make_conn()
+    conn = InstrumentedConnection(raw, [stats])
+
+    async def list_items():
+        return await conn.fetch("SELECT id FROM t WHERE id > 10")
+
+    assert len(await list_items()) == 3
+    assert await conn.execute("UPDATE t SET a = $1", 1) == "UPDATE 4"
+    raw.fetchrow.side_effect = RuntimeError("boom")
+    with pytest.raises(RuntimeError):
+        await conn.fetchrow("SELECT 1")
+
+    caller = f"{__name__}.test_instrumented_connection_records_statement_caller_rows_and_errors"
+    fetch = stats.entry("SELECT id FROM t WHERE id > ?", f"{caller}.<locals>.list_items")
+    assert fetch.latency.count == 1 and fetch.rows == 3 and fetch.errors == 0
+    assert stats.entry("UPDATE t SET a = $1", caller).rows == 4
+    assert stats.entry("SELECT ?", caller).errors == 1
+
+    snapshot = stats.snapshot(order_by="rows")
+    assert snapshot["statements"][0]["rows"] == 4
+    assert {c["caller"] for c in snapshot["callers"]} == {caller, f"{caller}.<locals>.list_items"}
+    stats.reset()
+    assert stats.snapshot()["tracked"] == 0
+
+def test_query_stats_caps_tracked_entries():
+    """
+    Test that pairs beyond max_entries are aggregated in the overflow entry.
+    """
+    stats = QueryStats(max_entries=2)
+    conn = InstrumentedConnection(make_conn(), [stats])
+    for index in range(4):
+        conn._emit(MagicMock(statement=f"SELECT {index}", caller="c", duration=0.001, rows=1, error=None))
+    assert stats.entry("SELECT 1", "c").latency.count == 1
+    assert stats.entry("SELECT 2", "c") is None
+    assert stats.entry(*OVERFLOW_KEY).latency.count == 2
+    with pytest.raises(ValueError):
+        stats.snapshot(order_by="name")
+
+@pytest.mark.asyncio
+async def test_connection_instrumented_only_with_observers():
+    """
+    Test that the raw connection is handed out while no observer is registered.
+    """
+    db = Database()
+    db._query_observers = []
+    db._pool = MagicMock()
+    db._pool.acquire = AsyncMock(return_value="conn-primary")
+    db._pool.release = AsyncMock()
+    async with db.connection() as conn:
+        assert conn == "conn-primary"
+
+    stats = QueryStats()
+    db.add_query_observer(stats)
+    async with db.connection() as conn:
+        assert isinstance(conn, InstrumentedConnection)
+        assert conn.raw_connection == "conn-primary"
+    db._pool.release.assert_awaited_with("conn-primary")
+    db.remove_query_observer(stats)
+    assert not db.has_query_observer(stats)
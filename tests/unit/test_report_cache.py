@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+from backend.core.report_prompt import digest_date
+from backend.services.report_cache import ReportTextCache, invoices_fingerprint
+
+INVOICES = [
+    {"id": 1, "client_id": 7, "amount": Decimal("10.00"), "status": "pending", "issued_at": "2024-01-10", "due_date": None},
+    {"id": 2, "client_id": 7, "amount": Decimal("5.50"), "status": "paid", "issued_at": "2024-02-05", "due_date": None},
+]
+
+def stored_texts():
+    """
+    Patches the llm_report_cache table with a dictionary.
+    """
+    table = {}
+
+    async def lookup(cache_key, ttl):
+        return table.get(cache_key)
+
+    async def store(entry, report_text):
+        table[entry["cache_key"]] = report_text
+        return {"success": True}
+
+    return table, patch.multiple("backend.services.report_cache", lookup_report_text=lookup, store_report_text=store)
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_generation():
+    """
+    Test that concurrent identical requests generate once, that a later request is
+    answered from the table, and that equivalent periods share the entry while a
+    change in the invoices or the model does not.
+    """
+    cache = ReportTextCache(enabled=True)
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return f"report {len(calls)}"
+
+    def request(period="2024-Q1", invoices=INVOICES, model="m1"):
+        return cache.get_or_generate(generate, "Executive", 7, period, "Ana@example.com", model, "v1", invoices)
+
+    table, patched = stored_texts()
+    with patched:
+        assert await asyncio.gather(*(request() for _ in range(5))) == ["report 1"] * 5
+        assert await request(period="2024-01..2024-03") == "report 1"
+        changed = [dict(INVOICES[0], status="paid"), INVOICES[1]]
+        assert await request(invoices=changed) == "report 2"
+        assert await request(model="m2") == "report 3"
+    assert len(calls) == 3 and len(table) == 3
+    stats = cache.stats()
+    assert (stats["hit"], stats["miss"], stats["coalesced"], stats["in_flight"]) == (1, 3, 4, 0)
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached_and_disabled_cache_bypasses():
+    """
+    Test that a failed generation is not stored, that lookup and store errors (returned
+    or raised) still give the generated report, and that a disabled cache always generates.
+    """
+    cache = ReportTextCache(enabled=True)
+    table, patched = stored_texts()
+
+    async def fail():
+        raise RuntimeError("LLM down")
+
+    async def generate():
+        return "report"
+
+    with patched:
+        with pytest.raises(RuntimeError):
+            await cache.get_or_generate(fail, "general", None, "", "a@example.com", "m", "v1", INVOICES)
+        assert table == {}
+        with patch("backend.services.report_cache.lookup_report_text", return_value={"success": False, "error": "down"}):
+            assert await cache.get_or_generate(generate, "general", None, "", "a@example.com", "m", "v1", INVOICES) == "report"
+        assert cache.errors == 1
+
+    # The pool cannot connect: with_db_connection raises instead of returning an error
+    down = AsyncMock(side_effect=ConnectionRefusedError("pool unavailable"))
+    with patch.multiple("backend.services.report_cache", lookup_report_text=down, store_report_text=down):
+        assert await cache.get_or_generate(generate, "general", None, "", "b@example.com", "m", "v1", INVOICES) == "report"
+    assert cache.errors == 3 and down.await_count == 2
+
+    with patched:
+        disabled = ReportTextCache(enabled=False)
+        assert await disabled.get_or_generate(generate, "general", None, "", "a@example.com", "m", "v1", INVOICES) == "report"
+        assert disabled.stats()["bypass"] == 1
+    assert invoices_fingerprint(INVOICES) == invoices_fingerprint(list(reversed(INVOICES)))
+
+def test_digest_reports_key_on_reference_date():
+    """
+    Test that reports rendered as a digest (which depends on the current date) get a
+    new key every day, while reports listing the invoices keep theirs.
+    """
+    fingerprint = invoices_fingerprint(INVOICES)
+    args = ("Executive", 7, "2024-Q1", "ana@example.com", "m1", "v1", fingerprint)
+    assert digest_date(INVOICES, max_tokens=10_000) is None
+    assert digest_date(INVOICES, max_tokens=5) == date.today()
+    assert ReportTextCache.key(*args, None) == ReportTextCache.key(*args)
+    assert ReportTextCache.key(*args, date(2024, 4, 1)) != ReportTextCache.key(*args, date(2024, 4, 2))
+
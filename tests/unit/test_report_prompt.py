@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from backend.api.v1.tools import report_tools
+from backend.core.report_prompt import REPORT_INSTRUCTIONS, billing_data
+
+TODAY = date(2024, 6, 30)
+
+def make_invoices(count):
+    start = date(2022, 1, 1)
+    return [
+        {
+            "id": i, "client_id": i % 7, "amount": Decimal("100.00") + i,
+            "status": ("paid", "pending", "canceled")[i % 3],
+            "issued_at": start + timedelta(days=i % 900), "due_date": start + timedelta(days=i % 900 + 30),
+        }
+        for i in range(1, count + 1)
+    ]
+
+def test_invoices_over_budget_are_summarized():
+    """
+    Test that invoices are listed while they fit in the budget and summarized beyond it,
+    with totals that cover every invoice.
+    """
+    text, summarized = billing_data(make_invoices(3), max_tokens=1000, today=TODAY)
+    assert not summarized and text.count("ID: ") == 3
+
+    invoices = make_invoices(20000)
+    text, summarized = billing_data(invoices, max_tokens=1000, today=TODAY)
+    assert summarized
+    total = sum(invoice["amount"] for invoice in invoices)
+    assert f"Invoices: 20000, total amount {total:.2f}" in text
+    assert "over 90 days overdue" in text and "Monthly series" in text and "Yearly totals" in text
+    assert "Largest 10 invoices:\nID: 20000," in text
+    # The digest does not grow with the number of invoices
+    assert len(text) < len(billing_data(invoices[:3000], max_tokens=1000, today=TODAY)[0]) * 1.5
+
+def test_prompt_starts_with_static_prefix():
+    """
+    Test that prompts for different reports share the static instructions as their prefix.
+    """
+    global_prompt = report_tools.build_report_prompt(make_invoices(5000), None, "", "executive")
+    client_prompt = report_tools.build_report_prompt(make_invoices(2), "Test Client", "2024", "general")
+    assert global_prompt.startswith(REPORT_INSTRUCTIONS) and client_prompt.startswith(REPORT_INSTRUCTIONS)
+    assert "Invoices: 5000," in global_prompt
+    assert "ID: 1, Amount: 101.00" in client_prompt
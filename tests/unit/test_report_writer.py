@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.services.report_writer import ReportWriter, REPORT_COLUMNS
+
+def fake_connection(conn):
+    """
+    Builds a replacement for database.connection() yielding the given connection.
+    """
+    @asynccontextmanager
+    async def connection(read_only=False):
+        yield conn
+    return connection
+
+def make_record(n: int) -> tuple:
+    return (n, f"Client {n}", "2024", "m@example.com", "Manager", "general", f"<p>{n}</p>", None)
+
+@pytest.mark.asyncio
+async def test_report_writer_batches_queued_reports():
+    """
+    Test that reports queued together are written with a single COPY.
+    """
+    conn = MagicMock()
+    conn.copy_records_to_table = AsyncMock()
+    writer = ReportWriter(max_queue_size=10, batch_size=100)
+    with patch('backend.services.report_writer.database.connection', new=fake_connection(conn)):
+        for n in range(5):
+            await writer.submit(make_record(n))
+        await writer.submit(make_record(5), durable=True)
+        await writer.close()
+    calls = conn.copy_records_to_table.await_args_list
+    assert sum(len(call.kwargs['records']) for call in calls) == 6
+    assert len(calls) == 1
+    assert calls[0].kwargs['columns'] == REPORT_COLUMNS
+    with pytest.raises(RuntimeError):
+        await writer.submit(make_record(6))
+
+@pytest.mark.asyncio
+async def test_report_writer_durable_submit_reports_failures():
+    """
+    Test that a bad report fails only its own durable caller.
+    """
+    async def copy(table, records, columns):
+        if any(record[0] == 13 for record in records):
+            raise ValueError("bad report")
+    conn = MagicMock()
+    conn.copy_records_to_table = AsyncMock(side_effect=copy)
+    writer = ReportWriter(max_queue_size=10, batch_size=100)
+    with patch('backend.services.report_writer.database.connection', new=fake_connection(conn)):
+        good = asyncio.create_task(writer.submit(make_record(1), durable=True))
+        bad = asyncio.create_task(writer.submit(make_record(13), durable=True))
+        await good
+        with pytest.raises(ValueError):
+            await bad
+        await writer.close()
+
+@pytest.mark.asyncio
+async def test_report_writer_retries_batch_after_connection_errors():
+    """
+    Test that a batch failing on connection errors is written again whole, after a
+    backoff, instead of being split or dropped.
+    """
+    failures = [ConnectionResetError("reset"), asyncio.TimeoutError()]
+
+    async def copy(table, records, columns):
+        if failures:
+            raise failures.pop(0)
+    conn = MagicMock()
+    conn.copy_records_to_table = AsyncMock(side_effect=copy)
+    writer = ReportWriter(max_queue_size=10, batch_size=100, retry_base_delay=0.001)
+    with patch('backend.services.report_writer.database.connection', new=fake_connection(conn)):
+        for n in range(3):
+            await writer.submit(make_record(n))
+        await writer.close()
+    calls = conn.copy_records_to_table.await_args_list
+    assert [len(call.kwargs['records']) for call in calls] == [3, 3, 3]
@@ -0,0 +1,81 @@
+import datetime
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+from backend.core.instrumentation import QueryEvent
+from backend.core import queries
+from backend.core.slow_queries import SlowQueryLog, is_pure_read
+
+def make_event(sql, args=(), duration=0.5, method="fetch"):
+    return QueryEvent(sql, args, method, "backend.services.x.get_y", 0.0, duration, 1, None)
+
+def make_connect(conn):
+    @asynccontextmanager
+    async def connect():
+        yield conn
+    return connect
+
+@pytest.mark.asyncio
+async def test_slow_statements_logged_with_param_types_and_plan():
+    """
+    Test that only statements over the threshold are recorded, and that reads are
+    explained with ANALYZE in a rolled-back transaction.
+    """
+    conn = MagicMock()
+    conn.execute = AsyncMock()
+    conn.fetch = AsyncMock(return_value=[("Seq Scan on clients",), ("  Filter: (lower(name) = 'x')",)])
+    transaction = conn.transaction.return_value
+    transaction.start = AsyncMock()
+    transaction.rollback = AsyncMock()
+    slow_log = SlowQueryLog(threshold_ms=100, explain=True, connect=make_connect(conn))
+
+    slow_log(make_event("SELECT 1", duration=0.01))
+    slow_log(make_event("SELECT * FROM clients WHERE LOWER(name) = LOWER($1) AND created_at > $2",
+                        ("ana", datetime.date(2024, 1, 1))))
+    await slow_log._explain_task
+
+    [entry] = slow_log.recent()
+    assert entry["param_types"] == ["str", "date"]
+    assert entry["duration_ms"] == 500.0 and entry["caller"] == "backend.services.x.get_y"
+    assert entry["plan"] == "Seq Scan on clients\n  Filter: (lower(name) = 'x')"
+    assert conn.fetch.await_args.args[0].startswith("EXPLAIN (ANALYZE, BUFFERS) SELECT")
+    assert conn.fetch.await_args.args[1:] == ("ana", datetime.date(2024, 1, 1))
+    transaction.rollback.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_writes_only_planned_and_explains_rate_limited():
+    """
+    Test that DML is not re-executed and that a statement is explained once per interval.
+    """
+    conn = MagicMock()
+    conn.execute = AsyncMock()
+    conn.fetch = AsyncMock(return_value=[("Update on invoices",)])
+    conn.transaction.return_value.start = AsyncMock()
+    conn.transaction.return_value.rollback = AsyncMock()
+    slow_log = SlowQueryLog(threshold_ms=100, explain=True, connect=make_connect(conn), explain_interval=60)
+
+    for _ in range(2):
+        slow_log(make_event("UPDATE invoices SET status = $1 WHERE id = $2", ("paid", 1), method="execute"))
+        await slow_log._explain_task
+    slow_log(make_event("COPY invoices FROM STDIN", method="copy"))
+
+    assert conn.fetch.await_count == 1
+    assert conn.fetch.await_args.args[0].startswith("EXPLAIN (COSTS) UPDATE")
+    assert slow_log.total == 3
+    assert not SlowQueryLog(threshold_ms=0).enabled
+
+def test_only_pure_reads_are_analyzed():
+    """
+    Test that statements with side effects a rollback does not undo (functions, nextval,
+    row locks) are not considered pure reads, so they are only planned.
+    """
+    assert is_pure_read(queries.INVOICES_BY_CLIENT_PERIOD)
+    assert is_pure_read(f"SELECT {queries.INVOICE_FRAME_COLUMNS} FROM invoices WHERE client_id = $1")
+    assert is_pure_read("SELECT count(*), COALESCE(SUM(amount), 0)::numeric(12, 2) FROM invoices WHERE status = 'lock'")
+    assert not is_pure_read(queries.BILLING_SUMMARY_REBUILD)
+    assert not is_pure_read(queries.CLIENTS_RESERVE_IDS)
+    assert not is_pure_read(queries.INVOICES_RESERVE_IDS)
+    assert not is_pure_read(queries.CLIENTS_EXISTING)
+    assert not is_pure_read("SELECT id FROM invoices WHERE status = $1 ORDER BY id LIMIT 10 FOR UPDATE")
+    assert not is_pure_read("WITH d AS (DELETE FROM invoices RETURNING id) SELECT count(*) FROM d")
+    assert not is_pure_read("UPDATE invoices SET status = $1 WHERE id = $2")
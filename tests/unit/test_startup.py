@@ -0,0 +1,29 @@
+import json
+import subprocess
+import sys
+from backend.benchmarks.startup import check_budgets
+
+def test_server_import_keeps_report_dependencies_lazy(tmp_path):
+    """
+    Test that importing the server in a fresh interpreter registers every tool
+    without importing matplotlib, openai or bleach.
+    """
+    output = tmp_path / "startup.json"
+    result = subprocess.run(
+        [sys.executable, "-m", "backend.benchmarks.startup", "--max-import-seconds", "30", "--output", str(output)],
+        capture_output=True, text=True, timeout=120,
+    )
+    report = json.loads(output.read_text())
+    assert result.returncode == 0, report["problems"]
+    assert report["lazy_modules_loaded"] == []
+    assert report["tools"] >= 20
+
+def test_budget_violations_reported():
+    """
+    Test that exceeded budgets and eagerly imported modules are reported.
+    """
+    report = {"import_seconds": 2.5, "rss_after_import_mb": 90.0, "rss_at_ready_mb": 150.0,
+              "lazy_modules_loaded": ["matplotlib"], "ready": True}
+    problems = check_budgets(report, max_import_seconds=2, max_rss=100)
+    assert len(problems) == 3
+    assert check_budgets(report | {"lazy_modules_loaded": []}, max_import_seconds=0, max_rss=0) == []
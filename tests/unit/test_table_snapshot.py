@@ -0,0 +1,82 @@
+import datetime
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.core.table_snapshot import ReferenceSnapshot, TableSnapshot
+from backend.services import manager_service
+
+CLIENT_ROWS = [
+    {"id": 2, "name": "Ana Ruiz", "city": "Sevilla", "email": "ana@example.com", "created_at": None},
+    {"id": 1, "name": "ANA RUIZ", "city": "Madrid", "email": None, "created_at": None},
+]
+
+def notification(**change):
+    return json.dumps(change)
+
+def test_indexes_follow_sql_lookup_semantics():
+    """
+    Test that name lookups are case-insensitive (lowest id first) unless exact,
+    and that upserts and deletes keep the indexes current.
+    """
+    clients = TableSnapshot("clients", "id, name, city, email, created_at", converters={})
+    clients.replace(CLIENT_ROWS)
+    assert clients.find("name", "ana ruiz")["id"] == 1
+    assert clients.find("name", "Ana Ruiz", exact=True)["id"] == 2
+    assert clients.find("email", "ANA@example.com")["id"] == 2
+    assert clients.find("email", "ANA@example.com", exact=True) is None
+
+    clients.upsert({"id": 1, "name": "Luis", "city": "Madrid", "email": "luis@example.com", "created_at": None, "extra": 1})
+    assert clients.find("name", "ana ruiz")["id"] == 2
+    assert clients.get(1) == {"id": 1, "name": "Luis", "city": "Madrid", "email": "luis@example.com", "created_at": None}
+    clients.delete(2)
+    assert clients.find("name", "ana ruiz") is None and [row["id"] for row in clients.all()] == [1]
+
+@pytest.mark.asyncio
+async def test_changes_during_load_are_applied_after_it():
+    """
+    Test that the tables are loaded after LISTEN, that the rows notified during the
+    load are applied afterwards, and that a lost listener makes the tables not ready.
+    """
+    snapshot = ReferenceSnapshot()
+    conn = MagicMock()
+    conn.add_listener = AsyncMock()
+    conn.fetchval = AsyncMock(return_value=2)
+
+    async def fetch(query):
+        if "FROM managers" in query:
+            return [{"id": 7, "name": "Marta", "email": "marta@example.com", "role": "boss", "created_at": None}]
+        # A client is inserted (and notified) while the clients table is being read
+        on_notification = conn.add_listener.await_args.args[1]
+        on_notification(conn, 1, "row_changes", notification(
+            table="clients", op="INSERT", old_id=None,
+            row={"id": 3, "name": "Eva", "city": None, "email": None, "created_at": "2024-05-01T10:00:00.5"},
+        ))
+        return CLIENT_ROWS
+
+    conn.fetch = fetch
+    snapshot.start(AsyncMock(return_value=conn), check_interval=60)
+    assert await snapshot.wait_loaded(1)
+    assert snapshot.clients.ready and snapshot.managers.ready
+    assert snapshot.clients.get(3)["created_at"] == datetime.datetime(2024, 5, 1, 10, 0, 0, 500000)
+
+    snapshot._on_notification(conn, 1, "row_changes", notification(table="managers", op="DELETE", id=7))
+    assert snapshot.managers.all() == []
+    snapshot._on_connection_lost(conn)
+    assert not snapshot.clients.ready and not snapshot.managers.ready
+    await snapshot.close()
+
+@pytest.mark.asyncio
+async def test_manager_lookup_uses_snapshot_and_falls_back_on_miss():
+    """
+    Test that a manager found in the loaded snapshot does not reach the database,
+    while a miss is still checked there.
+    """
+    managers = TableSnapshot("managers", "id, name, email, role, created_at")
+    managers.replace([{"id": 1, "name": "Marta", "email": "marta@example.com", "role": "boss", "created_at": None}])
+    fetchrow = AsyncMock(return_value=None)
+    with patch("backend.services.manager_service.reference_snapshot.managers", managers), \
+         patch("backend.core.database.Database.fetchrow", new=fetchrow):
+        assert (await manager_service.get_manager_by_email("marta@example.com"))["name"] == "Marta"
+        assert fetchrow.await_count == 0
+        assert await manager_service.get_manager_by_name("marta") is None
+        assert fetchrow.await_count == 1
@@ -0,0 +1,47 @@
+import json
+import inspect
+import pytest
+from backend.core.tool_metrics import ToolMetrics
+
+@pytest.mark.asyncio
+async def test_instrumented_tool_records_outcomes_and_response_size():
+    """
+    Test that calls are counted by outcome and dict responses are serialized once.
+    """
+    metrics = ToolMetrics()
+
+    async def get_item(item_id: int) -> dict:
+        if item_id < 0:
+            raise ValueError("negative id")
+        if item_id == 0:
+            return {"success": False, "error": "Item not found"}
+        return {"success": True, "item": {"id": item_id}}
+
+    tool = metrics.instrument(get_item, "get_item")
+    assert inspect.signature(tool) == inspect.signature(get_item)
+
+    response = await tool(item_id=7)
+    assert json.loads(response) == {"success": True, "item": {"id": 7}}
+    await tool(item_id=0)
+    with pytest.raises(ValueError):
+        await tool(item_id=-1)
+
+    stats = metrics.snapshot()["get_item"]
+    assert (stats["calls"], stats["success"], stats["failure"], stats["exception"]) == (3, 1, 1, 1)
+    assert stats["failure_rate"] == round(2 / 3, 4)
+    assert metrics.tools["get_item"].response_bytes.sum > len(response.encode())
+
+def test_render_prometheus_histograms():
+    """
+    Test the Prometheus exposition of counters and cumulative histogram buckets.
+    """
+    metrics = ToolMetrics()
+    tool = metrics.instrument(lambda: "ok", "ping")
+    tool()
+    tool()
+    text = metrics.render_prometheus()
+    assert 'mcp_tool_calls_total{tool="ping",outcome="success"} 2' in text
+    assert 'mcp_tool_duration_seconds_bucket{tool="ping",le="+Inf"} 2' in text
+    assert 'mcp_tool_response_bytes_bucket{tool="ping",le="256"} 2' in text
+    assert 'mcp_tool_response_bytes_sum{tool="ping"} 4.0' in text
+    assert "# TYPE mcp_tool_duration_seconds histogram" in text
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
+from backend.core.instrumentation import QueryEvent
+from backend.core.tracing import Tracer, BatchExporter, to_otlp, KIND_CLIENT
+from backend.services.report_writer import ReportWriter
+
+class CapturingExporter(BatchExporter):
+    """
+    Exporter that keeps the written spans in memory.
+    """
+    def __init__(self):
+        super().__init__(interval=0)
+        self.spans = []
+
+    async def _write(self, spans):
+        self.spans.extend(spans)
+
+@pytest.mark.asyncio
+async def test_tool_service_and_sql_spans_nest_in_one_trace():
+    """
+    Test that child spans, including SQL spans from query events, share the root's trace.
+    """
+    exporter = CapturingExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+
+    def render():
+        with tracer.span("chart.render") as span:
+            return span is not None
+
+    async def service():
+        with tracer.span("service get_item"):
+            tracer.observe_query(QueryEvent("SELECT * FROM t WHERE id = 5", (), "fetch", "svc", 1.0, 0.002, 1, None))
+            assert await asyncio.to_thread(render)
+        return {"success": False, "error": "Item not found"}
+
+    tool = tracer.instrument_tool(service, "get_item")
+    assert await tool() == {"success": False, "error": "Item not found"}
+    await tracer.close()
+
+    by_name = {span.name: span for span in exporter.spans}
+    root, child, sql = by_name["tool get_item"], by_name["service get_item"], by_name["SQL fetch"]
+    assert root.parent_id is None and root.error == "Item not found"
+    assert child.parent_id == root.span_id and sql.parent_id == child.span_id
+    assert by_name["chart.render"].parent_id == child.span_id
+    assert {span.trace_id for span in exporter.spans} == {root.trace_id}
+    assert sql.kind == KIND_CLIENT and sql.attributes["db.statement"] == "SELECT * FROM t WHERE id = ?"
+    assert sql.end_ns - sql.start_ns == 2_000_000
+
+@pytest.mark.asyncio
+async def test_unsampled_calls_record_nothing():
+    """
+    Test that outside a sampled root span no span is created.
+    """
+    exporter = CapturingExporter()
+    tracer = Tracer(exporter, sample_rate=0.0)
+    with tracer.root_span("tool x") as root:
+        assert root is None
+        with tracer.span("child") as child:
+            assert child is None
+    await tracer.close()
+    assert exporter.spans == []
+    assert Tracer(None).instrument_tool(len, "len") is len
+
+def test_otlp_encoding():
+    """
+    Test the OTLP JSON encoding of status, ids and typed attributes.
+    """
+    tracer = Tracer(CapturingExporter())
+    with pytest.raises(RuntimeError):
+        with tracer.root_span("tool x", rows=3, ratio=0.5, cached=False) as root:
+            raise RuntimeError("boom")
+    span = to_otlp([root], "svc")["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["status"] == {"code": 2, "message": "boom"}
+    assert len(span["traceId"]) == 32 and len(span["spanId"]) == 16 and span["parentSpanId"] == ""
+    assert {"key": "rows", "value": {"intValue": "3"}} in span["attributes"]
+    assert {"key": "cached", "value": {"boolValue": False}} in span["attributes"]
+
+def test_exporter_without_write_cannot_be_created():
+    """
+    Test that an exporter missing _write() fails when it is created, not on the first flush.
+    """
+    class IncompleteExporter(BatchExporter):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteExporter()
+
+@pytest.mark.asyncio
+async def test_background_workers_do_not_join_the_trace_that_starts_them():
+    """
+    Test that a worker started inside a sampled span records no spans in that trace,
+    and that spans ending after their root was exported are dropped, not kept.
+    """
+    exporter = CapturingExporter()
+    tracer = Tracer(exporter, sample_rate=1.0)
+    worker_spans = []
+
+    class Connection:
+        async def copy_records_to_table(self, table, records, columns):
+            with tracer.span("copy") as span:
+                worker_spans.append(span)
+
+    @asynccontextmanager
+    async def connection(read_only=False):
+        yield Connection()
+
+    writer = ReportWriter(max_queue_size=10, batch_size=10)
+    release = asyncio.Event()
+
+    async def late_child():
+        await release.wait()
+        for _ in range(100):
+            with tracer.span("late"):
+                pass
+
+    with patch("backend.services.report_writer.database.connection", new=connection):
+        with tracer.root_span("tool generate_report") as root:
+            await writer.submit((1,), durable=True)
+            late = asyncio.create_task(late_child())
+        release.set()
+        await late
+        await writer.submit((2,), durable=True)
+        await writer.close()
+    await tracer.close()
+
+    assert worker_spans == [None, None]
+    assert [span.name for span in exporter.spans] == ["tool generate_report"]
+    assert root._trace == [root]
+